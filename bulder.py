@@ -1,6 +1,15 @@
+import argparse
+import hashlib
 import json
-from pathlib import Path
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from string import Template
+from typing import Dict, List, Optional, Tuple
 
 # YAML support
 try:
@@ -87,34 +96,276 @@ def parse_tree(tree_str: str) -> dict:
             d = structure
             for p in stack:
                 d = d.setdefault(p, {})
-            d[name] = ""
-            if comment:
-                d["_comment"] = comment
+            # Fayl qiymati - uning izohi (dict_to_tree ham shunday o'qiydi)
+            d[name] = comment
     return structure
 
+# --- FILE TEMPLATES (bir marta kompilyatsiya qilinadi) ---
+BUILTIN_TEMPLATES = {
+    "python_module": '"""\n$title\n"""\n',
+    "comment": "# $title\n",
+    "handler": r'''"""
+${title} - Qurilish Korxonasi
+"""
+from aiogram import types, Dispatcher
+from aiogram.dispatcher import FSMContext
+from aiogram.dispatcher.filters.state import State, StatesGroup
+import logging
+
+from database.session import get_db_session
+from database import ${name}_crud
+
+logger = logging.getLogger(__name__)
+
+# =============== ${upper_name} STATES ===============
+class ${class_name}States(StatesGroup):
+    waiting_name = State()
+    confirm = State()
+
+# =============== HANDLERS ===============
+async def ${name}_menu(message: types.Message, state: FSMContext):
+    """${title} ro'yxati"""
+    await state.finish()
+
+    with get_db_session() as db:
+        items = ${name}_crud.get_${name}_list(db, limit=10)
+
+    text = "\n".join(f"• #{item.id}" for item in items) or "Hozircha ma'lumot yo'q"
+    await message.answer(f"📋 ${title}\n\n{text}")
+
+def register_handlers_${name}(dp: Dispatcher):
+    """${title} handlerlarini ro'yxatdan o'tkazish"""
+    dp.register_message_handler(${name}_menu, commands=["${name}"], state="*")
+''',
+    "crud": r'''"""
+${title} CRUD operatsiyalari
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from . import models
+
+# =============== ${title} CRUD ===============
+def create_${name}(db: Session, data: Dict) -> models.${class_name}:
+    """Yangi yozuv yaratish"""
+    item = models.${class_name}(**data)
+    db.add(item)
+    db.commit()
+    db.refresh(item)
+    return item
+
+def get_${name}(db: Session, item_id: int) -> Optional[models.${class_name}]:
+    """Yozuvni ID bo'yicha olish"""
+    return db.query(models.${class_name}).filter(models.${class_name}.id == item_id).first()
+
+def get_${name}_list(db: Session, skip: int = 0, limit: int = 100) -> List[models.${class_name}]:
+    """Barcha yozuvlarni olish"""
+    return db.query(models.${class_name}).offset(skip).limit(limit).all()
+
+def update_${name}(db: Session, item_id: int, update_data: Dict) -> Optional[models.${class_name}]:
+    """Yozuvni yangilash"""
+    item = get_${name}(db, item_id)
+    if item:
+        for key, value in update_data.items():
+            setattr(item, key, value)
+        db.commit()
+        db.refresh(item)
+    return item
+
+def delete_${name}(db: Session, item_id: int) -> bool:
+    """Yozuvni o'chirish"""
+    item = get_${name}(db, item_id)
+    if item:
+        db.delete(item)
+        db.commit()
+        return True
+    return False
+''',
+}
+
+# Yangi bot moduli uchun fayllar: yo'l -> shablon
+MODULE_FILES = {
+    "handlers/${name}.py": "handler",
+    "database/${name}_crud.py": "crud",
+}
+
+MANIFEST_NAME = ".scaffold.json"
+
+
+@lru_cache(maxsize=None)
+def load_templates(template_dir: Optional[str] = None) -> Dict[str, Template]:
+    """
+    Shablonlar to'plami (bir marta o'qiladi va kompilyatsiya qilinadi).
+    template_dir dagi *.tpl fayllar ichki shablonlarni nomi bo'yicha almashtiradi.
+    """
+    sources = dict(BUILTIN_TEMPLATES)
+    if template_dir:
+        for path in sorted(Path(template_dir).glob("*.tpl")):
+            sources[path.stem] = path.read_text(encoding="utf-8")
+    return {name: Template(text) for name, text in sources.items()}
+
+
+def module_context(name: str, title: Optional[str] = None) -> Dict[str, str]:
+    """Modul nomidan shablon o'zgaruvchilari (inventory_items -> InventoryItems)"""
+    if not name.isidentifier():
+        raise ValueError(f"Modul nomi Python identifikatori bo'lishi kerak: {name}")
+    class_name = "".join(part.capitalize() for part in name.split("_"))
+    return {
+        "name": name,
+        "class_name": class_name,
+        "upper_name": name.upper(),
+        "title": title or class_name,
+    }
+
+
+# --- SCAFFOLD ENGINE ---
+class ScaffoldEngine:
+    """
+    Papka va fayllarni thread pool bilan yaratadi.
+
+    Idempotent: har bir fayl uchun yozilgan kontent hash'i root/.scaffold.json da saqlanadi.
+    - kontent bir xil -> o'tkaziladi
+    - fayl oldingi generatsiyadan beri qo'lda o'zgartirilmagan -> yangilanadi
+    - qo'lda o'zgartirilgan -> tegilmaydi (force=True bo'lsa ham yoziladi)
+    """
+
+    def __init__(self, root: str, workers: int = 8, template_dir: Optional[str] = None, force: bool = False):
+        self.root = Path(root)
+        self.workers = workers
+        self.templates = load_templates(template_dir)
+        self.force = force
+        self.timings: Dict[str, float] = {}
+        self.counts = {"created": 0, "updated": 0, "skipped": 0, "conflicts": 0}
+        self.conflicts: List[str] = []
+
+    @contextmanager
+    def _phase(self, name: str):
+        started = time.perf_counter()
+        yield
+        self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def render(self, template: str, context: Dict[str, str]) -> str:
+        return self.templates[template].substitute(context)
+
+    def render_tree_file(self, name: str, comment: str) -> str:
+        """Daraxtdagi fayl kontenti: .py - docstring, qolganlari - izoh qatori"""
+        if not comment:
+            return ""
+        template = "python_module" if name.endswith(".py") else "comment"
+        return self.render(template, {"title": comment})
+
+    def plan_structure(self, structure: dict) -> Tuple[List[Path], Dict[Path, str]]:
+        """Dict strukturasidan (papkalar, {fayl: kontent}) rejasi"""
+        dirs: List[Path] = [self.root]
+        files: Dict[Path, str] = {}
+
+        def walk(path: Path, sub: dict):
+            for name, content in sub.items():
+                if name == "_comment":
+                    continue
+                full_path = path / name
+                if isinstance(content, dict):
+                    dirs.append(full_path)
+                    walk(full_path, content)
+                else:
+                    # Eski formatdagi fayllar: izoh papkadagi _comment kalitida
+                    comment = content or sub.get("_comment", "")
+                    files[full_path] = self.render_tree_file(name, comment)
+
+        with self._phase("render"):
+            walk(self.root, structure)
+        return dirs, files
+
+    def plan_module(self, context: Dict[str, str]) -> Tuple[List[Path], Dict[Path, str]]:
+        """Yangi bot moduli (handler + CRUD) fayllari"""
+        files: Dict[Path, str] = {}
+        with self._phase("render"):
+            for path_template, template in MODULE_FILES.items():
+                path = self.root / Template(path_template).substitute(context)
+                files[path] = self.render(template, context)
+        return sorted({path.parent for path in files}), files
+
+    def _load_manifest(self) -> Dict[str, str]:
+        path = self.root / MANIFEST_NAME
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))
+        return {}
+
+    def _write_file(self, path: Path, content: str, recorded: Optional[str]) -> Tuple[str, str]:
+        """Bitta faylni yozish (threadda). Returns: (natija, yangi hash)"""
+        data = content.encode("utf-8")
+        new_hash = hashlib.sha256(data).hexdigest()
+
+        if path.exists():
+            current_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+            if current_hash == new_hash:
+                return "skipped", new_hash
+            if current_hash != recorded and not self.force:
+                return "conflicts", current_hash
+            status = "updated"
+        else:
+            status = "created"
+
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return status, new_hash
+
+    def apply(self, dirs: List[Path], files: Dict[Path, str]) -> Dict[str, int]:
+        manifest = self._load_manifest()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            with self._phase("mkdir"):
+                # Faqat eng chuqur papkalar - parents=True qolganini yaratadi
+                all_dirs = set(dirs) | {path.parent for path in files}
+                leaves = all_dirs - {parent for d in all_dirs for parent in d.parents}
+                list(pool.map(lambda d: d.mkdir(parents=True, exist_ok=True), leaves))
+
+            with self._phase("write"):
+                keys = {path: path.relative_to(self.root).as_posix() for path in files}
+                results = pool.map(
+                    lambda item: (item[0], self._write_file(item[0], item[1], manifest.get(keys[item[0]]))),
+                    files.items()
+                )
+                for path, (status, file_hash) in results:
+                    self.counts[status] += 1
+                    if status == "conflicts":
+                        self.conflicts.append(keys[path])
+                    else:
+                        manifest[keys[path]] = file_hash
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+        return self.counts
+
+    def report(self) -> str:
+        lines = ["=== SCAFFOLD HISOBOTI ==="]
+        lines += [f"{name:<10}{count:>6}" for name, count in self.counts.items()]
+        lines += [f"{phase:<10}{seconds * 1000:>9.1f} ms" for phase, seconds in self.timings.items()]
+        lines.append(f"{'jami':<10}{sum(self.timings.values()) * 1000:>9.1f} ms")
+        for path in self.conflicts:
+            lines.append(f"[!] Qo'lda o'zgartirilgan, tegilmadi: {path} (--force bilan yozish)")
+        return "\n".join(lines)
+
+
 # --- CREATE FILES/FOLDERS WITH COMMENTS ---
-def create_structure(root: str, structure: dict):
-    root_path = Path(root)
-    root_path.mkdir(parents=True, exist_ok=True)
-
-    def recurse(path: Path, sub: dict):
-        for name, content in sub.items():
-            if name == "_comment":
-                continue
-            full_path = path / name
-            if isinstance(content, dict):
-                full_path.mkdir(parents=True, exist_ok=True)
-                recurse(full_path, content)
-            else:
-                full_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(full_path, "w", encoding="utf-8") as f:
-                    comment = sub.get("_comment", "")
-                    if comment:
-                        f.write(f"# {comment}\n")
-                    if content:
-                        f.write(content)
-    recurse(root_path, structure)
+def create_structure(root: str, structure: dict, workers: int = 8, force: bool = False) -> ScaffoldEngine:
+    engine = ScaffoldEngine(root, workers=workers, force=force)
+    engine.apply(*engine.plan_structure(structure))
     print(f"\n[✓] Loyiha '{root}' papkada yaratildi!")
+    print(engine.report())
+    return engine
+
+
+def create_module(root: str, name: str, title: Optional[str] = None, workers: int = 8,
+                  template_dir: Optional[str] = None, force: bool = False) -> ScaffoldEngine:
+    """Bot uchun yangi modul: handlers/<name>.py va database/<name>_crud.py"""
+    engine = ScaffoldEngine(root, workers=workers, template_dir=template_dir, force=force)
+    engine.apply(*engine.plan_module(module_context(name, title)))
+    print(f"\n[✓] '{name}' moduli '{root}' ichida yaratildi!")
+    print(engine.report())
+    return engine
 
 # --- CONVERT DICT TO TREE STRING ---
 def dict_to_tree(structure: dict, prefix="") -> str:
@@ -161,7 +412,18 @@ def main():
     print("1 - JSON asosida")
     print("2 - YAML asosida")
     print("3 - TREE matn asosida")
-    choice = input("Tanlovni kiriting (1/2/3): ").strip()
+    print("4 - Bot uchun yangi modul (handler + CRUD)")
+    choice = input("Tanlovni kiriting (1/2/3/4): ").strip()
+
+    if choice == "4":
+        name = input("Modul nomi (masalan: inventory): ").strip()
+        root = input("Bot papkasi (default: construction_factory_bot): ").strip() or "construction_factory_bot"
+        try:
+            create_module(root, name)
+        except Exception as e:
+            print(f"[X] Modul yaratishda xatolik: {e}")
+        return
+
     try:
         sample_file = write_sample_file(choice)
     except Exception as e:
@@ -205,4 +467,29 @@ def main():
     print("\n[✓] Tayyor! Loyiha muvaffaqiyatli yaratildi.")
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) == 1:
+        main()
+    else:
+        parser = argparse.ArgumentParser(description="Loyiha va modul scaffold generatori")
+        parser.add_argument("--tree", help="TREE/JSON/YAML struktura fayli")
+        parser.add_argument("--module", help="Yangi bot moduli nomi (handler + CRUD)")
+        parser.add_argument("--title", help="Modul sarlavhasi (docstring va xabarlar uchun)")
+        parser.add_argument("--root", default="project_root", help="Root papka")
+        parser.add_argument("--templates", help="*.tpl shablonlar papkasi (ichkilarini almashtiradi)")
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--force", action="store_true", help="Qo'lda o'zgartirilgan fayllarni ham yozish")
+        args = parser.parse_args()
+
+        if args.module:
+            create_module(args.root, args.module, args.title, args.workers, args.templates, args.force)
+        elif args.tree:
+            with open(args.tree, "r", encoding="utf-8") as f:
+                if args.tree.endswith(".json"):
+                    structure = json.load(f)
+                elif args.tree.endswith((".yaml", ".yml")):
+                    structure = yaml.safe_load(f)
+                else:
+                    structure = parse_tree(f.read())
+            create_structure(args.root, structure, args.workers, args.force)
+        else:
+            parser.error("--tree yoki --module kerak")
@@ -0,0 +1,274 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import ijson
+
+DEFAULT_DB = "chat_index.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    inserted_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS nodes (
+    conversation_id TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    parent_id TEXT,
+    model TEXT,
+    inserted_at TEXT,
+    PRIMARY KEY (conversation_id, node_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_nodes_parent ON nodes (conversation_id, parent_id);
+CREATE INDEX IF NOT EXISTS ix_nodes_model ON nodes (model);
+
+CREATE TABLE IF NOT EXISTS fragments (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    type TEXT,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_fragments_node ON fragments (conversation_id, node_id);
+CREATE INDEX IF NOT EXISTS ix_fragments_type ON fragments (type);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS fragments_fts USING fts5(
+    content, content='fragments', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# Ildizdan har bir tugungacha bo'lgan chuqurlik
+DEPTH_CTE = """
+WITH RECURSIVE tree(conversation_id, node_id, depth) AS (
+    SELECT conversation_id, node_id, 0 FROM nodes WHERE parent_id IS NULL
+    UNION ALL
+    SELECT n.conversation_id, n.node_id, t.depth + 1
+    FROM nodes n JOIN tree t ON n.conversation_id = t.conversation_id AND n.parent_id = t.node_id
+)
+"""
+
+
+# --- 1. Indekslash ---
+def source_signature(json_file):
+    stat = os.stat(json_file)
+    return f"{os.path.abspath(json_file)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def build_index(json_file, db_path=DEFAULT_DB, force=False):
+    """
+    Eksport faylini bir marta streaming o‘qib SQLite indeksga yozadi.
+    Fayl o‘zgarmagan bo‘lsa (yo‘l, hajm, mtime) qayta o‘qilmaydi.
+    Xotirada bir vaqtda faqat bitta suhbat bo‘ladi.
+    """
+    conn = connect(db_path)
+    signature = source_signature(json_file)
+
+    row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+    if row and row[0] == signature and not force:
+        print(f"[INFO] Indeks dolzarb: {db_path}")
+        conn.close()
+        return False
+
+    started = time.perf_counter()
+    conversations = nodes = fragments = 0
+
+    with conn:
+        for table in ("fragments", "nodes", "conversations"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("INSERT INTO fragments_fts(fragments_fts) VALUES ('delete-all')")
+
+        with open(json_file, "rb") as f:
+            for conversation in ijson.items(f, "item"):
+                conversation_id = conversation["id"]
+                conn.execute(
+                    "INSERT INTO conversations VALUES (?, ?, ?, ?)",
+                    (conversation_id, conversation.get("title"),
+                     conversation.get("inserted_at"), conversation.get("updated_at"))
+                )
+
+                node_rows = []
+                fragment_rows = []
+                for node_id, node in conversation.get("mapping", {}).items():
+                    message = node.get("message") or {}
+                    node_rows.append((
+                        conversation_id, node_id, node.get("parent"),
+                        message.get("model"), message.get("inserted_at")
+                    ))
+                    for position, fragment in enumerate(message.get("fragments") or []):
+                        fragment_rows.append((
+                            conversation_id, node_id, position, fragment.get("type"), fragment.get("content")
+                        ))
+
+                conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?)", node_rows)
+                conn.executemany(
+                    "INSERT INTO fragments (conversation_id, node_id, position, type, content) VALUES (?, ?, ?, ?, ?)",
+                    fragment_rows
+                )
+
+                conversations += 1
+                nodes += len(node_rows)
+                fragments += len(fragment_rows)
+
+        conn.execute("INSERT INTO fragments_fts(fragments_fts) VALUES ('rebuild')")
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (signature,))
+
+    conn.execute("ANALYZE")
+    conn.close()
+
+    print(
+        f"[INFO] {conversations} suhbat, {nodes} tugun, {fragments} fragment indekslandi "
+        f"({time.perf_counter() - started:.2f} s)"
+    )
+    return True
+
+
+# --- 2. So‘rovlar ---
+def get_thread(conn, conversation_id, node_id=None):
+    """
+    Ildizdan node_id gacha bo‘lgan xabarlar zanjiri.
+    node_id berilmasa - suhbatning eng uzun zanjiri.
+    """
+    if node_id is None:
+        row = conn.execute(
+            DEPTH_CTE + "SELECT node_id FROM tree WHERE conversation_id = ? ORDER BY depth DESC LIMIT 1",
+            (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return []
+        node_id = row[0]
+
+    return conn.execute(
+        """
+        WITH RECURSIVE path(node_id, parent_id, depth) AS (
+            SELECT node_id, parent_id, 0 FROM nodes WHERE conversation_id = :c AND node_id = :n
+            UNION ALL
+            SELECT n.node_id, n.parent_id, p.depth + 1
+            FROM nodes n JOIN path p ON n.conversation_id = :c AND n.node_id = p.parent_id
+        )
+        SELECT p.node_id, n.model, n.inserted_at, f.type, f.content
+        FROM path p
+        JOIN nodes n ON n.conversation_id = :c AND n.node_id = p.node_id
+        JOIN fragments f ON f.conversation_id = :c AND f.node_id = p.node_id
+        ORDER BY p.depth DESC, f.position
+        """,
+        {"c": conversation_id, "n": node_id}
+    ).fetchall()
+
+
+def longest_threads(conn):
+    """Har bir suhbatdagi eng uzun zanjir uzunligi"""
+    return conn.execute(
+        DEPTH_CTE + """
+        SELECT c.id, c.title, MAX(t.depth) AS depth
+        FROM tree t JOIN conversations c ON c.id = t.conversation_id
+        GROUP BY c.id ORDER BY depth DESC
+        """
+    ).fetchall()
+
+
+def search(conn, query, fragment_type=None, limit=20):
+    """FTS5 bo‘yicha qidiruv (bm25 tartibida)"""
+    sql = """
+        SELECT f.conversation_id, f.node_id, f.type,
+               snippet(fragments_fts, 0, '[', ']', '…', 12)
+        FROM fragments_fts JOIN fragments f ON f.id = fragments_fts.rowid
+        WHERE fragments_fts MATCH ?
+    """
+    params = [query]
+    if fragment_type:
+        sql += " AND f.type = ?"
+        params.append(fragment_type)
+    sql += " ORDER BY bm25(fragments_fts) LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def statistics(conn):
+    return {
+        "models": conn.execute(
+            "SELECT COALESCE(model, '-'), COUNT(*) FROM nodes WHERE model IS NOT NULL GROUP BY model ORDER BY 2 DESC"
+        ).fetchall(),
+        "types": conn.execute(
+            "SELECT type, COUNT(*), SUM(LENGTH(content)) FROM fragments GROUP BY type ORDER BY 2 DESC"
+        ).fetchall()
+    }
+
+
+# --- 3. Ishga tushirish ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Suhbatlar eksporti uchun SQLite/FTS5 indeks")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Indeks fayli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = commands.add_parser("index", help="JSON eksportni indekslash")
+    index_parser.add_argument("input", nargs="?", default="input.json")
+    index_parser.add_argument("--force", action="store_true", help="O‘zgarmagan bo‘lsa ham qayta indekslash")
+
+    thread_parser = commands.add_parser("thread", help="Xabarlar zanjirini tiklash")
+    thread_parser.add_argument("conversation")
+    thread_parser.add_argument("node", nargs="?", help="Oxirgi tugun (standart: eng uzun zanjir)")
+    thread_parser.add_argument("--full", action="store_true", help="Matnni qisqartirmasdan")
+
+    search_parser = commands.add_parser("search", help="To‘liq matnli qidiruv")
+    search_parser.add_argument("query", help="FTS5 so‘rovi")
+    search_parser.add_argument("--type", help="Fragment turi (REQUEST, RESPONSE)")
+    search_parser.add_argument("--limit", type=int, default=20)
+
+    commands.add_parser("longest", help="Suhbatlardagi eng uzun zanjirlar")
+    commands.add_parser("stats", help="Modellar va fragment turlari bo‘yicha")
+
+    args = parser.parse_args()
+
+    if args.command == "index":
+        build_index(args.input, args.db, args.force)
+        sys.exit(0)
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} topilmadi - avval 'index' buyrug‘ini bajaring")
+
+    conn = connect(args.db)
+
+    if args.command == "thread":
+        rows = get_thread(conn, args.conversation, args.node)
+        if not rows:
+            print("[INFO] Zanjir topilmadi")
+        for node_id, model, inserted_at, fragment_type, content in rows:
+            text = content if args.full else (content or "")[:200].replace("\n", " ")
+            print(f"--- #{node_id} {fragment_type} {model or ''} {inserted_at or ''}\n{text}\n")
+
+    elif args.command == "search":
+        try:
+            rows = search(conn, args.query, args.type, args.limit)
+        except sqlite3.OperationalError as e:
+            parser.error(f"Noto‘g‘ri FTS so‘rovi: {e}")
+        for conversation_id, node_id, fragment_type, snippet in rows:
+            print(f"{conversation_id} #{node_id} [{fragment_type}] {snippet}")
+
+    elif args.command == "longest":
+        for conversation_id, title, depth in longest_threads(conn):
+            print(f"{depth:>5}  {conversation_id}  {title}")
+
+    elif args.command == "stats":
+        stats = statistics(conn)
+        print("Modellar:")
+        for model, count in stats["models"]:
+            print(f"  {model}: {count}")
+        print("Fragment turlari:")
+        for fragment_type, count, length in stats["types"]:
+            print(f"  {fragment_type}: {count} ({length or 0:,} belgi)")
+
+    conn.close()
@@ -0,0 +1,51 @@
+"""
+Katta oqimlarni bo‘laklab, cheklangan Pool navbati bilan qayta ishlash.
+
+github.py va json_pragres.py uchun umumiy: skriptlar shu papkadan ishga
+tushiriladi, shuning uchun modul oddiy import bilan topiladi.
+"""
+import threading
+from itertools import islice
+from multiprocessing import Pool
+
+
+def chunked(iterable, size, window=None):
+    """
+    Generatorni size o‘lchamli bo‘laklarga ajratadi.
+    window berilsa, bo‘lak faqat oldingisi iste'mol qilingandan keyin o‘qiladi -
+    Pool ning task threadi butun faylni navbatga yig‘ib yubormaydi.
+    """
+    iterator = iter(iterable)
+    while True:
+        if window is not None:
+            window.acquire()
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def pool_map(func, iterable, workers, chunk_size, ordered=True):
+    """
+    func(bo‘lak) natijalarini qaytaradi.
+    workers <= 1 - shu jarayonda; aks holda Pool orqali, bir vaqtda eng ko‘pi bilan
+    2 * workers ta bo‘lak jarayonlar orasida bo‘ladi.
+    ordered=False - natijalar tayyor bo‘lish tartibida (imap_unordered).
+    """
+    if workers <= 1:
+        for chunk in chunked(iterable, chunk_size):
+            yield func(chunk)
+        return
+
+    window = threading.Semaphore(workers * 2)
+    with Pool(workers) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        try:
+            for result in imap(func, chunked(iterable, chunk_size, window)):
+                window.release()
+                yield result
+        except BaseException:
+            # Kutib turgan task threadini bo‘shatish, aks holda Pool yopilmaydi
+            for _ in range(workers * 2):
+                window.release()
+            raise
@@ -0,0 +1,74 @@
+"""
+Alembic muhiti - database/models.py metadatasi va config.py dagi DATABASE_URL
+
+Dasturiy chaqiruvda (database.alembic_versions.upgrade_schema) tayyor ulanish
+config.attributes['connection'] orqali uzatiladi.
+
+CLI dan (`alembic upgrade head`) keyin inkremental backup jurnali triggerlari qayta
+o'rnatiladi: SQLite batch rejimi jadvalni qayta yaratganda ular o'chib ketadi.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+from sqlalchemy.engine import make_url
+
+from config import DATABASE_URL
+from database import models
+from database.alembic_versions import include_object, process_revision_directives  # online operatsiyalarni ham ro'yxatdan o'tkazadi
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+def configure_context(dialect_name: str, **kwargs):
+    """Umumiy sozlamalar: SQLite uchun batch rejim, turlarni solishtirish, har migratsiya alohida tranzaksiyada"""
+    context.configure(
+        target_metadata=target_metadata,
+        render_as_batch=dialect_name == "sqlite",
+        compare_type=True,
+        include_object=include_object,
+        transaction_per_migration=True,
+        process_revision_directives=process_revision_directives,
+        **kwargs
+    )
+
+def run_migrations_offline():
+    """SQL skript chiqarish (alembic upgrade head --sql)"""
+    configure_context(
+        make_url(DATABASE_URL).get_backend_name(),
+        url=DATABASE_URL, literal_binds=True, dialect_opts={"paramstyle": "named"}
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations(connection):
+    configure_context(connection.dialect.name, connection=connection)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+
+    connectable = engine_from_config(
+        {"sqlalchemy.url": DATABASE_URL}, prefix="sqlalchemy.", poolclass=pool.NullPool
+    )
+    with connectable.connect() as connection:
+        run_migrations(connection)
+
+    # Dasturiy chaqiruvda buni main.py qiladi (setup_incremental_backup)
+    from utils.backup import setup_incremental_backup
+    setup_incremental_backup()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,28 @@
+"""${message}
+
+Revision ID: ${up_revision}
+Revises: ${down_revision | comma,n}
+Create Date: ${create_date}
+
+Ishlab turgan bazada xavfsiz bo'lishi uchun:
+- mavjud jadvallarga indeks - op.create_index_online / op.drop_index_online
+- SQLite da ALTER - op.batch_alter_table
+- katta ma'lumot ko'chirish - database/legacy_migrate.py kabi bo'laklab, migratsiyadan tashqarida
+"""
+from alembic import op
+import sqlalchemy as sa
+${imports if imports else ""}
+
+# revision identifiers, used by Alembic.
+revision = ${repr(up_revision)}
+down_revision = ${repr(down_revision)}
+branch_labels = ${repr(branch_labels)}
+depends_on = ${repr(depends_on)}
+
+
+def upgrade():
+    ${upgrades if upgrades else "pass"}
+
+
+def downgrade():
+    ${downgrades if downgrades else "pass"}
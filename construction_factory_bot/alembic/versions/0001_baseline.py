@@ -0,0 +1,249 @@
+"""baseline - Alembic dan oldingi sxema (create_all bilan yaratilgan bazalar)
+
+Jadvallar shu faylda muzlatilgan: database/models.py keyinchalik o'zgarsa ham
+baseline o'zgarmaydi. Alembic dan oldingi baza faqat shu metadata bilan to'liq mos
+kelsa 0001 ga belgilanadi (database.alembic_versions.upgrade_schema).
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 07:34:21
+
+Ishlab turgan bazada xavfsiz bo'lishi uchun:
+- mavjud jadvallarga indeks - op.create_index_online / op.drop_index_online
+- SQLite da ALTER - op.batch_alter_table
+- katta ma'lumot ko'chirish - database/legacy_migrate.py kabi bo'laklab, migratsiyadan tashqarida
+"""
+from alembic import op
+from alembic.operations import ops
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+metadata = sa.MetaData()
+
+employees = sa.Table('employees', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('telegram_id', sa.Integer(), nullable=True),
+    sa.Column('full_name', sa.String(length=100), nullable=False),
+    sa.Column('phone_number', sa.String(length=20), nullable=False),
+    sa.Column('position', sa.String(length=50), nullable=False),
+    sa.Column('department', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.Enum('ACTIVE', 'ON_LEAVE', 'FIRED', 'VACATION', name='employeestatus'), nullable=True),
+    sa.Column('hire_date', sa.DateTime(), nullable=False),
+    sa.Column('salary', sa.Float(), nullable=True),
+    sa.Column('hourly_rate', sa.Float(), nullable=True),
+    sa.Column('bank_account', sa.String(length=50), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('passport_data', sa.String(length=100), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('is_admin', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('telegram_id'),
+    sa.Index('ix_employees_id', 'id')
+)
+
+notifications = sa.Table('notifications', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('notification_type', sa.String(length=50), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('recipient_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'SENT', 'READ', 'FAILED', name='notificationstatus'), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=True),
+    sa.Column('scheduled_time', sa.DateTime(), nullable=True),
+    sa.Column('sent_time', sa.DateTime(), nullable=True),
+    sa.Column('read_time', sa.DateTime(), nullable=True),
+    sa.Column('metadata', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_notifications_id', 'id')
+)
+
+products = sa.Table('products', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('unit', sa.String(length=20), nullable=False),
+    sa.Column('selling_price', sa.Float(), nullable=True),
+    sa.Column('production_cost', sa.Float(), nullable=True),
+    sa.Column('profit_margin', sa.Float(), nullable=True),
+    sa.Column('barcode', sa.String(length=50), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('image_url', sa.String(length=255), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('barcode'),
+    sa.Index('ix_products_id', 'id'),
+    sa.Index('ix_products_name', 'name', unique=True)
+)
+
+raw_materials = sa.Table('raw_materials', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=True),
+    sa.Column('unit', sa.String(length=20), nullable=False),
+    sa.Column('current_stock', sa.Float(), nullable=True),
+    sa.Column('min_stock', sa.Float(), nullable=True),
+    sa.Column('max_stock', sa.Float(), nullable=True),
+    sa.Column('price_per_unit', sa.Float(), nullable=True),
+    sa.Column('supplier', sa.String(length=100), nullable=True),
+    sa.Column('last_purchase_date', sa.DateTime(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_raw_materials_id', 'id'),
+    sa.Index('ix_raw_materials_name', 'name', unique=True)
+)
+
+system_logs = sa.Table('system_logs', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('user_name', sa.String(length=100), nullable=True),
+    sa.Column('action', sa.String(length=100), nullable=False),
+    sa.Column('module', sa.String(length=50), nullable=False),
+    sa.Column('details', sa.Text(), nullable=True),
+    sa.Column('ip_address', sa.String(length=45), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_system_logs_created_at', 'created_at'),
+    sa.Index('ix_system_logs_id', 'id')
+)
+
+product_formulas = sa.Table('product_formulas', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('raw_material_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('waste_percentage', sa.Float(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['raw_material_id'], ['raw_materials.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_product_formulas_id', 'id'),
+    sqlite_autoincrement=True
+)
+
+production_orders = sa.Table('production_orders', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_number', sa.String(length=50), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', 'DELIVERED', name='orderstatus'), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=True),
+    sa.Column('planned_start', sa.DateTime(), nullable=True),
+    sa.Column('planned_end', sa.DateTime(), nullable=True),
+    sa.Column('actual_start', sa.DateTime(), nullable=True),
+    sa.Column('actual_end', sa.DateTime(), nullable=True),
+    sa.Column('total_cost', sa.Float(), nullable=True),
+    sa.Column('total_revenue', sa.Float(), nullable=True),
+    sa.Column('profit', sa.Float(), nullable=True),
+    sa.Column('responsible_id', sa.Integer(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['responsible_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_production_orders_id', 'id'),
+    sa.Index('ix_production_orders_order_number', 'order_number', unique=True)
+)
+
+salary_payments = sa.Table('salary_payments', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('base_salary', sa.Float(), nullable=True),
+    sa.Column('bonus', sa.Float(), nullable=True),
+    sa.Column('overtime_pay', sa.Float(), nullable=True),
+    sa.Column('deduction', sa.Float(), nullable=True),
+    sa.Column('total_amount', sa.Float(), nullable=True),
+    sa.Column('payment_date', sa.DateTime(), nullable=True),
+    sa.Column('payment_method', sa.String(length=20), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_salary_payments_id', 'id')
+)
+
+sales = sa.Table('sales', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('invoice_number', sa.String(length=50), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('customer_name', sa.String(length=100), nullable=False),
+    sa.Column('customer_phone', sa.String(length=20), nullable=True),
+    sa.Column('payment_method', sa.String(length=20), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('sale_date', sa.DateTime(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_sales_id', 'id'),
+    sa.Index('ix_sales_invoice_number', 'invoice_number', unique=True)
+)
+
+warehouse_transactions = sa.Table('warehouse_transactions', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('raw_material_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('transaction_type', sa.Enum('INCOME', 'OUTCOME', 'PRODUCTION', 'SALE', 'RETURN', name='transactiontype'), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('user_name', sa.String(length=100), nullable=True),
+    sa.Column('document_number', sa.String(length=50), nullable=True),
+    sa.Column('counterparty', sa.String(length=100), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['raw_material_id'], ['raw_materials.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_warehouse_transactions_date', 'date'),
+    sa.Index('ix_warehouse_transactions_id', 'id')
+)
+
+work_hours = sa.Table('work_hours', metadata,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=True),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('hours_worked', sa.Float(), nullable=True),
+    sa.Column('overtime_hours', sa.Float(), nullable=True),
+    sa.Column('shift_type', sa.String(length=20), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_work_hours_date', 'date'),
+    sa.Index('ix_work_hours_id', 'id')
+)
+
+
+def upgrade():
+    for table in metadata.sorted_tables:
+        op.invoke(ops.CreateTableOp.from_table(table))
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            op.invoke(ops.CreateIndexOp.from_index(index))
+
+
+def downgrade():
+    for table in reversed(metadata.sorted_tables):
+        op.drop_table(table.name)
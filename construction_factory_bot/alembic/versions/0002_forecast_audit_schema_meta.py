@@ -0,0 +1,72 @@
+"""xom ashyo prognozi ustunlari, audit level/category va schema_meta
+
+Eski system_logs yozuvlari uchun level action matnidan, category esa module dan
+bir marta to'ldiriladi.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:12:40
+
+Ishlab turgan bazada xavfsiz bo'lishi uchun:
+- mavjud jadvallarga indeks - op.create_index_online / op.drop_index_online
+- SQLite da ALTER - op.batch_alter_table
+- katta ma'lumot ko'chirish - database/legacy_migrate.py kabi bo'laklab, migratsiyadan tashqarida
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('schema_meta',
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.String(length=100), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('raw_materials', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lead_time_days', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('daily_usage_forecast', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('reorder_point', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('projected_stockout_date', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('forecast_model', sa.String(length=30), nullable=True))
+        batch_op.add_column(sa.Column('forecast_updated_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('system_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('level', sa.String(length=10), server_default='info', nullable=False))
+        batch_op.add_column(sa.Column('category', sa.String(length=50), nullable=True))
+
+    op.execute(
+        "UPDATE system_logs SET level = 'error' "
+        "WHERE lower(action) LIKE '%error%' OR lower(action) LIKE '%xatolik%'"
+    )
+    op.execute("UPDATE system_logs SET category = module")
+
+    op.create_index_online('ix_system_logs_level', 'system_logs', ['level'], unique=False)
+    op.create_index_online('ix_system_logs_category', 'system_logs', ['category'], unique=False)
+    op.create_index_online('ix_system_logs_level_created_at', 'system_logs', ['level', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index_online('ix_system_logs_level_created_at', 'system_logs', ['level', 'created_at'], unique=False)
+    op.drop_index_online('ix_system_logs_category', 'system_logs', ['category'], unique=False)
+    op.drop_index_online('ix_system_logs_level', 'system_logs', ['level'], unique=False)
+    with op.batch_alter_table('system_logs', schema=None) as batch_op:
+        batch_op.drop_column('category')
+        batch_op.drop_column('level')
+
+    with op.batch_alter_table('raw_materials', schema=None) as batch_op:
+        batch_op.drop_column('forecast_updated_at')
+        batch_op.drop_column('forecast_model')
+        batch_op.drop_column('projected_stockout_date')
+        batch_op.drop_column('reorder_point')
+        batch_op.drop_column('daily_usage_forecast')
+        batch_op.drop_column('lead_time_days')
+
+    op.drop_table('schema_meta')
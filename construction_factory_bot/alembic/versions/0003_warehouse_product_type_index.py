@@ -0,0 +1,28 @@
+"""warehouse_transactions (product_id, transaction_type) indeksi - mahsulot qoldig'i uchun
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:05:18
+
+Ishlab turgan bazada xavfsiz bo'lishi uchun:
+- mavjud jadvallarga indeks - op.create_index_online / op.drop_index_online
+- SQLite da ALTER - op.batch_alter_table
+- katta ma'lumot ko'chirish - database/legacy_migrate.py kabi bo'laklab, migratsiyadan tashqarida
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index_online('ix_warehouse_transactions_product_type', 'warehouse_transactions', ['product_id', 'transaction_type'], unique=False)
+
+
+def downgrade():
+    op.drop_index_online('ix_warehouse_transactions_product_type', 'warehouse_transactions', ['product_id', 'transaction_type'], unique=False)
@@ -135,6 +135,50 @@ PRODUCTION_SETTINGS = {
     "max_production_quantity": 10000
 }
 
+# =============== PROGNOZ SOZLAMALARI ===============
+FORECAST_SETTINGS = {
+    "enabled": True,
+    "history_days": 90,  # Sarf tarixi (kun)
+    "default_lead_time_days": 7,  # Yetkazib berish muddati (agar materialda belgilanmagan bo'lsa)
+    "service_level_z": 1.65,  # ~95% xizmat darajasi
+    "moving_average_window": 14,
+    "ses_alpha": 0.3,  # Eksponensial tekislash koeffitsiyenti
+    "croston_alpha": 0.1,
+    "intermittent_threshold": 0.5,  # Nol kunlar ulushi shundan katta bo'lsa - Croston
+    "refresh_interval_hours": 6
+}
+
+# =============== SIMULYATSIYA SOZLAMALARI ===============
+SIMULATION_SETTINGS = {
+    "scenarios": 10000,  # Monte Carlo ssenariylari soni
+    "workers": int(os.getenv("SIMULATION_WORKERS", "0")),  # 0 - barcha yadrolar
+    "chunk_size": 2500,  # Bitta jarayonga beriladigan ssenariylar
+    "waste_std": 0.02,  # Chiqindi foizining standart og'ishi
+    "material_price_volatility": 0.10,  # Xom ashyo narxi o'zgaruvchanligi
+    "selling_price_volatility": 0.05,  # Sotish narxi o'zgaruvchanligi
+    "demand_cv": 0.20,  # Talab variatsiya koeffitsiyenti
+    "percentiles": [5, 50, 95]
+}
+
+# =============== KESH SOZLAMALARI ===============
+REFERENCE_CACHE_SETTINGS = {
+    "enabled": True,
+    "warm_up_on_startup": True,  # Ishga tushishda barcha katalogni yuklash
+    "ttl_seconds": int(os.getenv("REFERENCE_CACHE_TTL", "0")),  # Bir nechta worker uchun (0 - cheksiz)
+    "entities": ["products", "raw_materials", "employees"]
+}
+
+# =============== FSM SAQLASH SOZLAMALARI ===============
+FSM_STORAGE_SETTINGS = {
+    "backend": os.getenv("FSM_STORAGE", "sqlite"),  # redis, sqlite yoki memory
+    "redis_url": os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+    "sqlite_path": str(BASE_DIR / "database" / "fsm_states.db"),
+    "key_prefix": "fsm",
+    "state_ttl": 24 * 60 * 60,  # Tashlab ketilgan holatlar muddati (soniya)
+    "compress_threshold": 512,  # Shundan katta ma'lumotlar zlib bilan siqiladi (bayt)
+    "cleanup_every": 500  # SQLite: har N ta yozuvdan keyin eskirganlarni tozalash
+}
+
 # =============== XAVFSIZLIK SOZLAMALARI ===============
 SECURITY_SETTINGS = {
     "max_login_attempts": 5,
@@ -143,7 +187,31 @@ SECURITY_SETTINGS = {
     "require_strong_password": True,
     "enable_2fa": False,
     "ip_whitelist": [],
-    "block_suspicious_activity": True
+    "block_suspicious_activity": True,
+    # So'rovlarni cheklash (har bir foydalanuvchi uchun token bucket)
+    "rate_limit": {
+        "enabled": True,
+        "bucket_capacity": 20,  # Bir vaqtda sarflash mumkin bo'lgan tokenlar
+        "refill_per_second": 1.0,  # Soniyasiga qo'shiladigan tokenlar
+        "default_cost": 1,  # Oddiy menyu tugmasi
+        # Og'ir handlerlar narxi (ro'yxatdan o'tgan handler funksiyasi nomi bo'yicha)
+        "handler_costs": {
+            "handle_period_selection": 8,
+            "generate_sales_report_file": 8,
+            "show_sales_statistics": 4,
+            "system_statistics": 4,
+            "process_simulation_plan": 10
+        },
+        # Umumiy callback handler (admin_callback_handler) orqali ishlaydigan og'ir amallar - callback data bo'yicha
+        "callback_costs": {
+            "backup_confirm": 10,  # perform_backup
+            "logs_full": 8,  # view_full_logs
+            "stats_detailed": 4,  # detailed_statistics
+            "admin_user_stats": 4  # system_statistics
+        },
+        "heavy_cost": 4,  # Shu narxdan boshlab handler umumiy navbat orqali ishlaydi
+        "notify_interval": 10  # Ogohlantirish xabarlari orasidagi minimal vaqt (soniya)
+    }
 }
 
 # =============== EXCEL HISOBOT SOZLAMALARI ===============
@@ -158,6 +226,13 @@ EXCEL_SETTINGS = {
     "compression_level": 6
 }
 
+# =============== HISOBOT SOZLAMALARI ===============
+REPORT_SETTINGS = {
+    "coalesce": True,  # Bir xil parallel hisobot so'rovlari bitta hisoblashni kutadi
+    "share_seconds": 30,  # Tayyor hisobot shu muddat ichida bir xil so'rovlarga qayta beriladi
+    "builder_threads": 1  # Hisobot quruvchi threadlar (pyplot thread-safe emas)
+}
+
 # =============== GRAFIK SOZLAMALARI ===============
 CHART_SETTINGS = {
     "default_width": 16,
@@ -184,7 +259,13 @@ BACKUP_SETTINGS = {
     "compression": "zip",  # zip, gzip, none
     "include_logs": True,
     "include_reports": False,
-    "notify_on_backup": True
+    "notify_on_backup": True,
+    "pages_per_step": 256,  # SQLite online backup: bir qadamda nusxalanadigan sahifalar
+    "step_sleep": 0.05,  # Qadamlar orasidagi pauza (yozuvchilar bloklanmasligi uchun)
+    "verify": True,  # Yozilgan faylning checksum ini qayta tekshirish
+    "pg_dump_timeout": 3600,  # PostgreSQL pg_dump uchun maksimal vaqt (soniya)
+    "mode": os.getenv("BACKUP_MODE", "full"),  # full, incremental (faqat SQLite)
+    "full_every_days": 7  # incremental rejimda to'liq backup oralig'i (qolgan kunlari delta)
 }
 
 # =============== LIMITLAR ===============
@@ -196,7 +277,11 @@ LIMITS = {
     "max_employees": 1000,
     "max_products": 1000,
     "max_raw_materials": 500,
-    "max_transactions_per_day": 10000
+    "max_transactions_per_day": 10000,
+    "max_concurrent_heavy_handlers": 4,  # Bir vaqtda ishlaydigan og'ir handlerlar (jarayon bo'yicha)
+    "max_heavy_per_user": 2,  # Foydalanuvchining navbatdagi + ishlayotgan og'ir so'rovlari
+    "max_queue_wait": 60,  # Navbatda kutish chegarasi (soniya)
+    "max_tracked_users": 10000  # Xotirada saqlanadigan token bucket lar
 }
 
 # =============== TIZIM SOZLAMALARI ===============
@@ -214,6 +299,50 @@ SYSTEM_SETTINGS = {
     "thousands_separator": ","
 }
 
+# =============== LOGGING SOZLAMALARI ===============
+LOGGING_SETTINGS = {
+    "level": os.getenv("LOG_LEVEL", SYSTEM_SETTINGS["log_level"]),
+    "file_name": "bot.log",  # LOGS_DIR ichida (qo'shimcha worker lar uchun bot-worker<N>.log)
+    "json": True,  # Faylga JSON qatorlar yoziladi
+    "console": True,
+    "backup_count": 30,  # Kunlik fayllar soni
+    "compress": True,  # Aylantirilgan fayllarni gzip qilish
+    "queue_size": 10000,  # Navbat to'lsa yozuvlar tashlanadi (event loop kutmaydi)
+    "debug_sample_rate": float(os.getenv("LOG_DEBUG_SAMPLE", "0.1"))  # DEBUG yozuvlarning qancha qismi yoziladi
+}
+
+# =============== AUDIT SOZLAMALARI ===============
+AUDIT_SETTINGS = {
+    "batch_size": 100,  # Bufer shu hajmga yetganda bazaga yoziladi
+    "flush_interval": 5,  # Bufer kamida shuncha soniyada bir yoziladi
+    "retention_days": 90,  # Bundan eski yozuvlar arxivga ko'chiriladi
+    "archive_dir": LOGS_DIR / "audit",  # Oylik arxiv fayllari (system_logs_YYYY_MM.jsonl.gz)
+    "archive_chunk": 5000,  # Arxivlashda bir so'rovda o'qiladigan yozuvlar
+    "export_days": 30  # "To'liq loglar" eksporti davri
+}
+
+# =============== MONITORING SOZLAMALARI ===============
+METRICS_SETTINGS = {
+    "enabled": True,
+    "port": int(os.getenv("METRICS_PORT", "9100")),  # /metrics porti, webhook worker lari: port + indeks (0 - o'chiq)
+    "host": os.getenv("METRICS_HOST", "127.0.0.1"),  # Tashqi Prometheus uchun 0.0.0.0 (firewall ortida)
+    "path": "/metrics",
+    # Kechikish histogrammalari chegaralari (soniya)
+    "latency_buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+    # Bitta update dagi SQL so'rovlar soni chegaralari
+    "query_buckets": [0, 1, 2, 5, 10, 20, 50, 100]
+}
+
+# =============== SQL PROFILER SOZLAMALARI ===============
+QUERY_PROFILER_SETTINGS = {
+    # O'chiq bo'lsa engine va cursor ga hech qanday hook ulanmaydi
+    "enabled": os.getenv("SQL_PROFILER", "0") == "1",
+    "slow_query_ms": float(os.getenv("SLOW_QUERY_MS", "200")),  # Bundan sekin so'rovlar logga yoziladi
+    "sample_size": 512,  # p95 uchun har bir so'rov turida saqlanadigan oxirgi o'lchovlar
+    "report_limit": 20,  # Hisobotdagi so'rov turlari soni
+    "report_on_shutdown": True
+}
+
 # =============== INTEGRATSIYA SOZLAMALARI ===============
 INTEGRATION_SETTINGS = {
     # SMS yuborish uchun (agar kerak bo'lsa)
@@ -237,7 +366,40 @@ INTEGRATION_SETTINGS = {
     "api_enabled": False,
     "api_host": "0.0.0.0",
     "api_port": 8000,
-    "api_secret_key": os.getenv("API_SECRET_KEY", "")
+    "api_secret_key": os.getenv("API_SECRET_KEY", ""),
+    
+    # Webhook rejimi (webhook.py)
+    "webhook_base_url": os.getenv("WEBHOOK_BASE_URL", ""),  # masalan: https://bot.example.uz
+    "webhook_path": os.getenv("WEBHOOK_PATH", "/webhook"),
+    "webhook_secret": os.getenv("WEBHOOK_SECRET", ""),  # Bo'sh bo'lsa BOT_TOKEN dan hosil qilinadi
+    "webhook_workers": int(os.getenv("WEBHOOK_WORKERS", "1")),
+    "low_stock_resync_interval": 300,  # Bir nechta worker: qoldiq to'plamini bazadan qayta yuklash (soniya)
+    "webhook_drain_timeout": 30,  # To'xtashda ishlanayotgan update lar uchun kutish (soniya)
+    "webhook_record_path": os.getenv("WEBHOOK_RECORD_PATH", ""),  # Update larni load-test uchun yozish
+    "telegram_api_base": os.getenv("TELEGRAM_API_BASE", "")  # Lokal Bot API server yoki stub
+}
+
+# =============== ISHGA TUSHISH SOZLAMALARI ===============
+STARTUP_SETTINGS = {
+    # Sxema va boshlang'ich ma'lumotlar izi o'zgarmagan bo'lsa create_all va seeding o'tkazib yuboriladi
+    "schema_version_check": os.getenv("SCHEMA_VERSION_CHECK", "true").lower() == "true",
+    "preload_heavy_modules": True,  # Bot ishga tushgach og'ir modullarni fonda oldindan yuklash
+    "preload_delay": 30,  # Preload boshlanishidan oldin kutish (soniya)
+    "preload_modules": ["utils.excel_reports", "utils.charts", "utils.forecasting", "utils.simulation"],
+    "import_budget": 1.0,  # utils/startup_benchmark.py: main import vaqti chegarasi (soniya)
+    "startup_budget": 5.0,  # utils/startup_benchmark.py --cold-start: on_startup tugashigacha chegara (soniya)
+    # Ishga tushishda import qilinmasligi kerak bo'lgan kutubxonalar
+    "forbidden_imports": ["pandas", "matplotlib", "seaborn", "openpyxl", "numpy", "qrcode", "jwt"]
+}
+
+# =============== MIGRATSIYA SOZLAMALARI ===============
+MIGRATION_SETTINGS = {
+    # Ishga tushishda `alembic upgrade head` (o'chirilsa - deploy vaqtida qo'lda)
+    "auto_upgrade": os.getenv("MIGRATION_AUTO_UPGRADE", "true").lower() == "true",
+    # database/legacy_migrate.py - eski sqlite bazalardan ko'chirish
+    "legacy_chunk_size": 500,  # Bitta tranzaksiyadagi qatorlar soni
+    "legacy_chunk_pause": 0.05,  # Bo'laklar orasida kutish (soniya) - ishlab turgan botga joy berish
+    "legacy_sources": ["construction.db"],  # data/database.py standart fayli
 }
 
 # =============== TEST SOZLAMALARI ===============
@@ -0,0 +1,278 @@
+"""
+Migratsiya versiyalari - Alembic bilan sxemani yangilash
+
+Sxema faqat alembic/versions/ dagi migratsiyalar orqali o'zgaradi (database/models.py
+dan `alembic revision --autogenerate`). Migratsiyalar ishlab turgan bazada ham xavfsiz:
+- SQLite: ALTER cheklovlari uchun batch rejim (env.py render_as_batch)
+- PostgreSQL: indekslar CREATE/DROP INDEX CONCURRENTLY bilan, jadvalni bloklamasdan
+
+Autogenerate mavjud jadvallardagi op.create_index/op.drop_index ni avtomatik
+op.create_index_online/op.drop_index_online ga almashtiradi.
+"""
+import logging
+import os
+from typing import List, Optional, Sequence
+
+from alembic import command
+from alembic.autogenerate import compare_metadata, renderers
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.operations import MigrateOperation, Operations, ops
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+
+from . import models
+from utils.backup_incremental import JOURNAL_TABLE
+
+logger = logging.getLogger(__name__)
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALEMBIC_INI = os.path.join(BOT_DIR, "alembic.ini")
+
+# create_all bilan yaratilgan (Alembic dan oldingi) bazalar shu revisiyaga belgilanadi
+BASELINE_REVISION = "0001"
+
+# =============== ONLINE OPERATSIYALAR ===============
+@Operations.register_operation("create_index_online")
+class CreateIndexOnlineOp(MigrateOperation):
+    """Jadvalni bloklamasdan indeks yaratish"""
+
+    def __init__(self, index_name: str, table_name: str, columns: Sequence[str], unique: bool = False):
+        self.index_name = index_name
+        self.table_name = table_name
+        self.columns = list(columns)
+        self.unique = unique
+
+    @classmethod
+    def create_index_online(cls, operations, index_name, table_name, columns, unique=False):
+        return operations.invoke(cls(index_name, table_name, columns, unique))
+
+    def reverse(self):
+        return DropIndexOnlineOp(self.index_name, self.table_name, self.columns, self.unique)
+
+@Operations.register_operation("drop_index_online")
+class DropIndexOnlineOp(MigrateOperation):
+    """Jadvalni bloklamasdan indeksni o'chirish"""
+
+    def __init__(self, index_name: str, table_name: str, columns: Sequence[str] = (), unique: bool = False):
+        self.index_name = index_name
+        self.table_name = table_name
+        self.columns = list(columns)
+        self.unique = unique
+
+    @classmethod
+    def drop_index_online(cls, operations, index_name, table_name, columns=(), unique=False):
+        return operations.invoke(cls(index_name, table_name, columns, unique))
+
+    def reverse(self):
+        return CreateIndexOnlineOp(self.index_name, self.table_name, self.columns, self.unique)
+
+@Operations.implementation_for(CreateIndexOnlineOp)
+def _create_index_online(operations, operation: CreateIndexOnlineOp):
+    context = operations.get_context()
+    if context.dialect.name == "postgresql":
+        # CONCURRENTLY tranzaksiya ichida ishlamaydi - oldingi qadamlar commit qilinadi
+        with context.autocommit_block():
+            operations.create_index(
+                operation.index_name, operation.table_name, operation.columns,
+                unique=operation.unique, postgresql_concurrently=True, if_not_exists=True
+            )
+    else:
+        operations.create_index(
+            operation.index_name, operation.table_name, operation.columns,
+            unique=operation.unique, if_not_exists=True
+        )
+
+@Operations.implementation_for(DropIndexOnlineOp)
+def _drop_index_online(operations, operation: DropIndexOnlineOp):
+    context = operations.get_context()
+    if context.dialect.name == "postgresql":
+        with context.autocommit_block():
+            operations.drop_index(
+                operation.index_name, operation.table_name, postgresql_concurrently=True, if_exists=True
+            )
+    else:
+        operations.drop_index(operation.index_name, operation.table_name, if_exists=True)
+
+@renderers.dispatch_for(CreateIndexOnlineOp)
+def _render_create_index_online(autogen_context, operation: CreateIndexOnlineOp) -> str:
+    return (
+        f"op.create_index_online({operation.index_name!r}, {operation.table_name!r}, "
+        f"{operation.columns!r}, unique={operation.unique!r})"
+    )
+
+@renderers.dispatch_for(DropIndexOnlineOp)
+def _render_drop_index_online(autogen_context, operation: DropIndexOnlineOp) -> str:
+    return (
+        f"op.drop_index_online({operation.index_name!r}, {operation.table_name!r}, "
+        f"{operation.columns!r}, unique={operation.unique!r})"
+    )
+
+# =============== AUTOGENERATE ===============
+def _column_names(operation) -> Optional[List[str]]:
+    """Indeks ustunlari nomlari (ifoda indekslari uchun None - ular o'zgartirilmaydi)"""
+    names = []
+    for column in operation.columns:
+        if isinstance(column, str):
+            names.append(column)
+        elif getattr(column, "name", None):
+            names.append(column.name)
+        else:
+            return None
+    return names
+
+def _to_online(operation):
+    """create_index/drop_index -> online varianti (mumkin bo'lmasa o'zi qaytadi)"""
+    # Dialektga xos parametrlar (postgresql_where va h.k.) bo'lsa - o'zgartirilmaydi
+    if set(operation.kw) - {"unique"}:
+        return operation
+
+    if isinstance(operation, ops.CreateIndexOp):
+        columns = _column_names(operation)
+        if columns is not None:
+            return CreateIndexOnlineOp(str(operation.index_name), operation.table_name, columns,
+                                       bool(operation.unique))
+    elif isinstance(operation, ops.DropIndexOp):
+        # Ustunlar faqat downgrade uchun kerak - autogenerate ularni teskari operatsiyada saqlaydi
+        reverse = getattr(operation, "_reverse", None)
+        columns = _column_names(reverse) if reverse is not None else []
+        if columns is not None:
+            return DropIndexOnlineOp(str(operation.index_name), operation.table_name, columns,
+                                     bool(operation.kw.get("unique")))
+    return operation
+
+def _online_ops(operations: list) -> list:
+    """
+    Mavjud jadvallardagi indeks operatsiyalarini online ga o'tkazish
+
+    Shu revisiyada yaratilgan/o'chirilgan jadvallar tegilmaydi (ular bo'sh).
+    ModifyTableOps ichidan chiqariladi: SQLite batch bloki oxirida bajariladi, shuning
+    uchun indeks o'chirish batch dan oldin, yaratish - keyin turadi.
+    """
+    new_tables = {
+        operation.table_name for operation in operations
+        if isinstance(operation, (ops.CreateTableOp, ops.DropTableOp))
+    }
+    result = []
+    for operation in operations:
+        if isinstance(operation, ops.ModifyTableOps) and operation.table_name not in new_tables:
+            online = [_to_online(item) for item in operation.ops]
+            drops = [item for item in online if isinstance(item, DropIndexOnlineOp)]
+            creates = [item for item in online if isinstance(item, CreateIndexOnlineOp)]
+            operation.ops = [item for item in online if item not in drops and item not in creates]
+            result.extend(drops)
+            if operation.ops:
+                result.append(operation)
+            result.extend(creates)
+        elif isinstance(operation, (ops.CreateIndexOp, ops.DropIndexOp)) and operation.table_name not in new_tables:
+            result.append(_to_online(operation))
+        else:
+            result.append(operation)
+    return result
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """
+    Modellarda yo'q, lekin bazada bo'lishi kerak bo'lgan obyektlar solishtirilmaydi
+
+    backup_journal va uning indeksi - inkremental backup (utils/backup_incremental.py).
+    """
+    if type_ == "table":
+        return name != JOURNAL_TABLE
+    if type_ == "index":
+        return object.table.name != JOURNAL_TABLE
+    return True
+
+def process_revision_directives(context, revision, directives):
+    """env.py dagi autogenerate ilgagi: bo'sh revisiyani yaratmaslik va online indekslar"""
+    script = directives[0]
+    cmd_opts = context.config.cmd_opts
+    if cmd_opts is not None and getattr(cmd_opts, "autogenerate", False) and script.upgrade_ops.is_empty():
+        directives[:] = []
+        logger.info("No schema changes detected, revision not created")
+        return
+
+    for container in (script.upgrade_ops, script.downgrade_ops):
+        container.ops = _online_ops(container.ops)
+
+# =============== DASTURIY API ===============
+def alembic_config() -> Config:
+    """alembic.ini (ishchi papkadan qat'iy nazar)"""
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(BOT_DIR, "alembic"))
+    # Bot logging sozlamalari alembic.ini bilan almashtirilmasin
+    config.attributes["configure_logger"] = False
+    return config
+
+def head_revision() -> Optional[str]:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+def current_revision(engine=None) -> Optional[str]:
+    engine = engine or models.engine
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+def _schema_differences(engine, metadata) -> list:
+    with engine.connect() as connection:
+        context = MigrationContext.configure(
+            connection, opts={"compare_type": True, "include_object": include_object}
+        )
+        return compare_metadata(context, metadata)
+
+def _stamp_legacy(engine) -> None:
+    """
+    Alembic dan oldingi bazani mos revisiyaga belgilash
+
+    Baza baseline (alembic/versions/0001) bilan to'liq mos kelsa - 0001, keyingi
+    migratsiyalar upgrade da bajariladi; joriy modellar bilan mos kelsa - head.
+    Boshqa har qanday farq - xatolik: noto'g'ri belgilangan baza keyingi
+    migratsiyalarda buziladi.
+    """
+    script = ScriptDirectory.from_config(alembic_config())
+    baseline = script.get_revision(BASELINE_REVISION).module.metadata
+
+    differences = _schema_differences(engine, baseline)
+    if not differences:
+        revision = BASELINE_REVISION
+    elif not _schema_differences(engine, models.Base.metadata):
+        revision = "head"
+    else:
+        preview = "; ".join(str(difference)[:120] for difference in differences[:5])
+        raise RuntimeError(
+            f"Legacy database differs from baseline revision {BASELINE_REVISION} in "
+            f"{len(differences)} places, migrate it manually before starting: {preview}"
+        )
+
+    config = alembic_config()
+    with engine.connect() as connection:
+        config.attributes["connection"] = connection
+        command.stamp(config, revision)
+        connection.commit()
+    logger.info(f"Legacy database stamped at revision {revision}")
+
+def upgrade_schema(engine=None, revision: str = "head") -> Optional[str]:
+    """
+    Bazani revisiyagacha yangilash (sinxron - alohida threadda chaqiriladi)
+
+    Bo'sh baza - barcha migratsiyalar; create_all bilan yaratilgan baza - avval baseline
+    (yoki head) ga belgilanadi, sxemasi mos kelmasa RuntimeError. Returns: yangilangandan keyingi revisiya.
+
+    SQLite batch migratsiyasi jadvalni qayta yaratadi va backup jurnali triggerlari
+    yo'qoladi - ular main.py da keyingi qadamda (setup_incremental_backup) qayta o'rnatiladi.
+    """
+    engine = engine or models.engine
+    tables = set(inspect(engine).get_table_names())
+    if "alembic_version" not in tables and tables & set(models.Base.metadata.tables):
+        _stamp_legacy(engine)
+
+    before = current_revision(engine)
+    config = alembic_config()
+    # Ulanish tranzaksiyasiz uzatiladi - autocommit_block (CONCURRENTLY) uchun shart
+    with engine.connect() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+        connection.commit()
+
+    after = current_revision(engine)
+    if after != before:
+        logger.info(f"Database upgraded {before or 'empty'} -> {after}")
+    return after
@@ -0,0 +1,188 @@
+"""
+Audit (SystemLog) - buferli paket yozuvchi, SQL tomonida hisoblash va oylik arxivlash
+
+Handlerlar yozuvni faqat buferga qo'yadi; bufer batch_size ga yetganda yoki
+har flush_interval soniyada bitta INSERT bilan bazaga yoziladi.
+retention_days dan eski yozuvlar oylik gzip JSONL fayllarga ko'chiriladi,
+shunda system_logs jadvali kichik bo'lib qoladi.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from . import models
+from .session import get_db_session
+from config import AUDIT_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+LEVELS = ("info", "warning", "error")
+
+# =============== BUFERLI YOZUVCHI ===============
+class AuditWriter:
+    """SystemLog yozuvlarini yig'ib, paket bilan yozish"""
+
+    def __init__(self):
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.written = 0
+
+    def log(self, action: str, module: str = "system", user_id: Optional[int] = None,
+            user_name: Optional[str] = None, details: Optional[str] = None, level: str = "info",
+            category: Optional[str] = None, ip_address: Optional[str] = None):
+        """Audit yozuvini buferga qo'shish"""
+        if level not in LEVELS:
+            raise ValueError(f"Noma'lum log darajasi: {level}")
+
+        row = {
+            'user_id': user_id,
+            'user_name': user_name,
+            'action': action[:100],
+            'module': module,
+            'details': details,
+            'ip_address': ip_address,
+            'level': level,
+            'category': category or module,
+            'created_at': datetime.utcnow()
+        }
+
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= AUDIT_SETTINGS['batch_size']
+
+        if full:
+            self._flush_soon()
+
+    def _flush_soon(self):
+        """
+        To'lgan buferni yozish
+
+        Event loop ichidan chaqirilsa INSERT alohida threadda bajariladi - handler kutmaydi.
+        Xatolik flush ichida ushlanadi, yozuvlar buferga qaytadi.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+        else:
+            loop.run_in_executor(None, self.flush)
+
+    def flush(self) -> int:
+        """Buferdagi yozuvlarni bitta INSERT bilan yozish"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+
+            if not rows:
+                return 0
+
+            try:
+                with get_db_session() as db:
+                    db.execute(models.SystemLog.__table__.insert(), rows)
+                    db.commit()
+            except Exception as e:
+                # Yozuvlar yo'qolmasligi uchun buferga qaytarish
+                with self._lock:
+                    self._buffer = rows + self._buffer
+                logger.error(f"Audit flush failed ({len(rows)} rows): {e}")
+                return 0
+
+            self.written += len(rows)
+            return len(rows)
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+audit_writer = AuditWriter()
+
+# =============== SO'ROVLAR ===============
+def get_log_counts(db: Session, since: datetime) -> Tuple[int, int]:
+    """(jami, xatoliklar) soni - bitta agregat so'rov bilan"""
+    total, errors = db.query(
+        func.count(models.SystemLog.id),
+        func.coalesce(func.sum(case((models.SystemLog.level == "error", 1), else_=0)), 0)
+    ).filter(models.SystemLog.created_at >= since).one()
+    return total, errors
+
+# =============== ARXIVLASH ===============
+def archive_old_logs(retention_days: Optional[int] = None) -> int:
+    """
+    Eski yozuvlarni oylik arxiv fayllariga ko'chirish va jadvaldan o'chirish
+
+    Yozuvlar id bo'yicha bo'laklab o'qiladi; har bir bo'lak avval faylga
+    yoziladi, keyin o'chiriladi (gzip fayllarga qo'shib yozish xavfsiz).
+
+    Returns:
+        int: Arxivlangan yozuvlar soni
+    """
+    retention_days = retention_days or AUDIT_SETTINGS['retention_days']
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    archive_dir = AUDIT_SETTINGS['archive_dir']
+    archive_dir.mkdir(parents=True, exist_ok=True)
+
+    table = models.SystemLog.__table__
+    archived = 0
+    last_id = 0
+
+    with get_db_session() as db:
+        while True:
+            rows = db.execute(
+                table.select()
+                .where(table.c.created_at < cutoff, table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(AUDIT_SETTINGS['archive_chunk'])
+            ).mappings().all()
+
+            if not rows:
+                break
+
+            by_month: Dict[str, List[Dict]] = {}
+            for row in rows:
+                by_month.setdefault(row['created_at'].strftime("%Y_%m"), []).append(dict(row))
+
+            for month, month_rows in by_month.items():
+                with gzip.open(archive_dir / f"system_logs_{month}.jsonl.gz", "at", encoding="utf-8") as archive:
+                    for row in month_rows:
+                        archive.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+            ids = [row['id'] for row in rows]
+            db.execute(table.delete().where(table.c.id.in_(ids)))
+            db.commit()
+
+            archived += len(ids)
+            last_id = ids[-1]
+
+    if archived:
+        logger.info(f"Archived {archived} audit log rows older than {cutoff:%Y-%m-%d}")
+    return archived
+
+# =============== FON VAZIFASI ===============
+async def audit_background_task(run_retention: bool = False):
+    """Buferni muntazam yozish va (asosiy jarayonda) kuniga bir marta arxivlash"""
+    last_retention: Optional[datetime] = None
+
+    while True:
+        try:
+            await asyncio.sleep(AUDIT_SETTINGS['flush_interval'])
+
+            if audit_writer.pending:
+                await asyncio.to_thread(audit_writer.flush)
+
+            if run_retention and (last_retention is None or datetime.utcnow() - last_retention >= timedelta(days=1)):
+                last_retention = datetime.utcnow()
+                await asyncio.to_thread(archive_old_logs)
+
+        except asyncio.CancelledError:
+            audit_writer.flush()
+            raise
+        except Exception as e:
+            logger.error(f"Error in audit background task: {e}")
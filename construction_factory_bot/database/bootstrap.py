@@ -0,0 +1,153 @@
+"""
+Bazani tayyorlash - jadvallar, sxema yangilanishlari va boshlang'ich ma'lumotlar
+
+Sxema (modellar, Alembic head) va boshlang'ich ma'lumotlar barmoq izi schema_meta
+jadvalida saqlanadi. Iz o'zgarmagan bo'lsa migratsiyalar va seeding butunlay
+o'tkazib yuboriladi - qayta ishga tushish bitta SELECT bilan tugaydi.
+"""
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from . import models
+from .session import get_db_session
+from config import ADMIN_IDS, MIGRATION_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_KEY = "schema_version"
+
+# Boshlang'ich ma'lumotlar o'zgarsa versiyani oshiring - keyingi ishga tushishda seeding qayta tekshiriladi
+SEED_VERSION = 1
+
+# =============== BOSHLANG'ICH MA'LUMOTLAR ===============
+RAW_MATERIALS: List[Dict] = [
+    {"name": "Klinker", "category": "Asosiy", "unit": "kg", "current_stock": 10000,
+     "min_stock": 1000, "price_per_unit": 500, "supplier": "O'zbekiston Sement"},
+    {"name": "Gips", "category": "Asosiy", "unit": "kg", "current_stock": 5000,
+     "min_stock": 500, "price_per_unit": 300, "supplier": "Gips Zavodi"},
+    {"name": "Qum", "category": "Qurilish", "unit": "kg", "current_stock": 20000,
+     "min_stock": 2000, "price_per_unit": 50, "supplier": "Qum Kon"},
+    {"name": "Temir sutka", "category": "Metall", "unit": "kg", "current_stock": 8000,
+     "min_stock": 800, "price_per_unit": 2000, "supplier": "Metall Zavodi"},
+    {"name": "Gil", "category": "Keramika", "unit": "kg", "current_stock": 10000,
+     "min_stock": 1000, "price_per_unit": 150, "supplier": "Gil Kon"},
+]
+
+PRODUCTS: List[Dict] = [
+    {"name": "Sement M500 (50kg)", "category": "sement", "unit": "qop", "selling_price": 12000,
+     "production_cost": 7000, "profit_margin": 0.4, "description": "Yuqori sifatli qurilish sementi"},
+    {"name": "Rodbin 12mm", "category": "rodbin", "unit": "metr", "selling_price": 4500,
+     "production_cost": 3200, "profit_margin": 0.3, "description": "Armatura materiali"},
+    {"name": "Kafel 30x30", "category": "kafel", "unit": "dona", "selling_price": 850,
+     "production_cost": 450, "profit_margin": 0.47, "description": "Hovli va xonalar uchun kafel"},
+    {"name": "Nalinoy pol", "category": "pol", "unit": "m2", "selling_price": 2800,
+     "production_cost": 1800, "profit_margin": 0.36, "description": "Zamonaviy pol qoplamasi"},
+]
+
+# =============== VERSIYA ===============
+def schema_fingerprint(head: Optional[str] = None) -> str:
+    """
+    Modellar (jadval, ustun, tur, indeks), Alembic head, SEED_VERSION va asosiy admin bo'yicha hash
+
+    Model yoki migratsiya qo'shilsa, ADMIN_IDS[0] almashsa iz ham o'zgaradi.
+    """
+    digest = hashlib.sha256(f"seed:{SEED_VERSION};admin:{ADMIN_IDS[:1]};head:{head}".encode())
+    for table in models.Base.metadata.sorted_tables:
+        digest.update(f"|{table.name}".encode())
+        for column in table.columns:
+            digest.update(f";{column.name}:{column.type!r}:{column.nullable}".encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(f";ix:{index.name}".encode())
+    return digest.hexdigest()[:16]
+
+def read_schema_version(engine=None) -> Optional[str]:
+    """Saqlangan iz (jadval yo'q bo'lsa None)"""
+    engine = engine or models.engine
+    if not inspect(engine).has_table(models.SchemaMeta.__tablename__):
+        return None
+    with get_db_session() as db:
+        row = db.get(models.SchemaMeta, SCHEMA_VERSION_KEY)
+        return row.value if row else None
+
+# =============== SEEDING ===============
+def seed_reference_data(db: Session) -> Dict[str, int]:
+    """
+    Bo'sh jadvallarni boshlang'ich ma'lumotlar bilan to'ldirish (commit chaqiruvchida)
+
+    Uchala tekshiruv bitta so'rovda, barcha yozuvlar bitta flush da qo'shiladi.
+    ORM orqali qo'shiladi - kesh va stock monitor hodisalari ishlaydi.
+    """
+    has_materials, has_products, has_admin = db.query(
+        db.query(models.RawMaterial.id).exists(),
+        db.query(models.Product.id).exists(),
+        db.query(models.Employee.id).filter(models.Employee.is_admin == True).exists()
+    ).one()
+
+    created = {"raw_materials": 0, "products": 0, "admins": 0}
+    rows = []
+
+    if not has_materials:
+        rows += [models.RawMaterial(**data) for data in RAW_MATERIALS]
+        created["raw_materials"] = len(RAW_MATERIALS)
+
+    if not has_products:
+        rows += [models.Product(**data, is_active=True) for data in PRODUCTS]
+        created["products"] = len(PRODUCTS)
+
+    if not has_admin and ADMIN_IDS:
+        rows.append(models.Employee(
+            telegram_id=ADMIN_IDS[0],
+            full_name="Asosiy Administrator",
+            phone_number="+998901234567",
+            position="Direktor",
+            department="Rahbariyat",
+            status=models.EmployeeStatus.ACTIVE,
+            hire_date=datetime.now(),
+            salary=0,
+            is_admin=True,
+            notes="Asosiy tizim administratori"
+        ))
+        created["admins"] = 1
+
+    db.add_all(rows)
+    return created
+
+def prepare_database(force: bool = False) -> bool:
+    """
+    Migratsiyalar va boshlang'ich ma'lumotlar (sinxron - alohida threadda chaqiriladi)
+
+    auto_upgrade o'chirilgan bo'lsa sxema tashqarida (`alembic upgrade head`) yangilanadi.
+
+    Returns:
+        True - baza yangilandi, False - iz mos keldi va hammasi o'tkazib yuborildi
+    """
+    # Alembic faqat shu yerda import qilinadi - main import vaqtiga ta'sir qilmaydi
+    from .alembic_versions import head_revision, upgrade_schema
+
+    fingerprint = schema_fingerprint(head_revision())
+    if not force and read_schema_version() == fingerprint:
+        logger.info(f"Schema version {fingerprint} is current, skipping migrations and seeding")
+        return False
+
+    if MIGRATION_SETTINGS['auto_upgrade']:
+        upgrade_schema()
+
+    with get_db_session() as db:
+        try:
+            created = seed_reference_data(db)
+            db.merge(models.SchemaMeta(key=SCHEMA_VERSION_KEY, value=fingerprint))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    logger.info(
+        f"Database prepared (schema version {fingerprint}): "
+        f"{created['raw_materials']} raw materials, {created['products']} products, {created['admins']} admins seeded"
+    )
+    return True
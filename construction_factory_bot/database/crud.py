@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func, extract
+from sqlalchemy import and_, or_, desc, func, extract, case
 from datetime import datetime, timedelta, date
 from typing import List, Optional, Dict, Any
 from . import models
+from .stock_monitor import low_stock_tracker
+from .reference_cache import reference_cache  # ORM hodisalarini ro'yxatdan o'tkazish uchun
+from .audit import audit_writer
 
 # =============== Xom ashyo CRUD ===============
 def create_raw_material(db: Session, material_data: Dict) -> models.RawMaterial:
@@ -40,11 +43,22 @@ def delete_raw_material(db: Session, material_id: int) -> bool:
         return True
     return False
 
+def low_stock_condition():
+    """Yetarli emaslik sharti: prognoz bo'lsa qayta buyurtma nuqtasi, aks holda min_stock"""
+    return models.RawMaterial.current_stock <= func.coalesce(
+        models.RawMaterial.reorder_point, models.RawMaterial.min_stock
+    )
+
 def check_low_stock_materials(db: Session) -> List[models.RawMaterial]:
     """Yetarli bo'lmagan xom ashyolarni topish"""
-    return db.query(models.RawMaterial).filter(
-        models.RawMaterial.current_stock <= models.RawMaterial.min_stock
-    ).all()
+    if low_stock_tracker.loaded:
+        # To'plam qoldiq o'zgarishlarida yangilanadi - to'liq skan kerak emas
+        low_ids = low_stock_tracker.ids
+        if not low_ids:
+            return []
+        return db.query(models.RawMaterial).filter(models.RawMaterial.id.in_(low_ids)).all()
+
+    return db.query(models.RawMaterial).filter(low_stock_condition()).all()
 
 # =============== Mahsulot CRUD ===============
 def create_product(db: Session, product_data: Dict) -> models.Product:
@@ -66,6 +80,28 @@ def get_products_by_category(db: Session, category: str) -> List[models.Product]
         models.Product.is_active == True
     ).all()
 
+def get_product_stock(db: Session, product_ids: Optional[List[int]] = None) -> Dict[int, float]:
+    """
+    Mahsulot qoldiqlari (ishlab chiqarilgan - sotilgan) bitta guruhlangan so'rovda
+
+    Qoldiq har safar bazadan o'qiladi - ma'lumotnoma keshida saqlanmaydi.
+    ix_warehouse_transactions_product_type indeksi bo'yicha (jadval to'liq o'qilmaydi).
+    """
+    transaction = models.WarehouseTransaction
+    signed = case(
+        (transaction.transaction_type == models.TransactionType.PRODUCTION, transaction.quantity),
+        (transaction.transaction_type == models.TransactionType.SALE, -transaction.quantity),
+        else_=0
+    )
+    query = db.query(transaction.product_id, func.sum(signed)).filter(
+        transaction.product_id.isnot(None),
+        transaction.transaction_type.in_([models.TransactionType.PRODUCTION, models.TransactionType.SALE])
+    )
+    if product_ids is not None:
+        query = query.filter(transaction.product_id.in_(product_ids))
+
+    return {product_id: stock or 0 for product_id, stock in query.group_by(transaction.product_id)}
+
 # =============== Ishlab chiqarish buyurtmalari CRUD ===============
 def create_production_order(db: Session, order_data: Dict) -> models.ProductionOrder:
     """Yangi ishlab chiqarish buyurtmasi yaratish"""
@@ -160,9 +196,10 @@ def get_warehouse_statistics(db: Session) -> Dict:
     ).filter(models.Product.is_active == True).scalar() or 0
     
     # Yetarli bo'lmagan materiallar
-    low_stock_count = db.query(models.RawMaterial).filter(
-        models.RawMaterial.current_stock <= models.RawMaterial.min_stock
-    ).count()
+    if low_stock_tracker.loaded:
+        low_stock_count = low_stock_tracker.count
+    else:
+        low_stock_count = db.query(models.RawMaterial).filter(low_stock_condition()).count()
     
     return {
         "total_raw_materials_value": raw_materials_value,
@@ -261,4 +298,20 @@ def mark_notification_sent(db: Session, notification_id: int) -> bool:
         notification.sent_time = datetime.utcnow() # type: ignore
         db.commit()
         return True
-    return False
\ No newline at end of file
+    return False
+
+# =============== Tizim loglari (audit) ===============
+def create_system_log(action: str, module: str = "system", user_id: Optional[int] = None,
+                      user_name: Optional[str] = None, details: Optional[str] = None,
+                      level: str = "info", category: Optional[str] = None,
+                      ip_address: Optional[str] = None) -> None:
+    """
+    Audit yozuvini qo'shish
+
+    Yozuv buferga qo'yiladi va paket bilan o'z sessiyasida yoziladi (database/audit.py),
+    shuning uchun sessiya parametri yo'q. Xatoliklar level="error" bilan yoziladi.
+    """
+    audit_writer.log(
+        action, module, user_id=user_id, user_name=user_name, details=details,
+        level=level, category=category, ip_address=ip_address
+    )
@@ -0,0 +1,47 @@
+"""
+Ma'lumotlar versiyasi - bazaga har bir yozish commit bo'lganda oshadigan hisoblagich
+
+Hisobotlar kabi hisoblangan natijalarni "ma'lumot o'zgarmagan" holatda
+qayta ishlatish uchun kalit sifatida ishlatiladi. Hisoblagich jarayon bo'yicha.
+"""
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .models import SessionLocal
+
+class DataVersion:
+    """Jarayon ichidagi yozishlar hisoblagichi"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+data_version = DataVersion()
+
+# =============== ORM HODISALARI ===============
+_DIRTY_KEY = "data_version_dirty"
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_dirty(session: Session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info[_DIRTY_KEY] = True
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_version(session: Session):
+    if session.info.pop(_DIRTY_KEY, False):
+        data_version.bump()
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_dirty(session: Session):
+    session.info.pop(_DIRTY_KEY, None)
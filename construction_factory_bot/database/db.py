@@ -1,6 +1,9 @@
 import sqlite3
 import logging
 from config import DB_PATH
+from database.stock_monitor import low_stock_tracker
+from database.query_profiler import cursor_factory
+from database.data_version import data_version
 
 logger = logging.getLogger(__name__)
 
@@ -8,7 +11,7 @@ class Database:
     def __init__(self):
         self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
-        self.cursor = self.conn.cursor()
+        self.cursor = self.conn.cursor(factory=cursor_factory())
         self.create_tables()
         self.initialize_data()
     
@@ -24,6 +27,7 @@ class Database:
             current_stock REAL DEFAULT 0,
             min_stock REAL DEFAULT 0,
             price_per_unit REAL DEFAULT 0,
+            reorder_point REAL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
@@ -202,8 +206,21 @@ class Database:
             ''', (quantity, raw_material_id))
         
         self.conn.commit()
-        return self.cursor.lastrowid
-    
+        transaction_id = self.cursor.lastrowid
+        data_version.bump()
+
+        # Faqat o'zgargan material uchun chegarani tekshirish
+        if raw_material_id:
+            self.cursor.execute(
+                'SELECT current_stock, min_stock, reorder_point FROM raw_materials WHERE id = ?',
+                (raw_material_id,)
+            )
+            row = self.cursor.fetchone()
+            if row:
+                low_stock_tracker.evaluate(raw_material_id, row['current_stock'], row['min_stock'], row['reorder_point'])
+
+        return transaction_id
+
     def close(self):
         """Database ulanishini yopish"""
         self.conn.close()
@@ -0,0 +1,244 @@
+"""
+FSM holatlari uchun saqlash - Redis yoki SQLite
+
+Bir nechta polling/webhook worker bitta holat omboridan foydalanishi va
+bot qayta ishga tushganda savatlar, ishlab chiqarish va xodim formalari
+yo'qolmasligi uchun.
+
+aiogram ning RedisStorage i ishlatilmaydi: u holat va ma'lumotni alohida kalitlarda,
+alohida TTL bilan saqlaydi - biri eskirib, ikkinchisi qolishi mumkin (masalan, miqdor
+kutilayotgan holat bo'sh savat bilan). Bu yerda ikkalasi bitta hash da, bitta TTL
+bilan va atomar yoziladi. Serializatsiya (siqish, Decimal/datetime) SQLite bilan
+umumiy - backend almashganda xatti-harakat bir xil qoladi.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import FSM_STORAGE_SETTINGS
+
+try:
+    from redis.asyncio import Redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# =============== SERIALIZATSIYA ===============
+# Birinchi bayt formatni bildiradi: j - oddiy JSON, z - zlib bilan siqilgan JSON
+_RAW, _COMPRESSED = b"j", b"z"
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"FSM ma'lumotini saqlab bo'lmaydi: {type(value).__name__}")
+
+def pack_data(data: Mapping[str, Any]) -> Optional[bytes]:
+    """FSM ma'lumotini ixcham baytlarga aylantirish (bo'sh bo'lsa None)"""
+    if not data:
+        return None
+
+    raw = json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode()
+    if len(raw) >= FSM_STORAGE_SETTINGS['compress_threshold']:
+        return _COMPRESSED + zlib.compress(raw)
+    return _RAW + raw
+
+def unpack_data(blob: Optional[bytes]) -> Dict[str, Any]:
+    """pack_data() natijasini qayta dict ga aylantirish"""
+    if not blob:
+        return {}
+
+    blob = bytes(blob)
+    if blob[:1] == _COMPRESSED:
+        return json.loads(zlib.decompress(blob[1:]))
+    return json.loads(blob[1:])
+
+def _state_name(state: StateType) -> Optional[str]:
+    return state.state if isinstance(state, State) else state
+
+# =============== REDIS ===============
+class RedisFSMStorage(BaseStorage):
+    """
+    Redis asosidagi FSM storage
+
+    Har bir foydalanuvchi uchun bitta hash (s - holat, d - ma'lumot) va TTL.
+    Tekshirish uchun fakeredis.aioredis.FakeRedis ham uzatilishi mumkin.
+    """
+
+    def __init__(self, redis, key_builder: Optional[KeyBuilder] = None,
+                 state_ttl: Optional[int] = None):
+        self.redis = redis
+        self.key_builder = key_builder or DefaultKeyBuilder(
+            prefix=FSM_STORAGE_SETTINGS['key_prefix'], with_bot_id=True
+        )
+        self.state_ttl = state_ttl if state_ttl is not None else FSM_STORAGE_SETTINGS['state_ttl']
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisFSMStorage":
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis kutubxonasi o'rnatilmagan")
+        return cls(Redis.from_url(url), **kwargs)
+
+    async def _write(self, key: StorageKey, field: str, value):
+        redis_key = self.key_builder.build(key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if value is None:
+                pipe.hdel(redis_key, field)
+            else:
+                pipe.hset(redis_key, field, value)
+                if self.state_ttl:
+                    pipe.expire(redis_key, self.state_ttl)
+            await pipe.execute()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key, "s", _state_name(state))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        value = await self.redis.hget(self.key_builder.build(key), "s")
+        if isinstance(value, bytes):
+            return value.decode()
+        return value
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._write(key, "d", pack_data(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return unpack_data(await self.redis.hget(self.key_builder.build(key), "d"))
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+    async def wait_closed(self) -> None:
+        return None
+
+# =============== SQLITE ===============
+class SQLiteFSMStorage(BaseStorage):
+    """
+    SQLite asosidagi FSM storage (Redis bo'lmaganda)
+
+    WAL rejimida bitta serverdagi bir nechta jarayon bitta faylni ishlatishi mumkin.
+    So'rovlar event loop ni to'xtatmaslik uchun alohida oqimda bajariladi.
+    """
+
+    def __init__(self, path: Optional[str] = None, key_builder: Optional[KeyBuilder] = None,
+                 state_ttl: Optional[int] = None):
+        self.path = path or FSM_STORAGE_SETTINGS['sqlite_path']
+        self.key_builder = key_builder or DefaultKeyBuilder(
+            prefix=FSM_STORAGE_SETTINGS['key_prefix'], with_bot_id=True
+        )
+        self.state_ttl = state_ttl if state_ttl is not None else FSM_STORAGE_SETTINGS['state_ttl']
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data BLOB,
+            expires_at REAL
+        )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_fsm_storage_expires ON fsm_storage (expires_at)")
+        self.conn.commit()
+
+    def _expires_at(self) -> Optional[float]:
+        return time.time() + self.state_ttl if self.state_ttl else None
+
+    def _write(self, storage_key: str, column: str, value):
+        other = "data" if column == "state" else "state"
+        now = time.time()
+
+        with self._lock:
+            # Muddati o'tgan yozuvning ikkinchi ustuni ham tozalanadi
+            self.conn.execute(f'''
+            INSERT INTO fsm_storage (key, {column}, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                {column} = excluded.{column},
+                {other} = CASE WHEN fsm_storage.expires_at < ? THEN NULL ELSE fsm_storage.{other} END,
+                expires_at = excluded.expires_at
+            ''', (storage_key, value, self._expires_at(), now))
+
+            if value is None:
+                self.conn.execute(
+                    'DELETE FROM fsm_storage WHERE key = ? AND state IS NULL AND data IS NULL',
+                    (storage_key,)
+                )
+
+            # Eskirgan (tashlab ketilgan) holatlarni vaqti-vaqti bilan tozalash
+            self._writes += 1
+            if self._writes % FSM_STORAGE_SETTINGS['cleanup_every'] == 0:
+                self.conn.execute('DELETE FROM fsm_storage WHERE expires_at < ?', (now,))
+
+            self.conn.commit()
+
+    def _read(self, storage_key: str, column: str):
+        with self._lock:
+            row = self.conn.execute(
+                f'SELECT {column} FROM fsm_storage WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+                (storage_key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await asyncio.to_thread(self._write, self.key_builder.build(key), "state", _state_name(state))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await asyncio.to_thread(self._read, self.key_builder.build(key), "state")
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await asyncio.to_thread(self._write, self.key_builder.build(key), "data", pack_data(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return unpack_data(await asyncio.to_thread(self._read, self.key_builder.build(key), "data"))
+
+    async def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    async def wait_closed(self) -> None:
+        return None
+
+# =============== TANLASH ===============
+async def create_fsm_storage(backend: Optional[str] = None) -> BaseStorage:
+    """
+    Sozlamalar bo'yicha FSM storage yaratish
+
+    Redis mavjud bo'lmasa yoki ulanib bo'lmasa SQLite ishlatiladi.
+    """
+    backend = backend or FSM_STORAGE_SETTINGS['backend']
+
+    if backend == "redis":
+        try:
+            storage = RedisFSMStorage.from_url(FSM_STORAGE_SETTINGS['redis_url'])
+            await storage.redis.ping()
+            logger.info("FSM storage: Redis")
+            return storage
+        except Exception as e:
+            logger.warning(f"Redis FSM storage ishlamadi ({e}), SQLite ishlatiladi")
+            backend = "sqlite"
+
+    if backend == "memory":
+        logger.info("FSM storage: xotira (qayta ishga tushganda holatlar yo'qoladi)")
+        return MemoryStorage()
+
+    logger.info(f"FSM storage: SQLite ({FSM_STORAGE_SETTINGS['sqlite_path']})")
+    return SQLiteFSMStorage()
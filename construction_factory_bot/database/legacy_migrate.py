@@ -0,0 +1,378 @@
+"""
+Eski bazalardan ko'chirish - database/db.py va data/database.py sqlite fayllari -> models bazasi
+
+Botni to'xtatmasdan ishlaydi: manba faqat o'qish rejimida ochiladi, qatorlar id
+bo'yicha bo'laklab (legacy_chunk_size) o'qiladi va har bir bo'lak alohida qisqa
+tranzaksiyada yoziladi. Oxirgi ko'chirilgan id shu tranzaksiyada schema_meta ga
+saqlanadi - jarayon to'xtasa yoki eski bazaga yangi qatorlar qo'shilsa, qayta
+ishga tushirish qolgan joydan davom etadi (hech bir qator ikki marta yozilmaydi).
+
+Xom ashyo va mahsulotlar nomi bo'yicha birlashtiriladi: maqsad bazada bor bo'lsa
+uning qoldig'i va narxi o'zgartirilmaydi, bog'liq jadvallar id lari qayta moslanadi.
+
+Qatorlar Core insert bilan yoziladi - ORM hodisalari ishlamaydi, shuning uchun har
+bir bo'lakdan keyin shu jarayondagi keshlar qo'lda yangilanadi. Ishlab turgan bot
+boshqa jarayon: ko'chirish tugagach uni qayta ishga tushirish kerak (yoki
+REFERENCE_CACHE_TTL va low_stock_resync_interval o'tishini kutish).
+
+Misol:
+    python -m database.legacy_migrate construction.db
+    python -m database.legacy_migrate construction.db --status
+"""
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.engine import Connection
+
+from . import models
+from .data_version import data_version
+from .reference_cache import ENTITIES, reference_cache
+from .session import get_db_session
+from .stock_monitor import low_stock_tracker
+from config import MIGRATION_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class LegacySource:
+    """Ko'chirilayotgan manba: checkpoint kaliti va eski id -> yangi id (xom ashyo, mahsulotlar)"""
+    tag: str
+    ids: Dict[str, Dict[int, int]]
+
+@dataclass
+class TableResult:
+    """Bitta jadval bo'yicha natija"""
+    table: str
+    copied: int = 0
+    skipped: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+# =============== QIYMATLARNI O'GIRISH ===============
+def _parse_datetime(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+def _enum_value(enum_cls, value, default=None):
+    """Eski matn qiymati (qiymat yoki nom bo'yicha) -> Enum"""
+    if value is None:
+        return default
+    try:
+        return enum_cls(value)
+    except ValueError:
+        return enum_cls.__members__.get(str(value).upper(), default)
+
+def _raw_material(row: dict, legacy: LegacySource) -> Optional[dict]:
+    return {
+        "name": row["name"],
+        "unit": row["unit"],
+        "current_stock": row.get("current_stock") or 0.0,
+        "min_stock": row.get("min_stock") or 0.0,
+        "price_per_unit": row.get("price_per_unit") or 0.0,
+        "created_at": _parse_datetime(row.get("created_at")),
+    }
+
+def _product(row: dict, legacy: LegacySource) -> Optional[dict]:
+    return {
+        "name": row["name"],
+        "category": row.get("category") or "boshqa",
+        "unit": row["unit"],
+        "selling_price": row.get("selling_price") or 0.0,
+        "production_cost": row.get("production_cost") or 0.0,
+        "is_active": True,
+        "created_at": _parse_datetime(row.get("created_at")),
+    }
+
+def _formula(row: dict, legacy: LegacySource) -> Optional[dict]:
+    product_id = legacy.ids["products"].get(row["product_id"])
+    raw_material_id = legacy.ids["raw_materials"].get(row["raw_material_id"])
+    if product_id is None or raw_material_id is None:
+        return None
+    return {"product_id": product_id, "raw_material_id": raw_material_id, "quantity": row["quantity"]}
+
+def _production_order(row: dict, legacy: LegacySource) -> Optional[dict]:
+    product_id = legacy.ids["products"].get(row["product_id"])
+    if product_id is None:
+        return None
+    return {
+        # database/db.py da order_number yo'q
+        "order_number": row.get("order_number") or f"LEGACY-{legacy.tag.split(':')[1]}-{row['id']}",
+        "product_id": product_id,
+        "quantity": row["quantity"],
+        "status": _enum_value(models.OrderStatus, row.get("status"), models.OrderStatus.PENDING),
+        "total_cost": row.get("total_cost") or 0.0,
+        "actual_end": _parse_datetime(row.get("completed_date")),
+        "notes": row.get("notes"),
+        "created_at": _parse_datetime(row.get("created_date")),
+    }
+
+def _transaction(row: dict, legacy: LegacySource) -> Optional[dict]:
+    transaction_type = _enum_value(models.TransactionType, row.get("transaction_type"))
+    product_id = legacy.ids["products"].get(row["product_id"]) if row.get("product_id") else None
+    raw_material_id = legacy.ids["raw_materials"].get(row["raw_material_id"]) if row.get("raw_material_id") else None
+    if transaction_type is None or (row.get("product_id") and product_id is None) \
+            or (row.get("raw_material_id") and raw_material_id is None):
+        return None
+    return {
+        "date": _parse_datetime(row.get("date")),
+        "product_id": product_id,
+        "raw_material_id": raw_material_id,
+        "quantity": row["quantity"],
+        "transaction_type": transaction_type,
+        "user_id": row.get("user_id") or 0,
+        "user_name": row.get("user_name"),
+        "notes": row.get("notes"),
+        "created_at": _parse_datetime(row.get("date")),
+    }
+
+# =============== JADVALLAR ===============
+@dataclass(frozen=True)
+class TableSpec:
+    """Eski jadval -> model jadvali"""
+    sources: Tuple[str, ...]  # Eski nomlar (db.py va data/database.py da farq qiladi)
+    model: type
+    convert: Callable[[dict, "LegacySource"], Optional[dict]]
+    natural_key: Tuple[str, ...] = ()  # Maqsad bazada shu kalit bo'lsa qator qo'shilmaydi
+    reference: bool = False  # Id lari bog'liq jadvallar uchun moslanadi
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+# Tartib muhim: bog'liq jadvallar xom ashyo va mahsulotlardan keyin
+TABLES: List[TableSpec] = [
+    TableSpec(("raw_materials",), models.RawMaterial, _raw_material, ("name",), reference=True),
+    TableSpec(("products",), models.Product, _product, ("name",), reference=True),
+    TableSpec(("product_formulas", "formulas"), models.ProductFormula, _formula, ("product_id", "raw_material_id")),
+    TableSpec(("production_orders",), models.ProductionOrder, _production_order, ("order_number",)),
+    TableSpec(("warehouse_transactions",), models.WarehouseTransaction, _transaction),
+]
+
+# =============== MANBA ===============
+def open_source(path: str) -> sqlite3.Connection:
+    """Eski bazani faqat o'qish uchun ochish (eski jarayon yozishda davom etishi mumkin)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    target = models.engine.url
+    if target.get_backend_name() == "sqlite" and target.database \
+            and os.path.abspath(target.database) == os.path.abspath(path):
+        raise ValueError(f"{path} - bu bot bazasining o'zi")
+
+    source = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    source.row_factory = sqlite3.Row
+    return source
+
+def source_tag(path: str) -> str:
+    """Checkpoint kaliti uchun manba identifikatori"""
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+    return f"{os.path.basename(path)}:{digest}"
+
+def source_table(source: sqlite3.Connection, spec: TableSpec) -> Optional[str]:
+    names = {row[0] for row in source.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return next((name for name in spec.sources if name in names), None)
+
+# =============== CHECKPOINT ===============
+def _checkpoint_key(tag: str, table: str) -> str:
+    return f"legacy:{tag}:{table}"
+
+def read_checkpoint(connection: Connection, tag: str, table: str) -> int:
+    meta = models.SchemaMeta.__table__
+    value = connection.execute(
+        select(meta.c.value).where(meta.c.key == _checkpoint_key(tag, table))
+    ).scalar()
+    return int(value) if value else 0
+
+def write_checkpoint(connection: Connection, tag: str, table: str, last_id: int):
+    meta = models.SchemaMeta.__table__
+    key = _checkpoint_key(tag, table)
+    connection.execute(delete(meta).where(meta.c.key == key))
+    connection.execute(insert(meta).values(key=key, value=str(last_id), updated_at=datetime.utcnow()))
+
+# =============== KO'CHIRISH ===============
+def load_reference_ids(source: sqlite3.Connection, connection: Connection, spec: TableSpec) -> Dict[int, int]:
+    """Eski id -> yangi id (nom bo'yicha; ma'lumotnoma jadvallari kichik)"""
+    table_name = source_table(source, spec)
+    if table_name is None:
+        return {}
+    names = {row["name"]: row["id"] for row in source.execute(f"SELECT id, name FROM {table_name}")}
+    table = spec.model.__table__
+    current = connection.execute(select(table.c.name, table.c.id).where(table.c.name.in_(list(names))))
+    return {names[name]: new_id for name, new_id in current}
+
+def _existing_keys(connection: Connection, spec: TableSpec, rows: List[dict]) -> set:
+    """Bo'lakdagi qatorlardan maqsad bazada allaqachon borlari"""
+    if not spec.natural_key or not rows:
+        return set()
+    table = spec.model.__table__
+    columns = [table.c[name] for name in spec.natural_key]
+    keys = {tuple(row[name] for name in spec.natural_key) for row in rows}
+    if len(columns) == 1:
+        condition = columns[0].in_([key[0] for key in keys])
+    else:
+        condition = tuple_(*columns).in_(list(keys))
+    return {tuple(found) for found in connection.execute(select(*columns).where(condition))}
+
+def copy_chunk(connection: Connection, spec: TableSpec, rows: List[sqlite3.Row],
+               legacy: LegacySource) -> Tuple[int, int]:
+    """Bitta bo'lakni yozish. Returns: (ko'chirildi, o'tkazib yuborildi)"""
+    converted = []
+    for row in rows:
+        values = spec.convert(dict(row), legacy)
+        if values is not None:
+            converted.append((row["id"], values))
+
+    existing = _existing_keys(connection, spec, [values for _, values in converted])
+    new_rows = []
+    for _, values in converted:
+        key = tuple(values[name] for name in spec.natural_key)
+        if spec.natural_key and key in existing:
+            continue
+        existing.add(key)
+        new_rows.append(values)
+
+    if new_rows:
+        connection.execute(insert(spec.model.__table__), new_rows)
+
+    if spec.reference:
+        # Yangi va nomi bo'yicha birlashtirilgan qatorlar id lari
+        table = spec.model.__table__
+        legacy_ids = {values["name"]: legacy_id for legacy_id, values in converted}
+        query = select(table.c.name, table.c.id).where(table.c.name.in_(list(legacy_ids)))
+        for name, new_id in connection.execute(query):
+            legacy.ids[spec.table][legacy_ids[name]] = new_id
+
+    return len(new_rows), len(rows) - len(new_rows)
+
+def invalidate_caches(spec: TableSpec):
+    """Core insert dan keyin ORM hodisalari bajaradigan ishni qo'lda qilish"""
+    if spec.table in ENTITIES:
+        reference_cache.evict(spec.table)
+    if spec.model is models.RawMaterial:
+        with get_db_session() as db:
+            low_stock_tracker.load(db)
+    data_version.bump()
+
+def migrate_table(source: sqlite3.Connection, legacy: LegacySource, spec: TableSpec,
+                  chunk_size: int, pause: float) -> TableResult:
+    result = TableResult(spec.table)
+    table_name = source_table(source, spec)
+    if table_name is None:
+        return result
+
+    started = time.perf_counter()
+    with models.engine.connect() as connection:
+        last_id = read_checkpoint(connection, legacy.tag, spec.table)
+
+    while True:
+        rows = source.execute(
+            f"SELECT * FROM {table_name} WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            break
+
+        # Bo'lak va checkpoint bitta qisqa tranzaksiyada
+        with models.engine.begin() as connection:
+            copied, skipped = copy_chunk(connection, spec, rows, legacy)
+            last_id = rows[-1]["id"]
+            write_checkpoint(connection, legacy.tag, spec.table, last_id)
+        if copied:
+            invalidate_caches(spec)
+
+        result.copied += copied
+        result.skipped += skipped
+        result.chunks += 1
+        logger.debug(f"{spec.table}: chunk up to id {last_id} ({copied} copied, {skipped} skipped)")
+
+        if len(rows) < chunk_size:
+            break
+        time.sleep(pause)
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+def migrate_source(path: str, chunk_size: Optional[int] = None, pause: Optional[float] = None) -> List[TableResult]:
+    """Bitta eski bazani to'liq ko'chirish (qayta chaqirish xavfsiz)"""
+    chunk_size = chunk_size or MIGRATION_SETTINGS['legacy_chunk_size']
+    pause = MIGRATION_SETTINGS['legacy_chunk_pause'] if pause is None else pause
+
+    source = open_source(path)
+    try:
+        with models.engine.connect() as connection:
+            legacy = LegacySource(source_tag(path), {
+                spec.table: load_reference_ids(source, connection, spec) for spec in TABLES if spec.reference
+            })
+        results = [migrate_table(source, legacy, spec, chunk_size, pause) for spec in TABLES]
+    finally:
+        source.close()
+
+    logger.info(
+        f"Legacy database {path} migrated: "
+        + ", ".join(f"{result.table} {result.copied}" for result in results)
+    )
+    return results
+
+def migration_status(path: str) -> List[Tuple[str, int, int]]:
+    """Har jadval uchun: (jadval, eski bazadagi qatorlar, hali ko'chirilmaganlar)"""
+    tag = source_tag(path)
+    source = open_source(path)
+    status = []
+    try:
+        with models.engine.connect() as connection:
+            for spec in TABLES:
+                table_name = source_table(source, spec)
+                if table_name is None:
+                    continue
+                last_id = read_checkpoint(connection, tag, spec.table)
+                total, pending = source.execute(
+                    f"SELECT COUNT(*), SUM(id > ?) FROM {table_name}", (last_id,)
+                ).fetchone()
+                status.append((spec.table, total, pending or 0))
+    finally:
+        source.close()
+    return status
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eski sqlite bazalardan bo'laklab ko'chirish")
+    parser.add_argument("sources", nargs="*", default=MIGRATION_SETTINGS['legacy_sources'], help="Eski baza fayllari")
+    parser.add_argument("--chunk-size", type=int, default=MIGRATION_SETTINGS['legacy_chunk_size'])
+    parser.add_argument("--pause", type=float, default=MIGRATION_SETTINGS['legacy_chunk_pause'],
+                        help="Bo'laklar orasida kutish (soniya)")
+    parser.add_argument("--status", action="store_true", help="Faqat holatni ko'rsatish")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    for path in args.sources:
+        if not os.path.exists(path):
+            print(f"⚠️ {path} topilmadi, o'tkazib yuborildi")
+            continue
+
+        if args.status:
+            print(f"{path}:")
+            for table, total, pending in migration_status(path):
+                print(f"  {table:<25}{total:>10} qator, {pending:>8} ko'chirilmagan")
+            continue
+
+        print(f"{path}:")
+        for result in migrate_source(path, args.chunk_size, args.pause):
+            print(
+                f"  {result.table:<25}{result.copied:>8} ko'chirildi{result.skipped:>8} o'tkazildi"
+                f"  ({result.chunks} bo'lak, {result.seconds:.2f} s)"
+            )
+
+    if not args.status:
+        print("ℹ️ Ishlab turgan botni qayta ishga tushiring - uning keshlari bu ko'chirishni ko'rmaydi")
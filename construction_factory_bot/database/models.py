@@ -1,6 +1,6 @@
 from sqlalchemy import (
     create_engine, Column, Integer, String, Float, 
-    DateTime, Boolean, ForeignKey, Text, Enum, JSON
+    DateTime, Boolean, ForeignKey, Text, Enum, JSON, Index
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
@@ -9,9 +9,11 @@ from datetime import datetime, time
 import enum
 
 from config import DATABASE_URL
+from .query_profiler import install_engine_profiler
 
 # Database engine yaratish
 engine = create_engine(DATABASE_URL)
+install_engine_profiler(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -57,6 +59,15 @@ class RawMaterial(Base):
     price_per_unit = Column(Float, default=0.0)
     supplier = Column(String(100), nullable=True)
     last_purchase_date = Column(DateTime, nullable=True)
+
+    # Talab prognozi (utils/forecasting.py tomonidan yangilanadi)
+    lead_time_days = Column(Integer, nullable=True)
+    daily_usage_forecast = Column(Float, nullable=True)
+    reorder_point = Column(Float, nullable=True)
+    projected_stockout_date = Column(DateTime, nullable=True)
+    forecast_model = Column(String(30), nullable=True)
+    forecast_updated_at = Column(DateTime, nullable=True)
+
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -129,6 +140,11 @@ class WarehouseTransaction(Base):
     # Aloqalar
     product = relationship("Product", back_populates="transactions")
     raw_material = relationship("RawMaterial", back_populates="transactions")
+    
+    __table_args__ = (
+        # Mahsulot qoldig'i (crud.get_product_stock)
+        Index("ix_warehouse_transactions_product_type", "product_id", "transaction_type"),
+    )
 
 class ProductionOrder(Base):
     """Ishlab chiqarish buyurtmalari jadvali"""
@@ -272,7 +288,21 @@ class SystemLog(Base):
     module = Column(String(50), nullable=False)
     details = Column(Text, nullable=True)
     ip_address = Column(String(45), nullable=True)
+    level = Column(String(10), nullable=False, default="info", index=True)  # info, warning, error
+    category = Column(String(50), nullable=True, index=True)  # Amal turi (backup, admin, employees...)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        Index("ix_system_logs_level_created_at", "level", "created_at"),
+    )
+
+class SchemaMeta(Base):
+    """Sxema va boshlang'ich ma'lumotlar versiyasi (database/bootstrap.py)"""
+    __tablename__ = "schema_meta"
+    
+    key = Column(String(50), primary_key=True)
+    value = Column(String(100), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 # Jadvalarni yaratish
 def create_tables():
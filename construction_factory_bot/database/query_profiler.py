@@ -0,0 +1,192 @@
+"""
+SQL so'rovlar profiler i - qaysi so'rovlar bazani eng ko'p yuklashini aniqlash
+
+So'rovlar "barmoq izi" bo'yicha guruhlanadi (qiymatlar ? bilan almashtiriladi),
+har bir guruh uchun soni, umumiy vaqti va p95 hisoblanadi. Sekin so'rovlar
+ularni chaqirgan handler nomi bilan logga yoziladi.
+
+Yoqish: SQL_PROFILER=1 (sozlamalar - QUERY_PROFILER_SETTINGS)
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List
+
+from sqlalchemy import event
+
+from config import QUERY_PROFILER_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# =============== NORMALIZATSIYA ===============
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PARAMS = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACES = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """
+    So'rovni barmoq iziga aylantirish
+
+    `SELECT * FROM products WHERE id IN (1, 2, 3)` -> `SELECT * FROM products WHERE id IN (?)`
+    """
+    sql = _COMMENTS.sub(" ", statement)
+    sql = _STRINGS.sub("?", sql)
+    sql = _PARAMS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?)", sql)
+    sql = _REPEATED_LISTS.sub("(?)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+def _current_handler() -> str:
+    """So'rovni chaqirgan handler nomi (metrika middleware i belgilaydi)"""
+    from utils.metrics import current_update
+
+    stats = current_update.get()
+    if stats is None:
+        return f"background:{threading.current_thread().name}"
+    return stats.handler
+
+# =============== STATISTIKA ===============
+class QueryStats:
+    """Bitta barmoq izi bo'yicha yig'ilgan ko'rsatkichlar"""
+    __slots__ = ("count", "total", "max", "samples", "sources")
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+        self.sources: Dict[str, int] = {}
+
+    def p95(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+class QueryProfiler:
+    """Engine (SQLAlchemy) va Database (sqlite3) so'rovlarining umumiy profiler i"""
+
+    def __init__(self):
+        self._stats: Dict[str, QueryStats] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    @property
+    def enabled(self) -> bool:
+        return QUERY_PROFILER_SETTINGS['enabled']
+
+    def record(self, statement: str, duration: float, source: str = "orm"):
+        """Bajarilgan so'rovni hisobga olish"""
+        fingerprint = normalize_sql(statement)
+
+        with self._lock:
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                stats = self._stats[fingerprint] = QueryStats(QUERY_PROFILER_SETTINGS['sample_size'])
+            stats.count += 1
+            stats.total += duration
+            stats.max = max(stats.max, duration)
+            stats.samples.append(duration)
+            stats.sources[source] = stats.sources.get(source, 0) + 1
+
+        if duration * 1000 >= QUERY_PROFILER_SETTINGS['slow_query_ms']:
+            logger.warning(
+                f"Slow query ({duration * 1000:.1f} ms, {source}) in {_current_handler()}: "
+                f"{_SPACES.sub(' ', statement).strip()[:500]}"
+            )
+
+    def report(self, limit: int = None) -> List[Dict]:
+        """Umumiy vaqt bo'yicha tartiblangan so'rov turlari"""
+        limit = limit or QUERY_PROFILER_SETTINGS['report_limit']
+
+        with self._lock:
+            rows = [
+                {
+                    'fingerprint': fingerprint,
+                    'count': stats.count,
+                    'total': stats.total,
+                    'mean': stats.total / stats.count,
+                    'p95': stats.p95(),
+                    'max': stats.max,
+                    'sources': dict(stats.sources)
+                }
+                for fingerprint, stats in self._stats.items()
+            ]
+
+        rows.sort(key=lambda row: row['total'], reverse=True)
+        return rows[:limit]
+
+    def format_report(self, limit: int = None) -> str:
+        """Hisobotni matn ko'rinishida (log uchun)"""
+        rows = self.report(limit)
+        if not rows:
+            return "SQL profiler: no queries recorded"
+
+        lines = [f"SQL profiler report (since {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at))}):"]
+        for i, row in enumerate(rows, 1):
+            lines.append(
+                f"{i:>3}. total {row['total'] * 1000:9.1f} ms | count {row['count']:6} | "
+                f"mean {row['mean'] * 1000:7.2f} ms | p95 {row['p95'] * 1000:7.2f} ms | {row['fingerprint'][:200]}"
+            )
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+        self.started_at = time.time()
+
+query_profiler = QueryProfiler()
+
+# =============== SQLALCHEMY ENGINE ===============
+# Boshlanish vaqti so'rov konteksida - xatolik bilan tugagan so'rov ulanishda iz qoldirmaydi
+_START_ATTR = "_query_profiler_start"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        setattr(context, _START_ATTR, time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, _START_ATTR, None)
+    if started is not None:
+        query_profiler.record(statement, time.perf_counter() - started, "orm")
+
+def install_engine_profiler(engine):
+    """Engine ga profiler hodisalarini ulash (faqat yoqilgan bo'lsa)"""
+    if not query_profiler.enabled:
+        return
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        logger.info("SQL profiler enabled for SQLAlchemy engine")
+
+# =============== SQLITE3 CURSOR ===============
+class ProfiledCursor(sqlite3.Cursor):
+    """Database klassi uchun vaqtni o'lchovchi cursor"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            query_profiler.record(sql, time.perf_counter() - started, "sqlite3")
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            query_profiler.record(sql, time.perf_counter() - started, "sqlite3")
+
+def cursor_factory():
+    """Profiler yoqilgan bo'lsa ProfiledCursor, aks holda oddiy cursor"""
+    return ProfiledCursor if query_profiler.enabled else sqlite3.Cursor
@@ -0,0 +1,277 @@
+"""
+Ma'lumotnoma keshi - mahsulotlar, xom ashyolar va xodimlar katalogi xotirada
+
+Yozuvlar sessiyadan ajratilgan oddiy dict ko'rinishida saqlanadi, shuning uchun
+ularni FSM holatiga va klaviaturalarga to'g'ridan-to'g'ri uzatish mumkin.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+from .models import SessionLocal
+from .session import get_db_session
+from config import REFERENCE_CACHE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Entity nomi -> (model, kalit maydoni, saqlanadigan maydonlar)
+# Faqat kam o'zgaradigan katalog maydonlari - qoldiqlar (current_stock va h.k.) bazadan o'qiladi
+ENTITIES: Dict[str, Tuple[type, str, Tuple[str, ...]]] = {
+    "products": (
+        models.Product, "id",
+        ("id", "name", "category", "unit", "selling_price", "production_cost", "is_active")
+    ),
+    "raw_materials": (
+        models.RawMaterial, "id",
+        ("id", "name", "category", "unit", "price_per_unit", "min_stock", "supplier")
+    ),
+    "employees": (
+        models.Employee, "telegram_id",
+        ("id", "telegram_id", "full_name", "position", "department", "is_admin")
+    ),
+}
+
+for _name, (_model, _, _fields) in ENTITIES.items():
+    _unknown = set(_fields) - set(_model.__table__.columns.keys())
+    if _unknown:
+        raise AttributeError(f"Reference cache entity '{_name}' has unknown fields: {sorted(_unknown)}")
+
+def _entity_of(obj) -> Optional[str]:
+    """ORM obyekti qaysi entity ga tegishli"""
+    for name, (model, _, _) in ENTITIES.items():
+        if isinstance(obj, model):
+            return name
+    return None
+
+def _snapshot(name: str, obj) -> Dict[str, Any]:
+    """
+    ORM obyektidan faqat katalog maydonlarini olish
+
+    Modelda yo'q maydon AttributeError beradi - jimgina None saqlanmaydi.
+    """
+    _, _, fields = ENTITIES[name]
+    return {field: getattr(obj, field) for field in fields}
+
+class ReferenceCache:
+    """Read-through katalog keshi (har bir entity uchun alohida versiya)"""
+
+    def __init__(self):
+        self._rows: Dict[str, Dict[Any, Dict]] = {name: {} for name in ENTITIES}
+        self._complete: Set[str] = set()
+        self._versions: Dict[str, int] = {name: 0 for name in ENTITIES}
+        self._loaded_at: Dict[str, float] = {name: 0.0 for name in ENTITIES}
+        self._hits: Dict[str, int] = {name: 0 for name in ENTITIES}
+        self._misses: Dict[str, int] = {name: 0 for name in ENTITIES}
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self) -> bool:
+        return REFERENCE_CACHE_SETTINGS['enabled']
+
+    def _expire(self, name: str):
+        """
+        TTL o'tgan entity ni tashlash (lock ostida chaqiriladi)
+
+        Bir nechta worker jarayonida boshqa jarayondagi yozishlar shu yo'l bilan ko'rinadi.
+        """
+        ttl = REFERENCE_CACHE_SETTINGS['ttl_seconds']
+        if ttl and self._rows[name] and time.monotonic() - self._loaded_at[name] >= ttl:
+            self._rows[name] = {}
+            self._complete.discard(name)
+            self._versions[name] += 1
+
+    # =============== YUKLASH ===============
+    def warm_up(self, db: Session):
+        """Sozlamalardagi barcha entity larni bittadan so'rov bilan yuklash"""
+        for name in REFERENCE_CACHE_SETTINGS['entities']:
+            self._load_all(db, name)
+
+        logger.info(
+            "Reference cache warmed up: "
+            + ", ".join(f"{name}={len(self._rows[name])}" for name in REFERENCE_CACHE_SETTINGS['entities'])
+        )
+
+    def _load_all(self, db: Session, name: str) -> List[Dict]:
+        model, key_field, _ = ENTITIES[name]
+        rows = {}
+        for obj in db.query(model):
+            row = _snapshot(name, obj)
+            if row[key_field] is not None:
+                rows[row[key_field]] = row
+
+        if self.enabled:
+            with self._lock:
+                self._rows[name] = rows
+                self._complete.add(name)
+                self._loaded_at[name] = time.monotonic()
+
+        return list(rows.values())
+
+    def _load_one(self, db: Session, name: str, key) -> Optional[Dict]:
+        model, key_field, _ = ENTITIES[name]
+        obj = db.query(model).filter(getattr(model, key_field) == key).first()
+        return _snapshot(name, obj) if obj is not None else None
+
+    # =============== O'QISH ===============
+    def get(self, name: str, key, db: Optional[Session] = None) -> Optional[Dict]:
+        """
+        Bitta yozuvni olish
+
+        Entity to'liq yuklangan bo'lsa, javob faqat xotiradan beriladi
+        (barcha yozishlar keshdan o'tadi). Aks holda bazadan o'qib, keshga qo'yiladi.
+        """
+        if key is None:
+            return None
+
+        with self._lock:
+            self._expire(name)
+            row = self._rows[name].get(key)
+            if row is not None or name in self._complete:
+                self._hits[name] += 1
+                return row
+            self._misses[name] += 1
+
+        if db is not None:
+            row = self._load_one(db, name, key)
+        else:
+            with get_db_session() as session:
+                row = self._load_one(session, name, key)
+
+        if row is not None and self.enabled:
+            with self._lock:
+                if not self._rows[name]:
+                    self._loaded_at[name] = time.monotonic()
+                self._rows[name][key] = row
+
+        return row
+
+    def all(self, name: str, db: Optional[Session] = None) -> List[Dict]:
+        """Entity ning barcha yozuvlari"""
+        with self._lock:
+            self._expire(name)
+            if name in self._complete:
+                self._hits[name] += 1
+                return list(self._rows[name].values())
+            self._misses[name] += 1
+
+        if db is not None:
+            return self._load_all(db, name)
+
+        with get_db_session() as session:
+            return self._load_all(session, name)
+
+    def version(self, name: str) -> int:
+        """Entity versiyasi - har bir o'zgarishda oshadi"""
+        return self._versions[name]
+
+    # =============== YOZISH ===============
+    def store(self, name: str, row: Dict):
+        """O'zgargan yozuvni keshga yozish (write-through)"""
+        _, key_field, _ = ENTITIES[name]
+        key = row.get(key_field)
+
+        with self._lock:
+            rows = self._rows[name]
+
+            # Kalit maydoni o'zgargan bo'lsa eski yozuvni olib tashlash
+            if key_field != "id":
+                for old_key, old_row in list(rows.items()):
+                    if old_row.get("id") == row.get("id") and old_key != key:
+                        del rows[old_key]
+
+            if key is not None and self.enabled:
+                rows[key] = row
+            self._versions[name] += 1
+
+    def evict(self, name: str, key=None, record_id: Optional[int] = None):
+        """
+        Yozuvni keshdan o'chirish
+
+        Args:
+            key: Kalit bo'yicha o'chirish (None bo'lsa - butun entity)
+            record_id: Kalit noma'lum bo'lsa, id bo'yicha o'chirish
+        """
+        with self._lock:
+            rows = self._rows[name]
+            if key is None and record_id is None:
+                rows.clear()
+                self._complete.discard(name)
+            elif key is not None:
+                rows.pop(key, None)
+            else:
+                for old_key, old_row in list(rows.items()):
+                    if old_row.get("id") == record_id:
+                        del rows[old_key]
+            self._versions[name] += 1
+
+    def refresh(self, name: str, key, db: Optional[Session] = None) -> Optional[Dict]:
+        """ORM dan tashqarida (sqlite3 orqali) o'zgargan yozuvni qayta o'qish"""
+        if db is not None:
+            row = self._load_one(db, name, key)
+        else:
+            with get_db_session() as session:
+                row = self._load_one(session, name, key)
+
+        if row is None:
+            self.evict(name, key)
+        else:
+            self.store(name, row)
+        return row
+
+    # =============== STATISTIKA ===============
+    def stats(self) -> Dict[str, Dict]:
+        """Har bir entity uchun hit/miss hisoblagichlari"""
+        with self._lock:
+            result = {}
+            for name in ENTITIES:
+                hits, misses = self._hits[name], self._misses[name]
+                result[name] = {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                    'size': len(self._rows[name]),
+                    'version': self._versions[name],
+                    'complete': name in self._complete
+                }
+            return result
+
+reference_cache = ReferenceCache()
+
+# =============== ORM HODISALARI ===============
+# CRUD funksiyalari va handlerlardagi barcha ORM yozishlari commit bo'lganda keshga yoziladi
+_PENDING_KEY = "reference_cache_pending"
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_reference_changes(session: Session, flush_context):
+    pending: List[Tuple[str, Optional[Dict], Optional[int]]] = session.info.setdefault(_PENDING_KEY, [])
+
+    for obj in session.new.union(session.dirty):
+        name = _entity_of(obj)
+        if name is not None:
+            pending.append((name, _snapshot(name, obj), None))
+
+    for obj in session.deleted:
+        name = _entity_of(obj)
+        if name is not None:
+            pending.append((name, None, obj.id))
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_reference_changes(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    for name, row, record_id in pending:
+        if row is None:
+            reference_cache.evict(name, record_id=record_id)
+        else:
+            reference_cache.store(name, row)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_reference_changes(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,143 @@
+"""
+Xom ashyo qoldig'ini kuzatish - yetarli bo'lmagan materiallar to'plamini
+har bir qoldiq o'zgarishida bosqichma-bosqich yangilash
+"""
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+from .models import SessionLocal
+from .session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+class LowStockTracker:
+    """Yetarli bo'lmagan xom ashyo ID lari (xotirada)"""
+
+    def __init__(self):
+        self._low_ids: Set[int] = set()
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, db: Session):
+        """To'plamni bazadan bir marta to'liq yuklash (ishga tushishda)"""
+        rows = db.query(
+            models.RawMaterial.id,
+            models.RawMaterial.current_stock,
+            models.RawMaterial.min_stock,
+            models.RawMaterial.reorder_point
+        ).all()
+
+        low_ids = {
+            material_id for material_id, current_stock, min_stock, reorder_point in rows
+            if self._is_low(current_stock, min_stock, reorder_point)
+        }
+
+        with self._lock:
+            self._low_ids = low_ids
+            self.loaded = True
+
+        logger.info(f"Low stock tracker loaded: {len(low_ids)} of {len(rows)} materials")
+
+    @staticmethod
+    def _is_low(current_stock: Optional[float], min_stock: Optional[float],
+                reorder_point: Optional[float] = None) -> bool:
+        """Prognoz bo'lsa qayta buyurtma nuqtasi, aks holda min_stock bilan solishtirish"""
+        threshold = reorder_point if reorder_point is not None else (min_stock or 0)
+        return (current_stock or 0) <= threshold
+
+    def evaluate(self, material_id: int, current_stock: Optional[float],
+                 min_stock: Optional[float], reorder_point: Optional[float] = None) -> bool:
+        """
+        Bitta material uchun chegarani tekshirish
+
+        Returns:
+            bool: Material endi yetarli emas holatiga o'tgan bo'lsa True
+        """
+        is_low = self._is_low(current_stock, min_stock, reorder_point)
+
+        with self._lock:
+            was_low = material_id in self._low_ids
+            if is_low:
+                self._low_ids.add(material_id)
+            else:
+                self._low_ids.discard(material_id)
+
+        return is_low and not was_low
+
+    def discard(self, material_id: int):
+        """O'chirilgan materialni to'plamdan olib tashlash"""
+        with self._lock:
+            self._low_ids.discard(material_id)
+
+    @property
+    def ids(self) -> Set[int]:
+        with self._lock:
+            return set(self._low_ids)
+
+    @property
+    def count(self) -> int:
+        return len(self._low_ids)
+
+    def is_low(self, material_id: int) -> bool:
+        return material_id in self._low_ids
+
+low_stock_tracker = LowStockTracker()
+
+# =============== FON VAZIFASI ===============
+def _reload_low_stock():
+    with get_db_session() as db:
+        low_stock_tracker.load(db)
+
+async def low_stock_resync_task(interval: float):
+    """
+    To'plamni muntazam qayta yuklash (har bir worker jarayonida)
+
+    ORM hodisalari faqat o'z jarayonidagi yozishlarni ko'radi - boshqa worker
+    o'zgartirgan qoldiqlar shu yo'l bilan olinadi.
+    """
+    while True:
+        try:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(_reload_low_stock)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in low stock resync task: {e}")
+
+# =============== ORM HODISALARI ===============
+# Flush paytida o'zgargan materiallar yig'iladi, commit bo'lganda to'plamga qo'llanadi
+_PENDING_KEY = "low_stock_pending"
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_stock_changes(session: Session, flush_context):
+    pending: Dict[int, Optional[Tuple]] = session.info.setdefault(_PENDING_KEY, {})
+
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, models.RawMaterial) and obj.id is not None:
+            pending[obj.id] = (obj.current_stock, obj.min_stock, obj.reorder_point)
+
+    for obj in session.deleted:
+        if isinstance(obj, models.RawMaterial) and obj.id is not None:
+            pending[obj.id] = None
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_stock_changes(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    for material_id, values in pending.items():
+        if values is None:
+            low_stock_tracker.discard(material_id)
+        else:
+            low_stock_tracker.evaluate(material_id, *values)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_stock_changes(session: Session):
+    session.info.pop(_PENDING_KEY, None)
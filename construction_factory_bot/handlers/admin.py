@@ -6,16 +6,28 @@ from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardRemove
 from datetime import datetime, timedelta
+import asyncio
 import logging
 
 from database.session import get_db_session
 from database import crud, models
+from database.reference_cache import reference_cache
+from database.query_profiler import query_profiler
+from database.audit import audit_writer
+from utils.metrics import metrics_registry
+from utils.backup import create_backup
 from keyboards.admin_menu import get_admin_menu, get_admin_dashboard_keyboard
 from keyboards.main_menu import get_main_menu
-from config import ADMIN_IDS, MAIN_ADMIN_ID
+from config import ADMIN_IDS, MAIN_ADMIN_ID, AUDIT_SETTINGS, LIMITS, EXCEL_REPORTS_DIR
+from utils.lazy import lazy_import
 
 logger = logging.getLogger(__name__)
 
+# numpy birinchi simulyatsiyada yuklanadi
+build_plan, run_simulation, parse_plan_text = lazy_import(
+    "utils.simulation", "build_plan", "run_simulation", "parse_plan_text"
+)
+
 # =============== ADMIN STATES ===============
 class AdminStates(StatesGroup):
     # User Management
@@ -37,6 +49,9 @@ class AdminStates(StatesGroup):
     # Database Management
     waiting_db_action = State()
     waiting_db_confirm = State()
+    
+    # Production Simulation
+    waiting_simulation_plan = State()
 
 # =============== ADMIN COMMANDS ===============
 async def admin_panel(message: types.Message):
@@ -152,7 +167,6 @@ async def process_admin_name(message: types.Message, state: FSMContext):
             
             # Tizim logiga yozish
             crud.create_system_log(
-                db,
                 user_id=message.from_user.id,
                 user_name=message.from_user.full_name,
                 action=f"Yangi admin qo'shildi: {admin_name} (ID: {admin_id})",
@@ -180,7 +194,6 @@ async def process_admin_name(message: types.Message, state: FSMContext):
             
             # Tizim logiga yozish
             crud.create_system_log(
-                db,
                 user_id=message.from_user.id,
                 user_name=message.from_user.full_name,
                 action=f"Yangi admin xodim yaratildi: {admin_name}",
@@ -288,47 +301,44 @@ async def perform_backup(callback_query: types.CallbackQuery):
     
     await callback_query.answer()
     
+    await callback_query.message.answer("⏳ Backup olinmoqda...")
+    
     try:
-        import shutil
-        import os
-        from datetime import datetime
+        # Snapshot, siqish va checksum alohida threadda - bot ishlashda davom etadi
+        # Qo'lda olingan backup har doim to'liq (yangi inkremental zanjir boshlanadi)
+        result = await create_backup(full=True)
         
-        # Backup papkasini yaratish
-        backup_dir = "backups"
-        os.makedirs(backup_dir, exist_ok=True)
-        
-        # Backup fayl nomi
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = f"{backup_dir}/backup_{timestamp}.db"
+        await callback_query.message.answer(
+            f"✅ **BACKUP MUVAFFAQIYATLI BAJARILDI!**\n\n"
+            f"📁 Fayl: `{result.path.name}`\n"
+            f"📦 Hajmi: {result.size / 1024 / 1024:.2f} MB\n"
+            f"🔐 SHA-256: `{result.checksum[:16]}`\n"
+            f"⏱️ Davomiyligi: {result.duration:.1f} s\n"
+            f"📅 Sana: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            f"💾 Backup faylini xavfsiz joyda saqlang.",
+            parse_mode="Markdown"
+        )
         
-        # SQLite database ni nusxalash (PostgreSQL uchun alohida)
-        if os.path.exists("construction.db"):
-            shutil.copy2("construction.db", backup_file)
-            backup_size = os.path.getsize(backup_file) / 1024 / 1024  # MB da
-            
-            await callback_query.message.answer(
-                f"✅ **BACKUP MUVAFFAQIYATLI BAJARILDI!**\n\n"
-                f"📁 Fayl: `{backup_file}`\n"
-                f"📦 Hajmi: {backup_size:.2f} MB\n"
-                f"📅 Sana: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                f"💾 Backup faylini xavfsiz joyda saqlang.",
-                parse_mode="Markdown"
-            )
-            
-            # Tizim logiga yozish
-            with get_db_session() as db:
-                crud.create_system_log(
-                    db,
-                    user_id=callback_query.from_user.id,
-                    user_name=callback_query.from_user.full_name,
-                    action=f"Database backup olindi: {backup_file}",
-                    module="admin"
-                )
-        else:
-            await callback_query.message.answer("❌ Database fayli topilmadi!")
+        # Tizim logiga yozish
+        crud.create_system_log(
+            user_id=callback_query.from_user.id,
+            user_name=callback_query.from_user.full_name,
+            action=f"Database backup olindi: {result.path.name}",
+            module="admin",
+            category="backup"
+        )
     
     except Exception as e:
         logger.error(f"Backup error: {e}")
+        crud.create_system_log(
+            user_id=callback_query.from_user.id,
+            user_name=callback_query.from_user.full_name,
+            action="Backup xatoligi",
+            module="admin",
+            details=str(e),
+            level="error",
+            category="backup"
+        )
         await callback_query.message.answer(f"❌ Backup jarayonida xatolik: {str(e)}")
 
 # =============== AUDIT LOGS ===============
@@ -338,6 +348,9 @@ async def view_audit_logs(message: types.Message):
     if message.from_user.id not in ADMIN_IDS:
         return
     
+    # Buferdagi yozuvlar ham ko'rinishi uchun (INSERT event loop dan tashqarida)
+    await asyncio.to_thread(audit_writer.flush)
+    
     with get_db_session() as db:
         # Oxirgi 20 ta logni olish
         logs = db.query(models.SystemLog).order_by(
@@ -408,8 +421,15 @@ async def system_statistics(message: types.Message):
         # Loglar statistikasi
         today = datetime.utcnow().date()
         todays_logs = db.query(models.SystemLog).filter(
-            func.date(models.SystemLog.created_at) == today
-        ).count()
+            models.SystemLog.created_at >= datetime.combine(today, datetime.min.time())
+        ).count() + audit_writer.pending
+    
+    cache_stats = reference_cache.stats()
+    cache_text = "\n".join(
+        f"├ {name}: {item['size']} ta, hit {item['hit_rate']*100:.0f}% "
+        f"({item['hits']}/{item['hits'] + item['misses']})"
+        for name, item in cache_stats.items()
+    )
     
     stats_text = f"""
 📊 **TIZIM STATISTIKASI**
@@ -435,6 +455,9 @@ async def system_statistics(message: types.Message):
 
 📝 **Faollik:**
 └ Bugungi loglar: {todays_logs} ta
+
+🗂️ **Ma'lumotnoma keshi:**
+{cache_text}
 """
     
     keyboard = InlineKeyboardMarkup(row_width=2)
@@ -447,6 +470,161 @@ async def system_statistics(message: types.Message):
     
     await message.answer(stats_text, reply_markup=keyboard, parse_mode="Markdown")
 
+# =============== METRIKALAR ===============
+async def show_metrics(message: types.Message):
+    """Eng sekin handlerlar va Telegram API kechikishi (joriy jarayon)"""
+    
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    
+    summary = metrics_registry.summary(limit=10)
+    
+    metrics_text = (
+        f"📈 **METRIKALAR** (worker {metrics_registry.worker})\n\n"
+        f"⏳ Hozir qayta ishlanmoqda: {summary['in_flight']} ta update\n\n"
+        f"🐢 **Eng sekin handlerlar (p95):**\n"
+    )
+    
+    if not summary['handlers']:
+        metrics_text += "└ Hali ma'lumot yo'q\n"
+    
+    for item in summary['handlers']:
+        metrics_text += (
+            f"├ `{item['handler']}` - {item['count']} ta, "
+            f"p50 {item['p50'] * 1000:.0f} ms, p95 {item['p95'] * 1000:.0f} ms, "
+            f"DB {item['db_time'] * 1000:.0f} ms / {item['db_queries']:.1f} so'rov, "
+            f"API {item['api_time'] * 1000:.0f} ms / {item['api_calls']:.1f} chaqiruv\n"
+        )
+    
+    if summary['api']:
+        metrics_text += "\n📡 **Telegram API (p95):**\n"
+        for item in summary['api']:
+            metrics_text += f"├ `{item['method']}` - {item['count']} ta, {item['p95'] * 1000:.0f} ms\n"
+    
+    await message.answer(metrics_text, parse_mode="Markdown")
+
+async def show_sql_profile(message: types.Message):
+    """Eng ko'p vaqt olgan SQL so'rovlar (/sqlprofile, /sqlprofile reset)"""
+    
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    
+    if not query_profiler.enabled:
+        await message.answer("⚠️ SQL profiler o'chiq. Yoqish uchun: `SQL_PROFILER=1`", parse_mode="Markdown")
+        return
+    
+    if message.get_args() == "reset":
+        query_profiler.reset()
+        await message.answer("✅ SQL profiler statistikasi tozalandi")
+        return
+    
+    rows = query_profiler.report(limit=10)
+    if not rows:
+        await message.answer("📭 Hali so'rovlar qayd etilmagan")
+        return
+    
+    profile_text = "🗄️ **SQL PROFILER** (umumiy vaqt bo'yicha)\n\n"
+    for i, row in enumerate(rows, 1):
+        profile_text += (
+            f"{i}. {row['count']} ta, jami {row['total'] * 1000:.0f} ms, "
+            f"o'rtacha {row['mean'] * 1000:.1f} ms, p95 {row['p95'] * 1000:.1f} ms\n"
+            f"`{row['fingerprint'][:150].replace('`', '')}`\n\n"
+        )
+    
+    await message.answer(profile_text, parse_mode="Markdown")
+
+# =============== PRODUCTION SIMULATION ===============
+async def production_simulation_start(message: types.Message):
+    """Ishlab chiqarish rejasi simulyatsiyasini boshlash"""
+    
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    
+    with get_db_session() as db:
+        products = db.query(models.Product).filter(models.Product.is_active == True).all()
+    
+    if not products:
+        await message.answer("❌ Faol mahsulotlar mavjud emas.")
+        return
+    
+    products_text = "\n".join(f"• `{p.id}` - {p.name} ({p.unit})" for p in products)
+    
+    await message.answer(
+        "🎲 **ISHLAB CHIQARISH SIMULYATSIYASI**\n\n"
+        "Chiqindi, narx va talab o'zgarishlari bo'yicha minglab ssenariylar hisoblanadi.\n\n"
+        f"📦 **Mahsulotlar:**\n{products_text}\n\n"
+        "Rejani `mahsulot_id:miqdor` ko'rinishida kiriting.\n"
+        "Masalan: `1:500, 3:2000`",
+        parse_mode="Markdown"
+    )
+    await AdminStates.waiting_simulation_plan.set()
+
+async def process_simulation_plan(message: types.Message, state: FSMContext):
+    """Simulyatsiya rejasini qabul qilish va natijani ko'rsatish"""
+    
+    try:
+        plan = parse_plan_text(message.text)
+    except ValueError:
+        await message.answer("❌ Noto'g'ri format. Masalan: `1:500, 3:2000`", parse_mode="Markdown")
+        return
+    
+    await message.answer("⏳ Simulyatsiya bajarilmoqda...")
+    
+    try:
+        with get_db_session() as db:
+            plan_data = build_plan(db, plan)
+        
+        # CPU og'ir hisob - event loop ni bloklamaslik uchun alohida threadda
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, run_simulation, plan_data)
+    
+    except ValueError as e:
+        await message.answer(f"❌ {e}")
+        await state.finish()
+        return
+    except Exception as e:
+        logger.error(f"Simulation error: {e}")
+        crud.create_system_log(
+            user_id=message.from_user.id,
+            user_name=message.from_user.full_name,
+            action="Simulyatsiya xatoligi",
+            module="admin",
+            details=str(e),
+            level="error",
+            category="simulation"
+        )
+        await message.answer(f"❌ Simulyatsiyada xatolik: {str(e)}")
+        await state.finish()
+        return
+    
+    low, mid, high = result['percentiles']
+    profit = result['profit']
+    
+    result_text = (
+        f"🎲 **SIMULYATSIYA NATIJALARI**\n\n"
+        f"🔢 Ssenariylar: {result['scenarios']:,} ta ({result['workers']} jarayon)\n\n"
+        f"💰 **Foyda:**\n"
+        f"├ P{low}: {profit[low]:,.0f} so'm\n"
+        f"├ P{mid}: {profit[mid]:,.0f} so'm\n"
+        f"├ P{high}: {profit[high]:,.0f} so'm\n"
+        f"└ Zarar ehtimoli: {result['loss_probability'] * 100:.1f}%\n\n"
+        f"📦 **Xom ashyo tanqisligi:** {result['stockout_probability'] * 100:.1f}%\n"
+    )
+    
+    for material in result['materials']:
+        if material['stockout_probability'] > 0:
+            result_text += (
+                f"├ {material['name']}: {material['stockout_probability'] * 100:.1f}% "
+                f"(P{high} kamomad: {material['shortfall'][high]:,.1f} {material['unit']})\n"
+            )
+    
+    result_text += "\n📈 **Qondirilmagan talab:**\n"
+    for product in result['products']:
+        result_text += f"├ {product['name']}: P{mid} {product['unmet_demand'][mid]:,.0f}, P{high} {product['unmet_demand'][high]:,.0f}\n"
+    
+    await message.answer(result_text, parse_mode="Markdown")
+    await state.finish()
+
 # =============== CALLBACK HANDLERS ===============
 async def admin_callback_handler(callback_query: types.CallbackQuery, state: FSMContext):
     """Admin callback handler"""
@@ -522,6 +700,15 @@ def register_handlers_admin(dp: Dispatcher):
                                lambda msg: msg.text == "💾 Backup olish", 
                                state="*")
     
+    # Metrics
+    dp.register_message_handler(show_metrics, commands=['metrics'], state="*")
+    dp.register_message_handler(show_sql_profile, commands=['sqlprofile'], state="*")
+    
+    # Production simulation
+    dp.register_message_handler(production_simulation_start, 
+                               lambda msg: msg.text == "🎲 Simulyatsiya", 
+                               state="*")
+    
     # Callback handlers
     dp.register_callback_query_handler(admin_callback_handler, 
                                       lambda c: c.data.startswith('admin_') or 
@@ -534,6 +721,7 @@ def register_handlers_admin(dp: Dispatcher):
     # Admin state handlers
     dp.register_message_handler(process_new_admin_id, state=AdminStates.waiting_new_admin_id)
     dp.register_message_handler(process_admin_name, state=AdminStates.waiting_admin_name)
+    dp.register_message_handler(process_simulation_plan, state=AdminStates.waiting_simulation_plan)
 
 # =============== YORDAMCHI FUNKSIYALAR ===============
 async def detailed_statistics(message: types.Message):
@@ -579,43 +767,61 @@ async def detailed_statistics(message: types.Message):
     
     await message.answer(detailed_text, parse_mode="Markdown")
 
-async def view_full_logs(message: types.Message):
-    """To'liq audit loglari"""
+def export_audit_logs(filepath) -> int:
+    """
+    Oxirgi export_days kunlik loglarni Excel ga yozish (sinxron - alohida threadda chaqiriladi)
+
+    Returns:
+        int: Yozilgan qatorlar soni (0 bo'lsa fayl saqlanmaydi)
+    """
+    audit_writer.flush()
+    since = datetime.utcnow() - timedelta(days=AUDIT_SETTINGS['export_days'])
+    
+    # Butun jadvalni xotiraga yuklamaslik uchun write_only kitob va yield_per
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Audit")
+    sheet.append(['Sana', 'Daraja', 'Turkum', 'Foydalanuvchi', 'Amal', 'Modul', 'Tafsilot', 'IP'])
     
+    table = models.SystemLog
+    row_count = 0
     with get_db_session() as db:
-        logs = db.query(models.SystemLog).order_by(
-            models.SystemLog.created_at.desc()
-        ).all()
+        rows = db.query(
+            table.created_at, table.level, table.category, table.user_name,
+            table.action, table.module, table.details, table.ip_address
+        ).filter(table.created_at >= since).order_by(table.created_at.desc()).limit(
+            LIMITS['max_excel_rows']
+        ).yield_per(1000)
+        
+        for created_at, level, category, user_name, action, module, details, ip_address in rows:
+            sheet.append([
+                created_at.strftime('%Y-%m-%d %H:%M'), level, category or '', user_name or 'Tizim',
+                action, module, details or '', ip_address or ''
+            ])
+            row_count += 1
+    
+    if row_count:
+        workbook.save(filepath)
+    return row_count
+
+async def view_full_logs(message: types.Message):
+    """To'liq audit loglari (oxirgi export_days kun, Excel ga oqim bilan yoziladi)"""
     
-    if not logs:
-        await message.answer("❌ Hech qanday log mavjud emas.")
+    if message.chat.id not in ADMIN_IDS:
         return
     
-    # Excel hisobot yaratish
-    import pandas as pd
-    from datetime import datetime
-    
-    log_data = []
-    for log in logs:
-        log_data.append({
-            'Sana': log.created_at.strftime('%Y-%m-%d %H:%M'),
-            'Foydalanuvchi': log.user_name or 'Tizim',
-            'Amal': log.action,
-            'Modul': log.module,
-            'Tafsilot': log.details or '',
-            'IP': log.ip_address or ''
-        })
-    
-    df = pd.DataFrame(log_data)
-    
-    # Excel fayl yaratish
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"audit_logs_{timestamp}.xlsx"
-    filepath = f"reports/excel/{filename}"
+    filepath = EXCEL_REPORTS_DIR / f"audit_logs_{timestamp}.xlsx"
+    
+    # So'rov, kitob yaratish va saqlash event loop ni to'xtatmasligi uchun alohida threadda
+    row_count = await asyncio.to_thread(export_audit_logs, filepath)
     
-    df.to_excel(filepath, index=False)
+    if not row_count:
+        await message.answer("❌ Hech qanday log mavjud emas.")
+        return
     
     await message.answer_document(
-        document=types.InputFile(filepath),
-        caption=f"📋 To'liq audit loglari ({len(logs)} ta yozuv)"
+        document=types.InputFile(str(filepath)),
+        caption=f"📋 Audit loglari - oxirgi {AUDIT_SETTINGS['export_days']} kun ({row_count} ta yozuv)"
     )
\ No newline at end of file
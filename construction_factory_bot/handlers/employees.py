@@ -14,11 +14,14 @@ from database import crud, models
 from keyboards.main_menu import get_main_menu
 from keyboards.admin_menu import get_employee_management_menu, get_employee_actions_keyboard
 from config import EMPLOYEE_POSITIONS, ADMIN_IDS
-from utils.excel_reports import create_employee_excel_report
-from utils.charts import create_employee_chart
+from utils.lazy import lazy_import
 
 logger = logging.getLogger(__name__)
 
+# Og'ir kutubxonalar (pandas, openpyxl, matplotlib) birinchi ishlatilganda yuklanadi
+create_employee_excel_report, = lazy_import("utils.excel_reports", "create_employee_excel_report")
+create_employee_chart, = lazy_import("utils.charts", "create_employee_chart")
+
 # =============== EMPLOYEE STATES ===============
 class EmployeeStates(StatesGroup):
     # Add Employee
@@ -274,7 +277,6 @@ async def confirm_add_employee(callback_query: types.CallbackQuery, state: FSMCo
             
             # Tizim logiga yozish
             crud.create_system_log(
-                db,
                 user_id=callback_query.from_user.id,
                 user_name=callback_query.from_user.full_name,
                 action=f"Yangi xodim qo'shildi: {data['full_name']}",
@@ -628,7 +630,6 @@ async def save_work_hours(callback_query: types.CallbackQuery, state: FSMContext
             
             # Tizim logiga yozish
             crud.create_system_log(
-                db,
                 user_id=callback_query.from_user.id,
                 user_name=callback_query.from_user.full_name,
                 action=f"Ish vaqti kiritildi: {data['employee_name']} - {work_date}",
@@ -856,7 +857,6 @@ async def confirm_salary_payment(callback_query: types.CallbackQuery, state: FSM
             
             # Tizim logiga yozish
             crud.create_system_log(
-                db,
                 user_id=callback_query.from_user.id,
                 user_name=callback_query.from_user.full_name,
                 action=f"Maosh to'lovi: {data['employee_name']} - {data['month']}/{data['year']} - {data['total_amount']:,.0f} so'm",
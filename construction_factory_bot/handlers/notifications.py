@@ -12,6 +12,7 @@ from typing import List, Dict, Any
 
 from database.session import get_db_session
 from database import crud, models
+from database.reference_cache import reference_cache
 from keyboards.main_menu import get_main_menu
 from keyboards.admin_menu import get_notifications_menu
 from config import ADMIN_IDS, NOTIFICATION_TYPES
@@ -355,7 +356,6 @@ async def save_notification(callback_query: types.CallbackQuery, state: FSMConte
             
             # Tizim logiga yozish
             crud.create_system_log(
-                db,
                 user_id=callback_query.from_user.id,
                 user_name=callback_query.from_user.full_name,
                 action=f"Yangi bildirishnoma yaratildi: {data['title']}",
@@ -469,6 +469,12 @@ async def send_notification_now(notification_id: int, message: types.Message = N
         
         except Exception as e:
             logger.error(f"Error sending notification: {e}")
+            crud.create_system_log(
+                action=f"Bildirishnoma #{notification_id} yuborilmadi",
+                module="notifications",
+                details=str(e),
+                level="error"
+            )
             if message:
                 await message.answer(f"❌ Bildirishnoma yuborishda xatolik: {str(e)}")
 
@@ -548,7 +554,15 @@ def get_recipient_name(recipient_id: int) -> str:
         -4: "💰 Buxgalteriya"
     }
     
-    return recipient_map.get(recipient_id, f"👤 ID:{recipient_id}")
+    if recipient_id in recipient_map:
+        return recipient_map[recipient_id]
+    
+    # Xodim nomini ma'lumotnoma keshidan olish
+    employee = reference_cache.get("employees", recipient_id)
+    if employee:
+        return f"👤 {employee['full_name']}"
+    
+    return f"👤 ID:{recipient_id}"
 
 # =============== AUTO NOTIFICATIONS ===============
 async def auto_notifications(message: types.Message):
@@ -4,6 +4,7 @@ from aiogram.dispatcher.filters.state import State, StatesGroup
 from aiogram.types import ReplyKeyboardRemove
 
 from database.db import db
+from database.reference_cache import reference_cache
 from keyboards.main_menu import get_main_menu, get_production_menu, get_products_keyboard
 import logging
 
@@ -20,7 +21,8 @@ async def production_menu(message: types.Message):
 
 async def new_production_order(message: types.Message):
     """Yangi ishlab chiqarish buyurtmasi"""
-    await message.answer("Mahsulot turini tanlang:", reply_markup=get_products_keyboard())
+    products = [p for p in reference_cache.all("products") if p['is_active'] is not False]
+    await message.answer("Mahsulot turini tanlang:", reply_markup=get_products_keyboard(products))
     await ProductionStates.waiting_product_selection.set()
 
 async def process_product_selection(callback_query: types.CallbackQuery, state: FSMContext):
@@ -29,29 +31,15 @@ async def process_product_selection(callback_query: types.CallbackQuery, state:
     
     product_code = callback_query.data.replace("product_", "")
     
-    # Product code bo'yicha product_id ni olish
-    product_map = {
-        "sement": "Sement M500 (50kg)",
-        "rodbin": "Rodbin 12mm",
-        "kafel": "Kafel 30x30",
-        "nalinoy_pol": "Nalinoy pol",
-        "gips": "Gips",
-        "keramika": "Keramika plitka"
-    }
-    
-    if product_code in product_map:
-        product_name = product_map[product_code]
-        
-        # Ma'lumotlar bazasidan product_id ni olish
-        db.cursor.execute('SELECT id FROM products WHERE name = ?', (product_name,))
-        result = db.cursor.fetchone()
+    if product_code.isdigit():
+        # Mahsulotni ma'lumotnoma keshidan olish
+        product = reference_cache.get("products", int(product_code))
         
-        if result:
-            product_id = result[0]
-            await state.update_data(product_id=product_id, product_name=product_name)
+        if product:
+            await state.update_data(product_id=product['id'], product_name=product['name'])
             
             await callback_query.message.answer(
-                f"✅ Tanlangan mahsulot: {product_name}\n\n"
+                f"✅ Tanlangan mahsulot: {product['name']}\n\n"
                 f"📦 Necha birlik ishlab chiqarmoqchisiz?",
                 reply_markup=ReplyKeyboardRemove()
             )
@@ -6,17 +6,26 @@ from aiogram.types import InputFile
 from database.session import get_db_session
 from database import crud
 from keyboards.main_menu import get_report_period_keyboard, get_main_menu
-from utils.excel_reports import (
-    create_warehouse_excel_report,
-    create_financial_excel_report,
-    create_employee_report
+from utils.lazy import lazy_import
+
+# pandas, openpyxl va matplotlib birinchi hisobotda yuklanadi (ishga tushish tezligi uchun)
+create_excel_report, create_warehouse_excel_report, create_financial_excel_report, create_employee_report = lazy_import(
+    "utils.excel_reports",
+    "create_excel_report", "create_warehouse_excel_report", "create_financial_excel_report", "create_employee_report"
 )
-from utils.charts import (
-    create_stock_chart,
-    create_production_chart,
-    create_financial_chart,
-    create_employee_chart
+create_stock_chart, create_production_chart, create_financial_chart, create_employee_chart = lazy_import(
+    "utils.charts",
+    "create_stock_chart", "create_production_chart", "create_financial_chart", "create_employee_chart"
 )
+from database.data_version import data_version
+from utils.single_flight import SingleFlight
+from config import REPORT_SETTINGS
+from sqlalchemy import func
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import asyncio
+import contextvars
 import os
 from datetime import datetime, timedelta, date
 import logging
@@ -66,6 +75,109 @@ async def handle_report_selection(message: types.Message, state: FSMContext):
     else:
         await message.answer("Noto'g'ri tanlov. Iltimos, tugmalardan foydalaning.")
 
+# =============== HISOBOT NATIJASI ===============
+@dataclass
+class ReportFile:
+    """Hisobot fayli (birinchi yuborilgandan keyin Telegram file_id qayta ishlatiladi)"""
+    path: str
+    filename: str
+    caption: str
+    kind: str = "document"  # document, photo
+    file_id: Optional[str] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+@dataclass
+class ReportResult:
+    """Tayyor hisobot - bir nechta foydalanuvchiga yuborilishi mumkin"""
+    text: str
+    files: List[ReportFile] = field(default_factory=list)
+    parse_mode: Optional[str] = "Markdown"
+
+# Grafiklar pyplot global holatidan foydalanadi - hisobotlar bitta alohida threadda quriladi
+report_executor = ThreadPoolExecutor(max_workers=REPORT_SETTINGS['builder_threads'], thread_name_prefix="report")
+report_flight = SingleFlight(share_seconds=REPORT_SETTINGS['share_seconds'])
+
+def get_report_period(period: str) -> Tuple[date, date, str]:
+    """Davr kodidan (boshlanish, tugash, nomi)"""
+    
+    end_date = date.today()
+    
+    if period == "daily":
+        return end_date, end_date, "kunlik"
+    elif period == "weekly":
+        return end_date - timedelta(days=7), end_date, "haftalik"
+    elif period == "monthly":
+        return end_date.replace(day=1), end_date, "oylik"
+    elif period == "quarterly":
+        quarter = (end_date.month - 1) // 3 + 1
+        start_month = (quarter - 1) * 3 + 1
+        return end_date.replace(month=start_month, day=1), end_date, "choraklik"
+    elif period == "yearly":
+        return end_date.replace(month=1, day=1), end_date, "yillik"
+    
+    return end_date - timedelta(days=30), end_date, "30 kunlik"
+
+def build_report(report_type: str, period: str) -> Optional[ReportResult]:
+    """Hisobotni qurish (sinxron, report_executor da bajariladi)"""
+    
+    start_date, end_date, period_text = get_report_period(period)
+    
+    with get_db_session() as db:
+        if report_type == "warehouse":
+            return build_warehouse_report(db, period_text)
+        elif report_type == "production":
+            return build_production_report(db, start_date, end_date, period_text)
+        elif report_type == "financial":
+            return build_financial_report(db, start_date, end_date, period_text)
+        elif report_type == "employee":
+            return build_employee_report(db, start_date, end_date, period_text)
+        elif report_type == "overall":
+            return build_overall_report(db, start_date, end_date, period_text)
+    
+    return None
+
+async def get_report(report_type: str, period: str) -> Tuple[Optional[ReportResult], bool]:
+    """
+    Hisobotni olish - bir xil (tur, davr, sana, ma'lumot versiyasi) uchun
+    parallel so'rovlar bitta hisoblashni kutadi
+    
+    Returns:
+        Tuple: (hisobot, boshqa so'rov bilan bo'lishilganmi)
+    """
+    
+    async def compute():
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(report_executor, context.run, build_report, report_type, period)
+    
+    if not REPORT_SETTINGS['coalesce']:
+        return await compute(), False
+    
+    key = (report_type, period, date.today(), data_version.value)
+    return await report_flight.do(key, compute)
+
+async def send_report(message: types.Message, report: ReportResult):
+    """Hisobotni yuborish (fayl bir marta yuklanadi, keyin file_id bilan)"""
+    
+    await message.answer(report.text, parse_mode=report.parse_mode)
+    
+    for report_file in report.files:
+        async with report_file.lock:
+            if report_file.file_id is None:
+                with open(report_file.path, 'rb') as file:
+                    sent = await _send_file(message, report_file, InputFile(file, filename=report_file.filename))
+                report_file.file_id = (
+                    sent.document.file_id if report_file.kind == "document" else sent.photo[-1].file_id
+                )
+                continue
+        
+        await _send_file(message, report_file, report_file.file_id)
+
+async def _send_file(message: types.Message, report_file: ReportFile, media) -> types.Message:
+    if report_file.kind == "photo":
+        return await message.answer_photo(photo=media, caption=report_file.caption)
+    return await message.answer_document(document=media, caption=report_file.caption)
+
 async def handle_period_selection(callback_query: types.CallbackQuery, state: FSMContext):
     """Hisobot davrini tanlash"""
     
@@ -84,42 +196,12 @@ async def handle_period_selection(callback_query: types.CallbackQuery, state: FS
     await callback_query.message.answer(f"⏳ Hisobot tayyorlanmoqda...")
     
     try:
-        with get_db_session() as db:
-            # Davrni aniqlash
-            end_date = date.today()
-            
-            if period == "daily":
-                start_date = end_date
-                period_text = "kunlik"
-            elif period == "weekly":
-                start_date = end_date - timedelta(days=7)
-                period_text = "haftalik"
-            elif period == "monthly":
-                start_date = end_date.replace(day=1)
-                period_text = "oylik"
-            elif period == "quarterly":
-                quarter = (end_date.month - 1) // 3 + 1
-                start_month = (quarter - 1) * 3 + 1
-                start_date = end_date.replace(month=start_month, day=1)
-                period_text = "choraklik"
-            elif period == "yearly":
-                start_date = end_date.replace(month=1, day=1)
-                period_text = "yillik"
-            else:
-                start_date = end_date - timedelta(days=30)
-                period_text = "30 kunlik"
-            
-            # Hisobotni yaratish
-            if report_type == "warehouse":
-                await generate_warehouse_report(callback_query.message, db, period_text)
-            elif report_type == "production":
-                await generate_production_report(callback_query.message, db, start_date, end_date, period_text)
-            elif report_type == "financial":
-                await generate_financial_report(callback_query.message, db, start_date, end_date, period_text)
-            elif report_type == "employee":
-                await generate_employee_report(callback_query.message, db, start_date, end_date, period_text)
-            elif report_type == "overall":
-                await generate_overall_report(callback_query.message, db, start_date, end_date, period_text)
+        report, shared = await get_report(report_type, period)
+        if shared:
+            logger.info(f"Report {report_type}/{period} shared with user {callback_query.from_user.id}")
+        
+        if report is not None:
+            await send_report(callback_query.message, report)
     
     except Exception as e:
         logger.error(f"Error generating report: {e}")
@@ -128,7 +210,7 @@ async def handle_period_selection(callback_query: types.CallbackQuery, state: FS
     await state.finish()
     await callback_query.message.answer("Hisobotlar menyusiga qaytish uchun '📈 Hisobotlar' tugmasini bosing.")
 
-async def generate_warehouse_report(message: types.Message, db, period_text: str):
+def build_warehouse_report(db, period_text: str) -> ReportResult:
     """Ombor hisobotini yaratish"""
     
     # Xom ashyo ma'lumotlarini olish
@@ -176,7 +258,7 @@ async def generate_warehouse_report(message: types.Message, db, period_text: str
     # 2. Grafik yaratish
     chart_file = create_stock_chart(raw_materials_data)
     
-    # 3. Xabarni yuborish
+    # 3. Xabar matni
     report_text = f"""
 📊 **OMBOR HISOBOTI** ({period_text.upper()})
     
@@ -190,22 +272,12 @@ async def generate_warehouse_report(message: types.Message, db, period_text: str
 • O'rtacha foyda marjasi: {sum(p['profit_margin'] for p in products_data)/len(products_data) if products_data else 0:.1f}%
 """
     
-    await message.answer(report_text, parse_mode="Markdown")
-    
-    # Fayllarni yuborish
-    with open(excel_file, 'rb') as excel:
-        await message.answer_document(
-            document=InputFile(excel, filename=f"ombor_hisoboti_{period_text}.xlsx"),
-            caption="📋 Excel hisobot"
-        )
-    
-    with open(chart_file, 'rb') as chart:
-        await message.answer_photo(
-            photo=InputFile(chart, filename=f"ombor_grafigi_{period_text}.png"),
-            caption="📈 Ombor grafigi"
-        )
+    return ReportResult(report_text, [
+        ReportFile(excel_file, f"ombor_hisoboti_{period_text}.xlsx", "📋 Excel hisobot"),
+        ReportFile(chart_file, f"ombor_grafigi_{period_text}.png", "📈 Ombor grafigi", kind="photo")
+    ])
 
-async def generate_production_report(message: types.Message, db, start_date: date, end_date: date, period_text: str):
+def build_production_report(db, start_date: date, end_date: date, period_text: str) -> ReportResult:
     """Ishlab chiqarish hisobotini yaratish"""
     
     # Ishlab chiqarish buyurtmalarini olish
@@ -215,8 +287,7 @@ async def generate_production_report(message: types.Message, db, start_date: dat
     ).all()
     
     if not orders:
-        await message.answer(f"❌ Tanlangan davrda ishlab chiqarish buyurtmalari topilmadi.")
-        return
+        return ReportResult("❌ Tanlangan davrda ishlab chiqarish buyurtmalari topilmadi.", parse_mode=None)
     
     # Statistikani hisoblash
     total_orders = len(orders)
@@ -248,7 +319,7 @@ async def generate_production_report(message: types.Message, db, start_date: dat
     # 2. Grafik yaratish
     chart_file = create_production_chart(production_data)
     
-    # 3. Xabarni yuborish
+    # 3. Xabar matni
     report_text = f"""
 🏭 **ISHLAB CHIQARISH HISOBOTI** ({period_text.upper()})
     
@@ -265,22 +336,12 @@ async def generate_production_report(message: types.Message, db, start_date: dat
 • O'rtacha foyda marjasi: {total_profit/total_cost*100 if total_cost > 0 else 0:.1f}%
 """
     
-    await message.answer(report_text, parse_mode="Markdown")
-    
-    # Fayllarni yuborish
-    with open(excel_file, 'rb') as excel:
-        await message.answer_document(
-            document=InputFile(excel, filename=f"ishlab_chiqarish_{period_text}.xlsx"),
-            caption="📋 Excel hisobot"
-        )
-    
-    with open(chart_file, 'rb') as chart:
-        await message.answer_photo(
-            photo=InputFile(chart, filename=f"ishlab_chiqarish_{period_text}.png"),
-            caption="📈 Ishlab chiqarish grafigi"
-        )
+    return ReportResult(report_text, [
+        ReportFile(excel_file, f"ishlab_chiqarish_{period_text}.xlsx", "📋 Excel hisobot"),
+        ReportFile(chart_file, f"ishlab_chiqarish_{period_text}.png", "📈 Ishlab chiqarish grafigi", kind="photo")
+    ])
 
-async def generate_financial_report(message: types.Message, db, start_date: date, end_date: date, period_text: str):
+def build_financial_report(db, start_date: date, end_date: date, period_text: str) -> ReportResult:
     """Moliya hisobotini yaratish"""
     
     # Statistikani hisoblash
@@ -300,7 +361,7 @@ async def generate_financial_report(message: types.Message, db, start_date: date
     # 2. Grafik yaratish
     chart_file = create_financial_chart(financial_stats, period_text)
     
-    # 3. Xabarni yuborish
+    # 3. Xabar matni
     report_text = f"""
 💰 **MOLIYA HISOBOTI** ({period_text.upper()})
     
@@ -319,22 +380,12 @@ async def generate_financial_report(message: types.Message, db, start_date: date
 • Foyda marjasi: {financial_stats['profit_margin']:.1f}%
 """
     
-    await message.answer(report_text, parse_mode="Markdown")
-    
-    # Fayllarni yuborish
-    with open(excel_file, 'rb') as excel:
-        await message.answer_document(
-            document=InputFile(excel, filename=f"moliya_{period_text}.xlsx"),
-            caption="📋 Excel hisobot"
-        )
-    
-    with open(chart_file, 'rb') as chart:
-        await message.answer_photo(
-            photo=InputFile(chart, filename=f"moliya_{period_text}.png"),
-            caption="📈 Moliya grafigi"
-        )
+    return ReportResult(report_text, [
+        ReportFile(excel_file, f"moliya_{period_text}.xlsx", "📋 Excel hisobot"),
+        ReportFile(chart_file, f"moliya_{period_text}.png", "📈 Moliya grafigi", kind="photo")
+    ])
 
-async def generate_employee_report(message: types.Message, db, start_date: date, end_date: date, period_text: str):
+def build_employee_report(db, start_date: date, end_date: date, period_text: str) -> ReportResult:
     """Xodimlar hisobotini yaratish"""
     
     # Xodimlarni olish
@@ -343,8 +394,7 @@ async def generate_employee_report(message: types.Message, db, start_date: date,
     ).all()
     
     if not employees:
-        await message.answer("❌ Faol xodimlar topilmadi.")
-        return
+        return ReportResult("❌ Faol xodimlar topilmadi.", parse_mode=None)
     
     employees_data = []
     work_hours_data = {}
@@ -411,7 +461,7 @@ async def generate_employee_report(message: types.Message, db, start_date: date,
     
     chart_file = create_employee_chart(employees_data, chart_data)
     
-    # 3. Xabarni yuborish
+    # 3. Xabar matni
     report_text = f"""
 👥 **XODIMLAR HISOBOTI** ({period_text.upper()})
     
@@ -425,22 +475,12 @@ async def generate_employee_report(message: types.Message, db, start_date: date,
 • Jami qo'shimcha ish: {chart_data['work_hours_stats']['overtime']:.1f} soat
 """
     
-    await message.answer(report_text, parse_mode="Markdown")
-    
-    # Fayllarni yuborish
-    with open(excel_file, 'rb') as excel:
-        await message.answer_document(
-            document=InputFile(excel, filename=f"xodimlar_{period_text}.xlsx"),
-            caption="📋 Excel hisobot"
-        )
-    
-    with open(chart_file, 'rb') as chart:
-        await message.answer_photo(
-            photo=InputFile(chart, filename=f"xodimlar_{period_text}.png"),
-            caption="📈 Xodimlar grafigi"
-        )
+    return ReportResult(report_text, [
+        ReportFile(excel_file, f"xodimlar_{period_text}.xlsx", "📋 Excel hisobot"),
+        ReportFile(chart_file, f"xodimlar_{period_text}.png", "📈 Xodimlar grafigi", kind="photo")
+    ])
 
-async def generate_overall_report(message: types.Message, db, start_date: date, end_date: date, period_text: str):
+def build_overall_report(db, start_date: date, end_date: date, period_text: str) -> ReportResult:
     """Umumiy statistik hisobot"""
     
     # Barcha statistikani yig'ish
@@ -466,11 +506,10 @@ async def generate_overall_report(message: types.Message, db, start_date: date,
         {"Ko'rsatkich": "Maosh xarajatlari", "Qiymat": f"{financial_stats['salary_costs']:,.0f} so'm"},
     ]
     
-    from utils.excel_reports import create_excel_report
     excel_file = create_excel_report(overall_data, 'overall_stats', 
                                     f'Umumiy statistika - {period_text}')
     
-    # Xabarni yuborish
+    # Xabar matni
     report_text = f"""
 📊 **UMUMIY STATISTIKA** ({period_text.upper()})
     
@@ -493,14 +532,9 @@ async def generate_overall_report(message: types.Message, db, start_date: date,
 • Maosh xarajatlari: {financial_stats['salary_costs']:,.0f} so'm
 """
     
-    await message.answer(report_text, parse_mode="Markdown")
-    
-    # Excel faylni yuborish
-    with open(excel_file, 'rb') as excel:
-        await message.answer_document(
-            document=InputFile(excel, filename=f"umumiy_statistika_{period_text}.xlsx"),
-            caption="📋 Umumiy statistika hisoboti"
-        )
+    return ReportResult(report_text, [
+        ReportFile(excel_file, f"umumiy_statistika_{period_text}.xlsx", "📋 Umumiy statistika hisoboti")
+    ])
 
 def register_handlers_reports(dp: Dispatcher):
     """Register reports handlers"""
@@ -32,10 +32,12 @@ from database.crud import (
     get_customer_by_phone,
     create_customer,
     get_sale_by_id,
-    create_sale_item
+    create_sale_item,
+    get_product_stock
 )
 from database.models import Sale, SaleItem, Product, Customer
-from database.session import get_db
+from database.session import get_db, get_db_session
+from database.reference_cache import reference_cache
 from keyboards.inline_keyboards import (
     create_sales_menu_keyboard,
     create_product_selection_keyboard,
@@ -43,11 +45,15 @@ from keyboards.inline_keyboards import (
     create_confirmation_keyboard
 )
 from keyboards.main_menu import get_main_menu
-from utils.excel_reports import generate_sales_report
-from utils.charts import create_sales_chart
+from utils.lazy import lazy_import
 from utils.helpers import format_currency, validate_phone_number
+from utils.sale_cart import PAYMENT_METHODS, SaleCart, SaleState, load_sale_state, save_sale_state
 from utils.notifications import send_sale_notification
 
+# Og'ir kutubxonalar birinchi hisobotda yuklanadi
+generate_sales_report, = lazy_import("utils.excel_reports", "generate_sales_report")
+create_sales_chart, = lazy_import("utils.charts", "create_sales_chart")
+
 # Router yaratish
 sales_router = Router()
 
@@ -85,52 +91,84 @@ async def sales_main_menu(message: Message):
 async def start_new_sale(callback: CallbackQuery, state: FSMContext):
     """Yangi sotuvni boshlash"""
     
-    # Mahsulotlar ro'yxatini olish
-    async with get_db() as db:
-        products = db.query(Product).filter(
-            Product.quantity_available > 0
-        ).all()
-    
-    if not products:
+    # Qoldiqlar sotuv boshida bir marta olinadi, savatga qo'shishda faqat bitta mahsulot qayta tekshiriladi
+    stock = await asyncio.to_thread(available_stock)
+    if not get_products_by_category(stock):
         await callback.message.answer(
             "⚠️ Hozircha sotish uchun mavjud mahsulotlar yo'q.\n"
             "Avval omborda mahsulotlar mavjudligini tekshiring."
         )
         return
     
-    # Mahsulotlarni kategoriyalar bo'yicha guruhlash
-    products_by_category = {}
-    for product in products:
-        category = product.product_type
-        if category not in products_by_category:
-            products_by_category[category] = []
-        products_by_category[category].append(product)
-    
-    # FSM ga ma'lumotlarni saqlash
-    await state.update_data(
-        products_by_category=products_by_category,
-        sale_items=[],
-        current_category_index=0
-    )
+    # FSM ga bo'sh savat bilan yangi holatni saqlash
+    await save_sale_state(state, SaleState(stock=stock))
     
     # Birinchi kategoriyani ko'rsatish
     await show_product_category(callback.message, state)
     
     await callback.answer()
 
+def product_stock(product_id: Optional[int] = None) -> Dict[int, float]:
+    """Mahsulot qoldiqlari bazadan (sinxron - alohida threadda chaqiriladi)"""
+    
+    with get_db_session() as db:
+        return get_product_stock(db, None if product_id is None else [product_id])
+
+def available_stock() -> Dict[int, float]:
+    """Sotuv holatiga yoziladigan qoldiqlar - faqat mavjud mahsulotlar"""
+    
+    return {product_id: stock for product_id, stock in product_stock().items() if stock > 0}
+
+def get_products_by_category(stock: Dict[int, float]) -> Dict[str, List[Dict]]:
+    """
+    Sotuvda mavjud mahsulotlarni kategoriyalar bo'yicha guruhlash
+    
+    Katalog ma'lumotnoma keshidan, qoldiq (quantity_available) - sotuv holatidagi stock dan.
+    """
+    
+    products_by_category = {}
+    for product in reference_cache.all("products"):
+        available = stock.get(product['id'], 0)
+        if available > 0 and product['is_active'] is not False:
+            products_by_category.setdefault(product['category'], []).append(
+                {**product, 'quantity_available': available}
+            )
+    
+    # Kategoriya indeksi barqaror bo'lishi uchun tartiblangan
+    return dict(sorted(products_by_category.items()))
+
+def build_sale_items(cart: SaleCart) -> List[Dict]:
+    """Savat qatorlarini ko'rsatish va chek uchun tayyorlash"""
+    
+    sale_items = []
+    for product_id, quantity, price, total in cart.lines():
+        product = reference_cache.get("products", product_id) or {}
+        sale_items.append({
+            "product_id": product_id,
+            "product_name": product.get('name', "Noma'lum"),
+            "quantity": quantity,
+            "unit": product.get('unit', "birlik"),
+            "price": price,
+            "total": total
+        })
+    return sale_items
+
 async def show_product_category(message: Message, state: FSMContext):
     """Mahsulot kategoriyasini ko'rsatish"""
     
-    data = await state.get_data()
-    products_by_category = data.get("products_by_category", {})
+    sale = await load_sale_state(state)
+    if not sale.stock:
+        # Qoldiqlarsiz saqlangan eski holat
+        sale.stock = await asyncio.to_thread(available_stock)
+        await save_sale_state(state, sale)
+    products_by_category = get_products_by_category(sale.stock)
     categories = list(products_by_category.keys())
     
     if not categories:
         await message.answer("Mahsulotlar topilmadi")
         return
     
-    current_index = data.get("current_category_index", 0)
-    current_category = categories[current_index]
+    current_category = categories[min(sale.category_index, len(categories) - 1)]
     products = products_by_category[current_category]
     
     keyboard = create_product_selection_keyboard(products, current_category)
@@ -149,21 +187,22 @@ async def select_product(callback: CallbackQuery, state: FSMContext):
     
     product_id = int(callback.data.split("_")[-1])
     
-    async with get_db() as db:
-        product = db.query(Product).filter(Product.id == product_id).first()
+    product = reference_cache.get("products", product_id)
     
     if not product:
         await callback.answer("Mahsulot topilmadi")
         return
     
-    # FSM ga tanlangan mahsulotni saqlash
-    await state.update_data(selected_product=product)
+    # FSM ga faqat tanlangan mahsulot ID sini saqlash
+    sale = await load_sale_state(state)
+    sale.selected_product_id = product['id']
+    await save_sale_state(state, sale)
     await state.set_state(SalesStates.waiting_for_quantity)
     
     await callback.message.answer(
-        f"📝 <b>{product.name}</b>\n"
-        f"Mavjud: {product.quantity_available} {product.unit}\n"
-        f"Narxi: {format_currency(product.selling_price)}\n\n"
+        f"📝 <b>{product['name']}</b>\n"
+        f"Mavjud: {sale.stock.get(product['id'], 0)} {product['unit']}\n"
+        f"Narxi: {format_currency(product['selling_price'])}\n\n"
         "Sotish miqdorini kiriting:",
         parse_mode="HTML"
     )
@@ -185,50 +224,41 @@ async def process_quantity(message: Message, state: FSMContext):
         )
         return
     
-    data = await state.get_data()
-    product = data.get("selected_product")
+    sale = await load_sale_state(state)
+    product = reference_cache.get("products", sale.selected_product_id)
+    
+    if not product:
+        await message.answer("❌ Mahsulot topilmadi. Iltimos, qaytadan tanlang.")
+        await show_product_category(message, state)
+        return
     
-    # Miqdor tekshiruvi
-    if quantity > product.quantity_available:
+    # Miqdor tekshiruvi (savatdagi miqdor ham hisobga olinadi)
+    stock = await asyncio.to_thread(product_stock, product['id'])
+    sale.stock[product['id']] = stock.get(product['id'], 0)
+    available = sale.stock[product['id']] - sale.cart.quantity_of(product['id'])
+    if quantity > available:
         await message.answer(
             f"❌ Yetarli mahsulot mavjud emas!\n"
-            f"Mavjud: {product.quantity_available} {product.unit}\n"
-            f"Sotmoqchi: {quantity} {product.unit}\n\n"
+            f"Mavjud: {available} {product['unit']}\n"
+            f"Sotmoqchi: {quantity} {product['unit']}\n\n"
             "Kamroq miqdor kiriting yoki boshqa mahsulot tanlang."
         )
+        await save_sale_state(state, sale)
         return
     
-    # Sotuv elementini yaratish
-    sale_item = {
-        "product_id": product.id,
-        "product_name": product.name,
-        "quantity": quantity,
-        "unit": product.unit,
-        "price": product.selling_price,
-        "total": product.selling_price * quantity
-    }
-    
-    # Sotuv elementlariga qo'shish
-    sale_items = data.get("sale_items", [])
-    sale_items.append(sale_item)
-    
-    # Jami summani hisoblash
-    total_amount = sum(item["total"] for item in sale_items)
-    
-    # FSM ga yangilangan ma'lumotlarni saqlash
-    await state.update_data(
-        sale_items=sale_items,
-        total_amount=total_amount
-    )
+    # Savatga qo'shish - jami summa bosqichma-bosqich yangilanadi
+    amount = sale.cart.add(product['id'], quantity, product['selling_price'] or 0)
+    sale.selected_product_id = None
+    await save_sale_state(state, sale)
     
     # Qo'shilgan mahsulotni ko'rsatish
     await message.answer(
-        f"✅ <b>Qo'shildi:</b> {product.name}\n"
-        f"Miqdor: {quantity} {product.unit}\n"
-        f"Summa: {format_currency(sale_item['total'])}\n\n"
+        f"✅ <b>Qo'shildi:</b> {product['name']}\n"
+        f"Miqdor: {quantity} {product['unit']}\n"
+        f"Summa: {format_currency(amount)}\n\n"
         f"📊 <b>Jami savat:</b>\n"
-        f"Mahsulotlar soni: {len(sale_items)}\n"
-        f"Jami summa: {format_currency(total_amount)}\n\n"
+        f"Mahsulotlar soni: {len(sale.cart)}\n"
+        f"Jami summa: {format_currency(sale.cart.total)}\n\n"
         "Yana mahsulot qo'shish uchun kategoriyani tanlang yoki "
         "sotuvni yakunlash uchun '✅ Sotuvni yakunlash' tugmasini bosing.",
         parse_mode="HTML"
@@ -241,10 +271,9 @@ async def process_quantity(message: Message, state: FSMContext):
 async def finish_sale_selection(callback: CallbackQuery, state: FSMContext):
     """Sotuvni yakunlash"""
     
-    data = await state.get_data()
-    sale_items = data.get("sale_items", [])
+    sale = await load_sale_state(state)
     
-    if not sale_items:
+    if not sale.cart:
         await callback.message.answer("Savat bo'sh. Mahsulot tanlang.")
         await show_product_category(callback.message, state)
         return
@@ -288,12 +317,13 @@ async def process_customer_phone(message: Message, state: FSMContext):
             Customer.phone == formatted_phone
         ).first()
     
+    sale = await load_sale_state(state)
+    sale.customer_phone = formatted_phone
+    
     if customer:
         # Mijoz topildi
-        await state.update_data(
-            customer_phone=formatted_phone,
-            customer_name=customer.name
-        )
+        sale.customer_name = customer.name
+        await save_sale_state(state, sale)
         
         await message.answer(
             f"✅ <b>Topildi:</b> {customer.name}\n\n"
@@ -305,7 +335,7 @@ async def process_customer_phone(message: Message, state: FSMContext):
         await state.set_state(SalesStates.waiting_for_payment_method)
     else:
         # Yangi mijoz
-        await state.update_data(customer_phone=formatted_phone)
+        await save_sale_state(state, sale)
         await state.set_state(SalesStates.waiting_for_customer_name)
         
         await message.answer(
@@ -326,7 +356,9 @@ async def process_customer_name(message: Message, state: FSMContext):
         )
         return
     
-    await state.update_data(customer_name=customer_name)
+    sale = await load_sale_state(state)
+    sale.customer_name = customer_name
+    await save_sale_state(state, sale)
     
     await message.answer(
         f"✅ <b>Mijoz:</b> {customer_name}\n\n"
@@ -349,15 +381,18 @@ async def process_payment_method(callback: CallbackQuery, state: FSMContext):
         "credit": "Nasiya"
     }
     
-    payment_name = payment_methods.get(payment_method, "Naqd")
+    if payment_method not in PAYMENT_METHODS:
+        payment_method = "cash"
+    payment_name = payment_methods[payment_method]
     
-    await state.update_data(payment_method=payment_method)
+    sale = await load_sale_state(state)
+    sale.payment_method = payment_method
+    await save_sale_state(state, sale)
     
     # Sotuvni tasdiqlash
-    data = await state.get_data()
-    sale_items = data.get("sale_items", [])
-    total_amount = data.get("total_amount", 0)
-    customer_name = data.get("customer_name", "Noma'lum")
+    sale_items = build_sale_items(sale.cart)
+    total_amount = sale.cart.total
+    customer_name = sale.customer_name or "Noma'lum"
     
     # Sotuv ma'lumotlarini tayyorlash
     items_text = "\n".join([
@@ -418,12 +453,12 @@ def create_payment_method_keyboard():
 async def confirm_sale(callback: CallbackQuery, state: FSMContext):
     """Sotuvni tasdiqlash va bazaga saqlash"""
     
-    data = await state.get_data()
-    sale_items = data.get("sale_items", [])
-    total_amount = data.get("total_amount", 0)
-    customer_phone = data.get("customer_phone")
-    customer_name = data.get("customer_name", "Noma'lum")
-    payment_method = data.get("payment_method", "cash")
+    sale_state = await load_sale_state(state)
+    sale_items = build_sale_items(sale_state.cart)
+    total_amount = sale_state.cart.total
+    customer_phone = sale_state.customer_phone
+    customer_name = sale_state.customer_name or "Noma'lum"
+    payment_method = sale_state.payment_method
     user_id = callback.from_user.id
     
     if not sale_items:
@@ -736,6 +771,12 @@ async def show_sales_statistics(callback: CallbackQuery):
         ).group_by(Sale.customer_id).order_by(
             func.sum(Sale.total_amount).desc()
         ).limit(5).all()
+        
+        # Mijoz nomlarini bitta so'rov bilan olish
+        customer_ids = [customer_id for customer_id, _, _ in top_customers]
+        customer_names = dict(
+            db.query(Customer.id, Customer.name).filter(Customer.id.in_(customer_ids)).all()
+        ) if customer_ids else {}
     
     # Statistikani formatlash
     stats_text = "📊 <b>Sotuv statistikasi</b>\n\n"
@@ -748,17 +789,14 @@ async def show_sales_statistics(callback: CallbackQuery):
     
     stats_text += "🏆 <b>Eng ko'p sotilgan mahsulotlar:</b>\n"
     for i, (product_id, quantity, amount) in enumerate(top_products, 1):
-        async with get_db() as db:
-            product = db.query(Product).filter(Product.id == product_id).first()
-            product_name = product.name if product else f"Mahsulot #{product_id}"
+        product = reference_cache.get("products", product_id)
+        product_name = product['name'] if product else f"Mahsulot #{product_id}"
         
         stats_text += f"{i}. {product_name}: {quantity} birlik, {format_currency(amount)}\n"
     
     stats_text += "\n👥 <b>Eng ko'p xarid qilgan mijozlar:</b>\n"
     for i, (customer_id, count, spent) in enumerate(top_customers, 1):
-        async with get_db() as db:
-            customer = db.query(Customer).filter(Customer.id == customer_id).first()
-            customer_name = customer.name if customer else f"Mijoz #{customer_id}"
+        customer_name = customer_names.get(customer_id) or f"Mijoz #{customer_id}"
         
         stats_text += f"{i}. {customer_name}: {count} ta sotuv, {format_currency(spent)}\n"
     
@@ -943,15 +981,13 @@ async def get_receipt_by_number(message: Message):
         # Sotuv elementlarini formatlash
         items_list = []
         for item in sale_items:
-            product = db.query(Product).filter(
-                Product.id == item.product_id
-            ).first()
+            product = reference_cache.get("products", item.product_id, db)
             
             items_list.append({
                 "product_id": item.product_id,
-                "product_name": product.name if product else "Noma'lum",
+                "product_name": product['name'] if product else "Noma'lum",
                 "quantity": item.quantity,
-                "unit": product.unit if product else "birlik",
+                "unit": product['unit'] if product else "birlik",
                 "price": item.unit_price,
                 "total": item.total_price
             })
@@ -4,6 +4,8 @@ from aiogram.dispatcher.filters.state import State, StatesGroup
 from aiogram.types import ReplyKeyboardRemove
 
 from database.db import db
+from database.stock_monitor import low_stock_tracker
+from database.reference_cache import reference_cache
 from keyboards.main_menu import get_main_menu, get_products_keyboard, get_confirm_keyboard
 import logging
 
@@ -128,7 +130,17 @@ async def confirm_add_material(callback_query: types.CallbackQuery, state: FSMCo
             VALUES (?, ?, ?)
             ''', (data['material_name'], data['unit'], data['price']))
             db.conn.commit()
-            
+
+            # Yangi material qoldig'ini kuzatuvchiga qo'shish
+            material_id = db.cursor.lastrowid
+            db.cursor.execute(
+                'SELECT current_stock, min_stock, reorder_point FROM raw_materials WHERE id = ?', (material_id,)
+            )
+            row = db.cursor.fetchone()
+            if row:
+                low_stock_tracker.evaluate(material_id, row['current_stock'], row['min_stock'], row['reorder_point'])
+            reference_cache.refresh("raw_materials", material_id)
+
             await callback_query.message.answer(
                 f"✅ '{data['material_name']}' xom ashyosi muvaffaqiyatli qo'shildi!",
                 reply_markup=get_main_menu()
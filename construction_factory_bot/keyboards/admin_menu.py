@@ -162,11 +162,15 @@ class AdminMenu:
             KeyboardButton(text="📈 Statistika")
         )
         
+        builder.add(
+            KeyboardButton(text="🎲 Simulyatsiya")
+        )
+        
         builder.add(
             KeyboardButton(text="🔙 Admin menyu")
         )
         
-        builder.adjust(2, 2, 2, 2, 1)
+        builder.adjust(2, 2, 2, 2, 1, 1)
         
         return builder.as_markup(resize_keyboard=True)
     
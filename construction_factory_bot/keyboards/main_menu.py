@@ -33,21 +33,12 @@ def get_production_menu():
     keyboard.add(*buttons)
     return keyboard
 
-def get_products_keyboard():
-    """Mahsulotlar tugmalari"""
+def get_products_keyboard(products):
+    """Mahsulotlar tugmalari (ma'lumotnoma keshidagi mahsulotlar ro'yxatidan)"""
     keyboard = InlineKeyboardMarkup(row_width=2)
     
-    products = [
-        ("Sement", "sement"),
-        ("Rodbin", "rodbin"),
-        ("Kafel", "kafel"),
-        ("Nalinoy pol", "nalinoy_pol"),
-        ("Gips", "gips"),
-        ("Keramika", "keramika")
-    ]
-    
-    for name, code in products:
-        keyboard.insert(InlineKeyboardButton(name, callback_data=f"product_{code}"))
+    for product in products:
+        keyboard.insert(InlineKeyboardButton(product['name'], callback_data=f"product_{product['id']}"))
     
     return keyboard
 
@@ -2,7 +2,13 @@
 Qurilish Materiallari Korxonasi - AIOgram Bot
 Asosiy fayl
 """
+import time
+
+# Ishga tushish vaqtini o'lchash uchun - boshqa importlardan oldin
+PROCESS_STARTED = time.perf_counter()
+
 import asyncio
+import importlib
 import logging
 from datetime import datetime
 import sys
@@ -11,35 +17,50 @@ import os
 # Papka yo'llarini sozlash
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import argparse
+
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram import BaseMiddleware
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.types import Update
 
-from config import BOT_TOKEN, ADMIN_IDS, DB_NAME
+from config import (
+    BOT_TOKEN, ADMIN_IDS, DB_NAME, REFERENCE_CACHE_SETTINGS, INTEGRATION_SETTINGS, QUERY_PROFILER_SETTINGS,
+    BACKUP_SETTINGS, STARTUP_SETTINGS
+)
 from database.session import get_db_session
 from database import models
+from database.stock_monitor import low_stock_tracker, low_stock_resync_task
+from database.reference_cache import reference_cache
+from database.fsm_storage import create_fsm_storage
+from database.query_profiler import query_profiler
+from database.audit import audit_writer, audit_background_task
+from database.bootstrap import prepare_database
 from utils.notifications import set_bot_instance, notification_background_task
+from utils.metrics import setup_metrics, start_metrics_server
+from utils.throttling import setup_throttling, check_handler_costs
+from utils.logging_setup import setup_logging
+from utils.backup import backup_scheduler_task, setup_incremental_backup
+from utils.lazy import preload
+from utils.startup import StartupPhases
 
-# Handlerlarni import qilish
-from handlers.start import register_handlers_start
-from handlers.warehouse import register_handlers_warehouse
-from handlers.production import register_handlers_production
-from handlers.reports import register_handlers_reports
-from handlers.admin import register_handlers_admin
-from handlers.employees import register_handlers_employees
-from handlers.notifications import register_handlers_notifications
-from handlers.sales import register_handlers_sales
+# =============== HANDLER MODULLARI ===============
+# (modul, register funksiyasi) - tartib muhim: birinchi mos kelgan handler ishlaydi.
+# Modullar setup_dispatcher da import qilinadi; og'ir kutubxonalarni ular lazy_import orqali oladi.
+HANDLER_MODULES = [
+    ("handlers.start", "register_handlers_start"),
+    ("handlers.warehouse", "register_handlers_warehouse"),
+    ("handlers.production", "register_handlers_production"),
+    ("handlers.reports", "register_handlers_reports"),
+    ("handlers.admin", "register_handlers_admin"),
+    ("handlers.employees", "register_handlers_employees"),
+    ("handlers.notifications", "register_handlers_notifications"),
+    ("handlers.sales", "register_handlers_sales"),
+]
 
 # =============== LOGGING KONFIGURATSIYASI ===============
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'logs/bot_{datetime.now().strftime("%Y%m%d")}.log'),
-        logging.StreamHandler()
-    ]
-)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
@@ -84,31 +105,72 @@ class DatabaseMiddleware(BaseMiddleware):
             data['db'].close()
 
 # =============== BOTNI ISHGA TUSHIRISH ===============
+def is_primary_worker() -> bool:
+    """
+    Asosiy jarayonmi (polling yoki 0-webhook worker)
+    
+    Fon vazifalari, admin xabarlari va boshlang'ich ma'lumotlar faqat shu jarayonda.
+    """
+    return os.getenv("BOT_WORKER_INDEX", "0") == "0"
+
+async def preload_heavy_modules():
+    """Birinchi hisobot kutmasligi uchun og'ir modullarni ishga tushgandan keyin fonda yuklash"""
+    await asyncio.sleep(STARTUP_SETTINGS['preload_delay'])
+    seconds = await asyncio.to_thread(preload, *STARTUP_SETTINGS['preload_modules'])
+    logger.info(f"Heavy modules preloaded in {seconds:.2f} s")
+
+def load_caches():
+    """Yetarli bo'lmagan xom ashyolar to'plamini va katalog keshini bir marta yuklash"""
+    with get_db_session() as db:
+        low_stock_tracker.load(db)
+        
+        if REFERENCE_CACHE_SETTINGS['warm_up_on_startup']:
+            reference_cache.warm_up(db)
+
+async def prepare_storage(phases: StartupPhases):
+    """Baza (faqat asosiy jarayonda), keyin keshlar - ketma-ket, chunki keshlar jadvallarga bog'liq"""
+    if is_primary_worker():
+        await phases.run("database", asyncio.to_thread(
+            prepare_database, force=not STARTUP_SETTINGS['schema_version_check']
+        ))
+        await phases.run("backup_journal", asyncio.to_thread(setup_incremental_backup))
+    
+    await phases.run("caches", asyncio.to_thread(load_caches))
+
 async def on_startup(dp: Dispatcher):
     """Bot ishga tushganda"""
     
     logger.info("=== BOT ISHGA TUSHMOQDA ===")
+    phases = StartupPhases()
     
     # Bot instance ni notifications moduliga o'rnatish
     set_bot_instance(dp.bot)
     
-    # Database jadvallarini yaratish
-    try:
-        models.Base.metadata.create_all(bind=models.engine)
-        logger.info("✅ Database jadvallari yaratildi/yuklandi")
-    except Exception as e:
-        logger.error(f"❌ Database yaratishda xatolik: {e}")
+    # Baza tayyorlash va adminlarga xabar bir-biriga bog'liq emas - parallel
+    steps = [prepare_storage(phases)]
+    if is_primary_worker():
+        steps.append(phases.run("admin_notify", send_startup_message(dp.bot)))# type: ignore
+    await asyncio.gather(*steps)
     
-    # Boshlang'ich ma'lumotlarni yaratish
-    await initialize_database()
+    if is_primary_worker():
+        # Background tasklarni boshlash
+        asyncio.create_task(notification_background_task())
+        
+        if BACKUP_SETTINGS['enabled']:
+            asyncio.create_task(backup_scheduler_task())
     
-    # Adminlarga bot ishga tushganligi haqida xabar
-    await send_startup_message(dp.bot)# type: ignore
+    # Boshqa worker lardagi qoldiq o'zgarishlari - har bir jarayonda, asosiy jarayonda ham
+    if INTEGRATION_SETTINGS['webhook_workers'] > 1:
+        asyncio.create_task(low_stock_resync_task(INTEGRATION_SETTINGS['low_stock_resync_interval']))
     
-    # Background tasklarni boshlash
-    asyncio.create_task(notification_background_task())
+    # Audit buferini yozish (har bir jarayonda), arxivlash - faqat asosiy jarayonda
+    asyncio.create_task(audit_background_task(run_retention=is_primary_worker()))
     
-    logger.info("✅ Bot muvaffaqiyatli ishga tushdi!")
+    if STARTUP_SETTINGS['preload_heavy_modules']:
+        asyncio.create_task(preload_heavy_modules())
+    
+    logger.info(f"Startup phases: {phases.summary()}")
+    logger.info(f"✅ Bot muvaffaqiyatli ishga tushdi! ({time.perf_counter() - PROCESS_STARTED:.2f} s)")
 
 async def on_shutdown(dp: Dispatcher):
     """Bot to'xtaganda"""
@@ -116,157 +178,32 @@ async def on_shutdown(dp: Dispatcher):
     logger.info("=== BOT TO'XTAMOQDA ===")
     
     # Adminlarga bot to'xtaganligi haqida xabar
-    await send_shutdown_message(dp.bot)
+    if is_primary_worker():
+        await send_shutdown_message(dp.bot)
+    
+    # SQL profiler hisobotini logga yozish
+    if query_profiler.enabled and QUERY_PROFILER_SETTINGS['report_on_shutdown']:
+        logger.info(query_profiler.format_report())
+    
+    # Buferdagi audit yozuvlarini yozish
+    await asyncio.to_thread(audit_writer.flush)
     
     # Database ulanishini yopish
     models.engine.dispose()
     
     logger.info("✅ Bot to'xtatildi")
 
-async def initialize_database():
-    """Database ni boshlang'ich ma'lumotlar bilan to'ldirish"""
+async def notify_admins(bot: Bot, message: str):
+    """Barcha adminlarga bir vaqtda xabar yuborish (bitta admin xatosi boshqalarga ta'sir qilmaydi)"""
     
-    with get_db_session() as db:
-        try:
-            # Xom ashyo turlarini yaratish (agar bo'sh bo'lsa)
-            raw_materials_count = db.query(models.RawMaterial).count()
-            
-            if raw_materials_count == 0:
-                raw_materials = [
-                    models.RawMaterial(
-                        name="Klinker",
-                        category="Asosiy",
-                        unit="kg",
-                        current_stock=10000,
-                        min_stock=1000,
-                        price_per_unit=500,
-                        supplier="O'zbekiston Sement"
-                    ),
-                    models.RawMaterial(
-                        name="Gips",
-                        category="Asosiy",
-                        unit="kg",
-                        current_stock=5000,
-                        min_stock=500,
-                        price_per_unit=300,
-                        supplier="Gips Zavodi"
-                    ),
-                    models.RawMaterial(
-                        name="Qum",
-                        category="Qurilish",
-                        unit="kg",
-                        current_stock=20000,
-                        min_stock=2000,
-                        price_per_unit=50,
-                        supplier="Qum Kon"
-                    ),
-                    models.RawMaterial(
-                        name="Temir sutka",
-                        category="Metall",
-                        unit="kg",
-                        current_stock=8000,
-                        min_stock=800,
-                        price_per_unit=2000,
-                        supplier="Metall Zavodi"
-                    ),
-                    models.RawMaterial(
-                        name="Gil",
-                        category="Keramika",
-                        unit="kg",
-                        current_stock=10000,
-                        min_stock=1000,
-                        price_per_unit=150,
-                        supplier="Gil Kon"
-                    ),
-                ]
-                
-                for material in raw_materials:
-                    db.add(material)
-                
-                db.commit()
-                logger.info(f"✅ {len(raw_materials)} ta xom ashyo yaratildi")
-            
-            # Mahsulotlarni yaratish
-            products_count = db.query(models.Product).count()
-            
-            if products_count == 0:
-                products = [
-                    models.Product(
-                        name="Sement M500 (50kg)",
-                        category="sement",
-                        unit="qop",
-                        selling_price=12000,
-                        production_cost=7000,
-                        profit_margin=0.4,
-                        description="Yuqori sifatli qurilish sementi",
-                        is_active=True
-                    ),
-                    models.Product(
-                        name="Rodbin 12mm",
-                        category="rodbin",
-                        unit="metr",
-                        selling_price=4500,
-                        production_cost=3200,
-                        profit_margin=0.3,
-                        description="Armatura materiali",
-                        is_active=True
-                    ),
-                    models.Product(
-                        name="Kafel 30x30",
-                        category="kafel",
-                        unit="dona",
-                        selling_price=850,
-                        production_cost=450,
-                        profit_margin=0.47,
-                        description="Hovli va xonalar uchun kafel",
-                        is_active=True
-                    ),
-                    models.Product(
-                        name="Nalinoy pol",
-                        category="pol",
-                        unit="m2",
-                        selling_price=2800,
-                        production_cost=1800,
-                        profit_margin=0.36,
-                        description="Zamonaviy pol qoplamasi",
-                        is_active=True
-                    ),
-                ]
-                
-                for product in products:
-                    db.add(product)
-                
-                db.commit()
-                logger.info(f"✅ {len(products)} ta mahsulot yaratildi")
-            
-            # Admin xodimni yaratish (agar yo'q bo'lsa)
-            admin_employee = db.query(models.Employee).filter(
-                models.Employee.is_admin == True
-            ).first()
-            
-            if not admin_employee and ADMIN_IDS:
-                admin = models.Employee(
-                    telegram_id=ADMIN_IDS[0],
-                    full_name="Asosiy Administrator",
-                    phone_number="+998901234567",
-                    position="Direktor",
-                    department="Rahbariyat",
-                    status=models.EmployeeStatus.ACTIVE,
-                    hire_date=datetime.now(),
-                    salary=0,
-                    is_admin=True,
-                    notes="Asosiy tizim administratori"
-                )
-                
-                db.add(admin)
-                db.commit()
-                logger.info("✅ Asosiy admin xodim yaratildi")
-            
-            logger.info("✅ Database boshlang'ich ma'lumotlar bilan to'ldirildi")
-            
-        except Exception as e:
-            logger.error(f"❌ Database initialization error: {e}")
-            db.rollback()
+    results = await asyncio.gather(
+        *(bot.send_message(chat_id=admin_id, text=message, parse_mode="Markdown") for admin_id in ADMIN_IDS),
+        return_exceptions=True
+    )
+    
+    for admin_id, result in zip(ADMIN_IDS, results):
+        if isinstance(result, Exception):
+            logger.error(f"Admin {admin_id} ga xabar yuborishda xatolik: {result}")
 
 async def send_startup_message(bot: Bot):
     """Bot ishga tushganida adminlarga xabar yuborish"""
@@ -291,15 +228,7 @@ async def send_startup_message(bot: Bot):
         f"🎯 Bot endi foydalanishga tayyor!"
     )
     
-    for admin_id in ADMIN_IDS:
-        try:
-            await bot.send_message(
-                chat_id=admin_id,
-                text=message,
-                parse_mode="Markdown"
-            )
-        except Exception as e:
-            logger.error(f"Admin {admin_id} ga xabar yuborishda xatolik: {e}")
+    await notify_admins(bot, message)
 
 async def send_shutdown_message(bot: Bot):
     """Bot to'xtaganda adminlarga xabar yuborish"""
@@ -319,48 +248,52 @@ async def send_shutdown_message(bot: Bot):
         f"🔄 Bot qayta ishga tushirilganda xabar beriladi."
     )
     
-    for admin_id in ADMIN_IDS:
-        try:
-            await bot.send_message(
-                chat_id=admin_id,
-                text=message,
-                parse_mode="Markdown"
-            )
-        except Exception as e:
-            logger.error(f"Admin {admin_id} ga xabar yuborishda xatolik: {e}")
+    await notify_admins(bot, message)
 
 # =============== ASOSIY FUNKSIYA ===============
-async def main():
-    """Asosiy funksiya"""
+def create_bot() -> Bot:
+    """Bot obyektini yaratish (kerak bo'lsa lokal Bot API server orqali)"""
+    
+    if INTEGRATION_SETTINGS['telegram_api_base']:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(INTEGRATION_SETTINGS['telegram_api_base']))
+        return Bot(token=BOT_TOKEN, session=session)
+    
+    return Bot(token=BOT_TOKEN)
+
+def register_handlers(dp: Dispatcher):
+    """HANDLER_MODULES dagi modullarni import qilib, register funksiyalarini chaqirish"""
+    for module_name, register_name in HANDLER_MODULES:
+        started = time.perf_counter()
+        register = getattr(importlib.import_module(module_name), register_name)
+        register(dp)
+        logger.debug(f"{module_name} registered in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def setup_dispatcher(bot: Bot, storage) -> Dispatcher:
+    """Dispatcher, middleware va handlerlarni sozlash (polling va webhook uchun umumiy)"""
     
-    # Bot va dispatcher yaratish
-    bot = Bot(token=BOT_TOKEN)
-    storage = MemoryStorage()
     dp = Dispatcher(bot, storage=storage)
     
     # Middleware larni qo'shish
     dp.middleware.setup(LoggingMiddleware())
     dp.middleware.setup(DatabaseMiddleware())
+    setup_metrics(dp, bot)
+    setup_throttling(dp)
     
     # Handlerlarni ro'yxatdan o'tkazish
     logger.info("Handlerlarni ro'yxatdan o'tkazish...")
-    
-    register_handlers_start(dp)
-    register_handlers_warehouse(dp)
-    register_handlers_production(dp)
-    register_handlers_reports(dp)
-    register_handlers_admin(dp)
-    register_handlers_employees(dp)
-    register_handlers_notifications(dp)
-    register_handlers_sales(dp)
-    
+    register_handlers(dp)
+    check_handler_costs(dp)
     logger.info("✅ Barcha handlerlar ro'yxatdan o'tkazildi")
     
     # Start and shutdown handlers
     dp.register_startup_handler(on_startup)
     dp.register_shutdown_handler(on_shutdown)
     
-    # Komandalarni o'rnatish
+    return dp
+
+async def set_bot_commands(bot: Bot):
+    """Komandalarni o'rnatish"""
+    
     await bot.set_my_commands([
         types.BotCommand("start", "Botni ishga tushirish"),
         types.BotCommand("help", "Yordam olish"),
@@ -374,17 +307,37 @@ async def main():
     ])
     
     logger.info("✅ Bot komandalari o'rnatildi")
+
+async def main():
+    """Asosiy funksiya (polling rejimi)"""
+    
+    # Bot va dispatcher yaratish
+    bot = create_bot()
+    storage = await create_fsm_storage()
+    dp = setup_dispatcher(bot, storage)
+    
+    await set_bot_commands(bot)
+    
+    # Prometheus /metrics (webhook rejimida har bir worker o'z portida - webhook.py)
+    metrics_runner = await start_metrics_server()
     
     # Botni ishga tushirish
     try:
         await dp.start_polling()
     finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
         await dp.storage.close()
         await dp.storage.wait_closed()
         await bot.session.close()
 
 # =============== ENTRY POINT ===============
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Qurilish Materiallari Korxonasi boti")
+    parser.add_argument("--webhook", action="store_true", help="Webhook rejimida ishga tushirish")
+    parser.add_argument("--workers", type=int, default=None, help="Webhook worker jarayonlari soni")
+    args = parser.parse_args()
+    
     try:
         # Logs papkasini yaratish
         os.makedirs("logs", exist_ok=True)
@@ -397,8 +350,12 @@ if __name__ == "__main__":
         logger.info(f"Adminlar: {ADMIN_IDS}")
         logger.info(f"Database: {DB_NAME}")
         
-        # Asyncio event loop ni ishga tushirish
-        asyncio.run(main())
+        if args.webhook:
+            from webhook import run_webhook
+            run_webhook(args.workers)
+        else:
+            # Asyncio event loop ni ishga tushirish
+            asyncio.run(main())
         
     except KeyboardInterrupt:
         logger.info("Bot foydalanuvchi tomonidan to'xtatildi")
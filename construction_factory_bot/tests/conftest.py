@@ -0,0 +1,32 @@
+"""
+Testlar uchun umumiy sozlamalar
+
+config.py BOT_TOKEN siz import qilinmaydi, shuning uchun test qiymatlari beriladi.
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("ADMIN_IDS", "1")
+sys.path.insert(0, BOT_DIR)
+
+def load_module(name: str, relative_path: str):
+    """
+    Modulni faylidan yuklash
+
+    database/__init__.py barcha CRUD va modellarni import qiladi - paketdan
+    o'tmasdan faqat tekshirilayotgan modul yuklanadi.
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BOT_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope="session")
+def fsm_storage_module():
+    return load_module("fsm_storage", os.path.join("database", "fsm_storage.py"))
@@ -0,0 +1,136 @@
+"""
+FSM storage testlari - SQLite va Redis (fakeredis) bir xil ishlashi kerak
+"""
+import time
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+
+fakeredis = pytest.importorskip("fakeredis")
+
+class SaleForm(StatesGroup):
+    waiting_for_quantity = State()
+
+KEY = StorageKey(bot_id=1, chat_id=100, user_id=100)
+OTHER_KEY = StorageKey(bot_id=1, chat_id=200, user_id=200)
+
+@pytest_asyncio.fixture(params=["sqlite", "redis"])
+async def storage(request, tmp_path, fsm_storage_module):
+    if request.param == "sqlite":
+        storage = fsm_storage_module.SQLiteFSMStorage(path=str(tmp_path / "fsm.db"), state_ttl=60)
+    else:
+        storage = fsm_storage_module.RedisFSMStorage(fakeredis.aioredis.FakeRedis(), state_ttl=60)
+    yield storage
+    await storage.close()
+
+# =============== HOLAT VA MA'LUMOT ===============
+@pytest.mark.asyncio
+async def test_empty_key(storage):
+    assert await storage.get_state(KEY) is None
+    assert await storage.get_data(KEY) == {}
+
+@pytest.mark.asyncio
+async def test_state_roundtrip(storage):
+    await storage.set_state(KEY, SaleForm.waiting_for_quantity)
+    assert await storage.get_state(KEY) == SaleForm.waiting_for_quantity.state
+
+    await storage.set_state(KEY, "custom:state")
+    assert await storage.get_state(KEY) == "custom:state"
+    assert await storage.get_state(OTHER_KEY) is None
+
+@pytest.mark.asyncio
+async def test_data_roundtrip(storage):
+    data = {"cart": {"1": 2.5}, "total": Decimal("1500.50"), "name": "Sement M500"}
+    await storage.set_data(KEY, data)
+
+    assert await storage.get_data(KEY) == {"cart": {"1": 2.5}, "total": 1500.5, "name": "Sement M500"}
+    assert await storage.get_data(OTHER_KEY) == {}
+
+@pytest.mark.asyncio
+async def test_large_data_is_compressed(storage, fsm_storage_module):
+    data = {"items": [{"product_id": i, "quantity": i * 1.5} for i in range(200)]}
+    assert fsm_storage_module.pack_data(data)[:1] == b"z"
+
+    await storage.set_data(KEY, data)
+    assert await storage.get_data(KEY) == data
+
+@pytest.mark.asyncio
+async def test_state_and_data_are_independent(storage):
+    await storage.set_state(KEY, SaleForm.waiting_for_quantity)
+    await storage.set_data(KEY, {"product_id": 7})
+
+    await storage.set_data(KEY, {})
+    assert await storage.get_state(KEY) == SaleForm.waiting_for_quantity.state
+    assert await storage.get_data(KEY) == {}
+
+# =============== TOZALASH ===============
+@pytest.mark.asyncio
+async def test_clear(storage):
+    """FSMContext.clear() - set_state(None) va set_data({})"""
+    await storage.set_state(KEY, SaleForm.waiting_for_quantity)
+    await storage.set_data(KEY, {"product_id": 7})
+    await storage.set_state(OTHER_KEY, "other:state")
+
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+
+    assert await storage.get_state(KEY) is None
+    assert await storage.get_data(KEY) == {}
+    assert await storage.get_state(OTHER_KEY) == "other:state"
+
+@pytest.mark.asyncio
+async def test_clear_removes_sqlite_row(tmp_path, fsm_storage_module):
+    storage = fsm_storage_module.SQLiteFSMStorage(path=str(tmp_path / "fsm.db"), state_ttl=60)
+    await storage.set_state(KEY, "form:step")
+    await storage.set_data(KEY, {"a": 1})
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+
+    assert storage.conn.execute("SELECT COUNT(*) FROM fsm_storage").fetchone()[0] == 0
+    await storage.close()
+
+# =============== TTL ===============
+@pytest.mark.asyncio
+async def test_redis_ttl_refreshed_on_write(fsm_storage_module):
+    redis = fakeredis.aioredis.FakeRedis()
+    storage = fsm_storage_module.RedisFSMStorage(redis, state_ttl=60)
+    redis_key = storage.key_builder.build(KEY)
+
+    await storage.set_state(KEY, "form:step")
+    assert 0 < await redis.ttl(redis_key) <= 60
+
+    await redis.expire(redis_key, 5)
+    await storage.set_data(KEY, {"a": 1})
+    assert 5 < await redis.ttl(redis_key) <= 60
+    await storage.close()
+
+@pytest.mark.asyncio
+async def test_redis_without_ttl(fsm_storage_module):
+    redis = fakeredis.aioredis.FakeRedis()
+    storage = fsm_storage_module.RedisFSMStorage(redis, state_ttl=0)
+
+    await storage.set_state(KEY, "form:step")
+    assert await redis.ttl(storage.key_builder.build(KEY)) == -1
+    await storage.close()
+
+@pytest.mark.asyncio
+async def test_sqlite_expired_state_is_hidden_and_reset(tmp_path, monkeypatch, fsm_storage_module):
+    storage = fsm_storage_module.SQLiteFSMStorage(path=str(tmp_path / "fsm.db"), state_ttl=60)
+    now = time.time()
+    monkeypatch.setattr(fsm_storage_module.time, "time", lambda: now)
+
+    await storage.set_state(KEY, "form:step")
+    await storage.set_data(KEY, {"a": 1})
+
+    monkeypatch.setattr(fsm_storage_module.time, "time", lambda: now + 61)
+    assert await storage.get_state(KEY) is None
+    assert await storage.get_data(KEY) == {}
+
+    # Muddati o'tgan yozuvga yangi holat yozilsa, eski ma'lumot qaytib kelmaydi
+    await storage.set_state(KEY, "form:new")
+    assert await storage.get_state(KEY) == "form:new"
+    assert await storage.get_data(KEY) == {}
+    await storage.close()
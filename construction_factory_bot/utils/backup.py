@@ -0,0 +1,278 @@
+"""
+Database backup - SQLite online backup API yoki pg_dump, alohida threadda
+
+- SQLite: sqlite3.Connection.backup sahifalab nusxalaydi, qadamlar orasida
+  yozuvchilar ishlashda davom etadi (fayl yarim yozilgan holatda nusxalanmaydi)
+- PostgreSQL: pg_dump (plain SQL)
+- siqish: BACKUP_SETTINGS['compression'] (zip, gzip, none)
+- har bir fayl yonida .sha256 checksum, keep_days dan eskilari o'chiriladi
+- incremental rejim (SQLite): full_every_days da bir to'liq backup, qolgan
+  kunlari faqat o'zgargan qatorlar deltasi (utils/backup_incremental.py)
+"""
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy.engine import make_url
+
+from config import BACKUP_SETTINGS, BACKUP_DIR, BASE_DIR, DATABASE_URL, LOGS_DIR, REPORTS_DIR
+from utils.backup_incremental import create_delta, install_journal, load_chain, reset_journal, save_chain
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+_backup_lock = threading.Lock()
+
+@dataclass
+class BackupResult:
+    """Tugallangan backup haqida ma'lumot"""
+    path: Path
+    size: int
+    checksum: str
+    duration: float
+    engine: str
+
+# =============== SNAPSHOT ===============
+def get_sqlite_path() -> Path:
+    """SQLAlchemy URL dagi SQLite fayl yo'li (engine bilan bir xil hisoblanadi)"""
+    return Path(make_url(DATABASE_URL).database).resolve()
+
+def snapshot_sqlite(source_path: Path, dest: Path):
+    """Ishlayotgan SQLite bazasining izchil nusxasi (online backup API)"""
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    target = sqlite3.connect(dest)
+    try:
+        source.backup(target, pages=BACKUP_SETTINGS['pages_per_step'], sleep=BACKUP_SETTINGS['step_sleep'])
+
+        result = target.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != "ok":
+            raise RuntimeError(f"Backup nusxasi buzilgan: {result}")
+    finally:
+        target.close()
+        source.close()
+
+def snapshot_postgresql(dest: Path):
+    """pg_dump bilan plain SQL dump"""
+    url = make_url(DATABASE_URL)
+    env = dict(os.environ)
+    if url.password:
+        env["PGPASSWORD"] = url.password
+
+    command = ["pg_dump", "--format=plain", "--no-owner", "--no-password", "--file", str(dest)]
+    if url.host:
+        command += ["--host", url.host]
+    if url.port:
+        command += ["--port", str(url.port)]
+    if url.username:
+        command += ["--username", url.username]
+    command.append(url.database)
+
+    subprocess.run(
+        command, env=env, check=True, capture_output=True,
+        timeout=BACKUP_SETTINGS['pg_dump_timeout']
+    )
+
+# =============== SIQISH VA CHECKSUM ===============
+def _extra_files() -> List[Path]:
+    """Zip arxivga qo'shiladigan log va hisobot fayllari"""
+    files: List[Path] = []
+    if BACKUP_SETTINGS['include_logs']:
+        files += [path for path in LOGS_DIR.rglob("*") if path.is_file()]
+    if BACKUP_SETTINGS['include_reports']:
+        files += [path for path in REPORTS_DIR.rglob("*") if path.is_file()]
+    return files
+
+def compress(snapshot: Path, compression: str) -> Path:
+    """Snapshotni siqish (asl fayl o'chiriladi)"""
+    if compression == "gzip":
+        target = snapshot.with_name(snapshot.name + ".gz")
+        with open(snapshot, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+    elif compression == "zip":
+        target = snapshot.with_suffix(".zip")
+        with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(snapshot, snapshot.name)
+            for path in _extra_files():
+                archive.write(path, str(path.relative_to(BASE_DIR)))
+    else:
+        return snapshot
+
+    snapshot.unlink()
+    return target
+
+def file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_checksum(path: Path) -> str:
+    """sha256sum formatidagi yonma-yon fayl"""
+    checksum = file_checksum(path)
+    path.with_name(path.name + ".sha256").write_text(f"{checksum}  {path.name}\n", encoding="utf-8")
+    return checksum
+
+def verify_backup(path: Path) -> bool:
+    """Faylni .sha256 dagi qiymat bilan solishtirish"""
+    checksum_file = path.with_name(path.name + ".sha256")
+    if not checksum_file.exists():
+        return False
+    expected = checksum_file.read_text(encoding="utf-8").split()[0]
+    return file_checksum(path) == expected
+
+# =============== ROTATSIYA ===============
+def rotate_backups(keep_days: Optional[int] = None) -> int:
+    """keep_days dan eski backup larni o'chirish (joriy zanjir fayllari saqlanadi)"""
+    keep_days = keep_days if keep_days is not None else BACKUP_SETTINGS['keep_days']
+    cutoff = time.time() - keep_days * 86400
+    removed = 0
+
+    chain = load_chain() or {}
+    in_chain = {chain.get('base'), *chain.get('deltas', [])}
+
+    for path in [*BACKUP_DIR.glob("backup_*"), *BACKUP_DIR.glob("delta_*")]:
+        if path.suffix == ".sha256" or path.name in in_chain or path.stat().st_mtime >= cutoff:
+            continue
+        path.unlink()
+        path.with_name(path.name + ".sha256").unlink(missing_ok=True)
+        removed += 1
+
+    if removed:
+        logger.info(f"Removed {removed} backups older than {keep_days} days")
+    return removed
+
+# =============== BACKUP ===============
+def incremental_enabled() -> bool:
+    """Inkremental rejim faqat SQLite uchun (PostgreSQL da har doim pg_dump)"""
+    return BACKUP_SETTINGS['mode'] == "incremental" and make_url(DATABASE_URL).get_backend_name() == "sqlite"
+
+def setup_incremental_backup():
+    """Jurnal triggerlarini o'rnatish (asosiy jarayonda, jadvallar yaratilgandan keyin)"""
+    if not incremental_enabled():
+        return
+    tables = install_journal(get_sqlite_path())
+    logger.info(f"Backup journal installed on {len(tables)} tables")
+
+def _delta_due(chain: Optional[dict], full: bool) -> bool:
+    """Joriy zanjirga delta qo'shish mumkinmi"""
+    if full or not chain or not incremental_enabled():
+        return False
+    if not (BACKUP_DIR / chain['base']).exists():
+        return False
+    base_created = datetime.fromisoformat(chain['base_created'])
+    return datetime.now() - base_created < timedelta(days=BACKUP_SETTINGS['full_every_days'])
+
+def run_backup(full: bool = False) -> BackupResult:
+    """
+    Backup (sinxron - alohida threadda chaqiriladi)
+
+    Args:
+        full: incremental rejimda ham to'liq backup olish
+    """
+    if not _backup_lock.acquire(blocking=False):
+        raise RuntimeError("Backup allaqachon bajarilmoqda")
+
+    try:
+        started = time.perf_counter()
+        BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        chain = load_chain()
+
+        if _delta_due(chain, full):
+            engine = "sqlite-delta"
+            path = BACKUP_DIR / f"delta_{timestamp}.jsonl.gz"
+            stats = create_delta(get_sqlite_path(), path, chain['base'], len(chain['deltas']) + 1)
+            logger.info(f"Delta backup: {stats['upserts']} upserts, {stats['deletes']} deletes")
+            chain['deltas'].append(path.name)
+
+        elif make_url(DATABASE_URL).get_backend_name() == "sqlite":
+            engine = "sqlite"
+            source_path = get_sqlite_path()
+            if not source_path.exists():
+                raise FileNotFoundError(f"Database fayli topilmadi: {source_path}")
+            snapshot = BACKUP_DIR / f"backup_{timestamp}.db"
+            snapshot_sqlite(source_path, snapshot)
+            if incremental_enabled():
+                reset_journal(source_path, snapshot)
+            path = compress(snapshot, BACKUP_SETTINGS['compression'])
+            chain = {'base': path.name, 'base_created': datetime.now().isoformat(timespec="seconds"), 'deltas': []}
+
+        else:
+            engine = "postgresql"
+            snapshot = BACKUP_DIR / f"backup_{timestamp}.sql"
+            snapshot_postgresql(snapshot)
+            path = compress(snapshot, BACKUP_SETTINGS['compression'])
+
+        checksum = write_checksum(path)
+
+        if BACKUP_SETTINGS['verify'] and not verify_backup(path):
+            raise RuntimeError(f"Checksum mos kelmadi: {path}")
+
+        if engine.startswith("sqlite") and incremental_enabled():
+            save_chain(chain)
+
+        rotate_backups()
+
+        result = BackupResult(path, path.stat().st_size, checksum, time.perf_counter() - started, engine)
+        logger.info(f"Backup created: {path} ({result.size / 1024 / 1024:.2f} MB, {result.duration:.1f} s)")
+        return result
+
+    finally:
+        _backup_lock.release()
+
+async def create_backup(full: bool = False) -> BackupResult:
+    """Backup ni event loop ni bloklamasdan bajarish"""
+    return await asyncio.to_thread(run_backup, full)
+
+# =============== REJA ===============
+def next_backup_time(now: datetime) -> datetime:
+    """BACKUP_SETTINGS['schedule'] va ['time'] bo'yicha keyingi ishga tushish vaqti"""
+    hour, minute = map(int, BACKUP_SETTINGS['time'].split(":"))
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    schedule = BACKUP_SETTINGS['schedule']
+
+    while True:
+        if candidate > now and (
+            schedule == "daily"
+            or (schedule == "weekly" and candidate.weekday() == 0)
+            or (schedule == "monthly" and candidate.day == 1)
+        ):
+            return candidate
+        candidate += timedelta(days=1)
+
+async def backup_scheduler_task():
+    """Rejalashtirilgan backup fon vazifasi"""
+    from utils.notifications import send_notification_to_admins
+
+    while True:
+        run_at = next_backup_time(datetime.now())
+        logger.info(f"Next scheduled backup at {run_at:%Y-%m-%d %H:%M}")
+        await asyncio.sleep((run_at - datetime.now()).total_seconds())
+
+        try:
+            result = await create_backup()
+            if BACKUP_SETTINGS['notify_on_backup']:
+                await send_notification_to_admins(
+                    "💾 Rejalashtirilgan backup bajarildi",
+                    f"Fayl: {result.path.name}\n"
+                    f"Hajmi: {result.size / 1024 / 1024:.2f} MB\n"
+                    f"SHA-256: {result.checksum[:16]}…",
+                    "system_alert"
+                )
+        except Exception as e:
+            logger.error(f"Scheduled backup failed: {e}")
+            await send_notification_to_admins("🚨 Backup xatoligi", f"Rejalashtirilgan backup bajarilmadi: {e}", "system_alert")
@@ -0,0 +1,367 @@
+"""
+Inkremental backup - o'zgargan qatorlar jurnali va siqilgan delta fayllar (SQLite)
+
+Har bir `id` kalitli jadvalga trigger o'rnatiladi: INSERT/UPDATE/DELETE bo'lganda
+qator ID si backup_journal ga yoziladi (ORM va sqlite3 orqali yozishlar ham).
+Delta - oxirgi backup dan beri o'zgargan qatorlarning joriy holati (gzip JSONL).
+Tiklash: to'liq backup + deltalar zanjiri ketma-ket qo'llanadi.
+
+PostgreSQL uchun inkremental rejim yo'q - u yerda har doim pg_dump (to'liq) olinadi.
+
+Misol:
+    python -m utils.backup_incremental restore --chain backups/chain.json --out restored.db
+    python -m utils.backup_incremental benchmark --rows 200000 --changed 0.01
+"""
+import argparse
+import base64
+import gzip
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BACKUP_DIR
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_TABLE = "backup_journal"
+CHAIN_FILE = "chain.json"
+FETCH_CHUNK = 500
+
+# =============== JURNAL ===============
+def journaled_tables(conn: sqlite3.Connection) -> List[str]:
+    """Yagona INTEGER `id` birlamchi kalitli jadvallar"""
+    tables = []
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name != ?",
+        (JOURNAL_TABLE,)
+    ):
+        pk_columns = [(row[1], row[2].upper()) for row in conn.execute(f'PRAGMA table_info("{name}")') if row[5]]
+        if pk_columns == [("id", "INTEGER")]:
+            tables.append(name)
+    return tables
+
+def install_journal(db_path: Path) -> List[str]:
+    """Jurnal jadvali va triggerlarni o'rnatish (takroriy chaqiruv xavfsiz, yangi jadvallar ham qo'shiladi)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {JOURNAL_TABLE} ("
+                "table_name TEXT NOT NULL, row_id INTEGER NOT NULL, op TEXT NOT NULL, version INTEGER NOT NULL, "
+                "PRIMARY KEY (table_name, row_id)) WITHOUT ROWID"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{JOURNAL_TABLE}_version ON {JOURNAL_TABLE} (version)")
+
+            next_version = f"(SELECT COALESCE(MAX(version), 0) + 1 FROM {JOURNAL_TABLE})"
+            tables = journaled_tables(conn)
+            for table in tables:
+                for event, ref, op in (("INSERT", "NEW", "U"), ("UPDATE", "NEW", "U"), ("DELETE", "OLD", "D")):
+                    conn.execute(
+                        f'CREATE TRIGGER IF NOT EXISTS "bj_{table}_{event.lower()}" AFTER {event} ON "{table}" '
+                        f"BEGIN INSERT OR REPLACE INTO {JOURNAL_TABLE} VALUES ('{table}', {ref}.id, '{op}', {next_version}); END"
+                    )
+        return tables
+    finally:
+        conn.close()
+
+def reset_journal(db_path: Path, snapshot_path: Path):
+    """
+    To'liq backup dan keyin jurnalni tozalash
+
+    Faqat snapshot ga kirgan yozuvlar o'chiriladi - snapshot davomida
+    o'zgargan qatorlar keyingi deltaga tushadi.
+    """
+    snapshot = sqlite3.connect(snapshot_path)
+    try:
+        if not journaled_snapshot(snapshot):
+            return
+        (max_version,) = snapshot.execute(f"SELECT MAX(version) FROM {JOURNAL_TABLE}").fetchone()
+        with snapshot:
+            snapshot.execute(f"DELETE FROM {JOURNAL_TABLE}")
+    finally:
+        snapshot.close()
+
+    if max_version is None:
+        return
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(f"DELETE FROM {JOURNAL_TABLE} WHERE version <= ?", (max_version,))
+    finally:
+        conn.close()
+
+def journaled_snapshot(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (JOURNAL_TABLE,)
+    ).fetchone() is not None
+
+# =============== DELTA ===============
+def _encode(value):
+    if isinstance(value, bytes):
+        return {"b64": base64.b64encode(value).decode()}
+    return value
+
+def _decode(value):
+    if isinstance(value, dict):
+        return base64.b64decode(value["b64"])
+    return value
+
+def create_delta(db_path: Path, dest: Path, base: str, sequence: int) -> Dict[str, int]:
+    """
+    Jurnaldagi qatorlarni delta faylga yozish va jurnalni tozalash
+
+    BEGIN IMMEDIATE ostida bajariladi: jurnalni o'qish, qatorlarni olish va
+    tozalash orasida boshqa yozish bo'lmaydi (delta kichik, qulf qisqa).
+
+    Returns:
+        Dict: {'upserts': n, 'deletes': n}
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    stats = {'upserts': 0, 'deletes': 0}
+
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+
+        changes: Dict[str, Dict[str, List[int]]] = {}
+        for table, row_id, op in conn.execute(f"SELECT table_name, row_id, op FROM {JOURNAL_TABLE}"):
+            changes.setdefault(table, {"U": [], "D": []})[op].append(row_id)
+
+        with gzip.open(dest, "wt", encoding="utf-8", compresslevel=6) as delta:
+            header = {
+                "type": "delta", "base": base, "seq": sequence,
+                "created_at": datetime.now().isoformat(timespec="seconds"), "columns": {}
+            }
+            body: List[str] = []
+
+            for table, ops in changes.items():
+                cursor = conn.execute(f'SELECT * FROM "{table}" LIMIT 0')
+                columns = [column[0] for column in cursor.description]
+                header["columns"][table] = columns
+                id_index = columns.index("id")
+
+                found = set()
+                for start in range(0, len(ops["U"]), FETCH_CHUNK):
+                    chunk = ops["U"][start:start + FETCH_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    for row in conn.execute(f'SELECT * FROM "{table}" WHERE id IN ({placeholders})', chunk):
+                        found.add(row[id_index])
+                        body.append(json.dumps({"t": table, "op": "U", "row": [_encode(v) for v in row]},
+                                               ensure_ascii=False, separators=(",", ":")))
+                        stats['upserts'] += 1
+
+                # Jurnalda U, lekin qator topilmadi - o'chirilgan deb hisoblanadi
+                for row_id in ops["D"] + [row_id for row_id in ops["U"] if row_id not in found]:
+                    body.append(json.dumps({"t": table, "op": "D", "id": row_id}, separators=(",", ":")))
+                    stats['deletes'] += 1
+
+            delta.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")) + "\n")
+            for line in body:
+                delta.write(line + "\n")
+
+        conn.execute(f"DELETE FROM {JOURNAL_TABLE}")
+        conn.execute("COMMIT")
+
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        dest.unlink(missing_ok=True)
+        raise
+    finally:
+        conn.close()
+
+    return stats
+
+# =============== ZANJIR ===============
+def load_chain(backup_dir: Path = BACKUP_DIR) -> Optional[Dict]:
+    path = backup_dir / CHAIN_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def save_chain(chain: Dict, backup_dir: Path = BACKUP_DIR):
+    path = backup_dir / CHAIN_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(chain, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+# =============== TIKLASH ===============
+def extract_base(base_path: Path, dest: Path):
+    """To'liq backup ni (gz, zip yoki .db) SQLite faylga ochish"""
+    if base_path.suffix == ".gz":
+        with gzip.open(base_path, "rb") as src, open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+    elif base_path.suffix == ".zip":
+        with zipfile.ZipFile(base_path) as archive:
+            name = next(item for item in archive.namelist() if item.endswith(".db"))
+            with archive.open(name) as src, open(dest, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+    else:
+        shutil.copyfile(base_path, dest)
+
+def apply_delta(conn: sqlite3.Connection, delta_path: Path) -> int:
+    """Bitta deltani bazaga qo'llash"""
+    applied = 0
+    with gzip.open(delta_path, "rt", encoding="utf-8") as delta:
+        header = json.loads(delta.readline())
+        statements = {
+            table: f'INSERT OR REPLACE INTO "{table}" ({", ".join(chr(34) + c + chr(34) for c in columns)}) '
+                   f'VALUES ({", ".join("?" * len(columns))})'
+            for table, columns in header["columns"].items()
+        }
+
+        for line in delta:
+            change = json.loads(line)
+            if change["op"] == "U":
+                conn.execute(statements[change["t"]], [_decode(value) for value in change["row"]])
+            else:
+                conn.execute(f'DELETE FROM "{change["t"]}" WHERE id = ?', (change["id"],))
+            applied += 1
+    return applied
+
+def restore_chain(base_path: Path, deltas: List[Path], dest: Path, verify: bool = True) -> Dict[str, int]:
+    """To'liq backup + deltalar zanjiridan bazani tiklash"""
+    from utils.backup import verify_backup
+
+    for path in [base_path, *deltas]:
+        if verify and not verify_backup(path):
+            raise RuntimeError(f"Checksum mos kelmadi yoki topilmadi: {path}")
+
+    extract_base(base_path, dest)
+
+    conn = sqlite3.connect(dest)
+    applied = 0
+    try:
+        conn.execute("PRAGMA foreign_keys = OFF")
+        with conn:
+            for delta_path in deltas:
+                applied += apply_delta(conn, delta_path)
+            if journaled_snapshot(conn):
+                conn.execute(f"DELETE FROM {JOURNAL_TABLE}")
+    finally:
+        conn.close()
+
+    return {'deltas': len(deltas), 'changes': applied}
+
+# =============== BENCHMARK ===============
+def run_benchmark(rows: int, changed: float, deltas: int):
+    """Sintetik baza ustida to'liq va inkremental backup hajmi/vaqtini solishtirish"""
+    from utils.backup import compress, write_checksum, snapshot_sqlite
+
+    workdir = Path(tempfile.mkdtemp(prefix="backup_bench_"))
+    source = workdir / "source.db"
+
+    conn = sqlite3.connect(source)
+    conn.execute(
+        "CREATE TABLE warehouse_transactions (id INTEGER PRIMARY KEY, product_id INTEGER, "
+        "raw_material_id INTEGER, quantity REAL, transaction_type TEXT, user_id INTEGER, notes TEXT, created_at TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO warehouse_transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ((i, i % 50, i % 30, i * 1.5, "kirim", 1000 + i % 20, f"izoh {i}", "2024-01-01 10:00:00")
+         for i in range(1, rows + 1))
+    )
+    conn.commit()
+    conn.close()
+    install_journal(source)
+
+    results = []
+
+    started = time.perf_counter()
+    snapshot = workdir / "backup_full.db"
+    snapshot_sqlite(source, snapshot)
+    reset_journal(source, snapshot)
+    base = compress(snapshot, "gzip")
+    write_checksum(base)
+    results.append(("full", time.perf_counter() - started, base.stat().st_size))
+
+    delta_paths = []
+    per_delta = max(1, int(rows * changed))
+    for sequence in range(1, deltas + 1):
+        conn = sqlite3.connect(source)
+        with conn:
+            conn.executemany(
+                "UPDATE warehouse_transactions SET quantity = quantity + 1 WHERE id = ?",
+                ((((sequence * 7919 + i) % rows) + 1,) for i in range(per_delta // 2))
+            )
+            conn.executemany(
+                "INSERT INTO warehouse_transactions (product_id, quantity, transaction_type, notes) VALUES (?, ?, ?, ?)",
+                ((i % 50, 1.0, "chiqim", "yangi") for i in range(per_delta - per_delta // 2))
+            )
+        conn.close()
+
+        started = time.perf_counter()
+        delta_path = workdir / f"delta_{sequence:04d}.jsonl.gz"
+        create_delta(source, delta_path, base.name, sequence)
+        write_checksum(delta_path)
+        results.append((f"delta {sequence}", time.perf_counter() - started, delta_path.stat().st_size))
+        delta_paths.append(delta_path)
+
+    started = time.perf_counter()
+    restored = workdir / "restored.db"
+    restore_chain(base, delta_paths, restored)
+    restore_time = time.perf_counter() - started
+
+    checks = []
+    for path in (source, restored):
+        conn = sqlite3.connect(path)
+        checks.append(conn.execute(
+            "SELECT COUNT(*), TOTAL(quantity), MAX(id) FROM warehouse_transactions"
+        ).fetchone())
+        conn.close()
+
+    print(f"Qatorlar: {rows:,}, har deltada o'zgargan: {per_delta:,} ({changed * 100:.1f}%)")
+    print(f"{'Backup':<12}{'Vaqt (s)':>12}{'Hajm (KB)':>14}")
+    for name, duration, size in results:
+        print(f"{name:<12}{duration:>12.3f}{size / 1024:>14.1f}")
+    print(f"Tiklash (to'liq + {deltas} delta): {restore_time:.3f} s")
+    print(f"Tekshiruv: {'OK' if checks[0] == checks[1] else 'MOS EMAS'} {checks[0]} / {checks[1]}")
+
+    shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inkremental backup vositalari")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    restore_parser = commands.add_parser("restore", help="To'liq backup + deltalardan tiklash")
+    restore_parser.add_argument("--chain", type=Path, help="chain.json (standart - BACKUP_DIR dagi)")
+    restore_parser.add_argument("--base", type=Path, help="To'liq backup fayli")
+    restore_parser.add_argument("--deltas", type=Path, nargs="*", default=[], help="Delta fayllar (tartib bilan)")
+    restore_parser.add_argument("--out", type=Path, required=True, help="Tiklangan baza fayli")
+    restore_parser.add_argument("--no-verify", action="store_true", help="Checksum tekshirmaslik")
+
+    bench_parser = commands.add_parser("benchmark", help="To'liq va inkremental backup ni solishtirish")
+    bench_parser.add_argument("--rows", type=int, default=200000)
+    bench_parser.add_argument("--changed", type=float, default=0.01, help="Har deltada o'zgargan qatorlar ulushi")
+    bench_parser.add_argument("--deltas", type=int, default=3)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "benchmark":
+        run_benchmark(args.rows, args.changed, args.deltas)
+    else:
+        if args.base:
+            base_path, delta_paths = args.base, args.deltas
+        else:
+            chain_path = args.chain or BACKUP_DIR / CHAIN_FILE
+            chain = json.loads(chain_path.read_text(encoding="utf-8"))
+            base_path = chain_path.parent / chain["base"]
+            delta_paths = [chain_path.parent / name for name in chain["deltas"]]
+
+        if args.out.exists():
+            parser.error(f"{args.out} allaqachon mavjud")
+
+        result = restore_chain(base_path, delta_paths, args.out, verify=not args.no_verify)
+        print(f"Tiklandi: {args.out} ({result['deltas']} delta, {result['changes']} o'zgarish)")
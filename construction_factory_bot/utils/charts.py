@@ -1,6 +1,6 @@
-import matplotlib.pyplot as plt
 import matplotlib
-matplotlib.use('Agg')  # GUI o'rnatmaslik uchun
+matplotlib.use('Agg')  # GUI o'rnatmaslik uchun (pyplot dan oldin)
+import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 import numpy as np
@@ -9,7 +9,7 @@ import os
 from typing import List, Dict, Any, Tuple
 from config import CHARTS_DIR
 
-# Matplotlib sozlamalari
+# Matplotlib sozlamalari (modul lazy_import orqali birinchi grafikda yuklanadi)
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
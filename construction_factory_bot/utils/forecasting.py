@@ -0,0 +1,247 @@
+"""
+Talab prognozi - xom ashyo sarfini bashorat qilish va qayta buyurtma nuqtalari
+"""
+import logging
+import math
+from datetime import datetime, timedelta, date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database.session import get_db_session
+from database import models
+from config import FORECAST_SETTINGS
+from utils.calculations import WarehouseCalculator
+
+logger = logging.getLogger(__name__)
+
+# Sarf hisoblanadigan harakat turlari
+CONSUMPTION_TYPES = (models.TransactionType.OUTCOME, models.TransactionType.PRODUCTION)
+
+MODEL_NAMES = ("moving_average", "exponential_smoothing", "croston")
+
+# =============== MA'LUMOTLARNI YIG'ISH ===============
+def load_daily_consumption(db: Session, history_days: Optional[int] = None) -> Tuple[List[int], np.ndarray]:
+    """
+    Har bir xom ashyo uchun kunlik sarf qatorini bitta guruhlangan so'rov bilan olish
+
+    Returns:
+        Tuple: (material ID lari, [materiallar x kunlar] sarf matritsasi)
+    """
+    history_days = history_days or FORECAST_SETTINGS['history_days']
+    start_day = datetime.utcnow().date() - timedelta(days=history_days - 1)
+
+    transaction = models.WarehouseTransaction
+    day = func.date(transaction.date)
+
+    rows = db.query(
+        transaction.raw_material_id,
+        day.label('day'),
+        func.sum(transaction.quantity).label('total')
+    ).filter(
+        transaction.raw_material_id.isnot(None),
+        transaction.transaction_type.in_(CONSUMPTION_TYPES),
+        transaction.date >= start_day
+    ).group_by(transaction.raw_material_id, day).all()
+
+    material_ids = [material_id for (material_id,) in
+                    db.query(models.RawMaterial.id).order_by(models.RawMaterial.id)]
+    index = {material_id: i for i, material_id in enumerate(material_ids)}
+
+    series = np.zeros((len(material_ids), history_days))
+
+    for material_id, day_value, total in rows:
+        row = index.get(material_id)
+        if row is None:
+            continue
+
+        # SQLite sanani matn ko'rinishida qaytaradi
+        if isinstance(day_value, str):
+            day_value = date.fromisoformat(day_value)
+
+        offset = (day_value - start_day).days
+        if 0 <= offset < history_days:
+            series[row, offset] += abs(total or 0)
+
+    return material_ids, series
+
+# =============== PROGNOZ MODELLARI ===============
+# Har bir model [materiallar x (kunlar + 1)] matritsa qaytaradi:
+# k-ustun - k-kun uchun bir qadam oldingi prognoz, oxirgi ustun - ertangi kun prognozi.
+# Qator birinchi kuzatuvdan (starts) boshlanadi - undan oldingi bo'sh kunlar material
+# hali ishlatilmagan davr, nol talab emas.
+
+def series_starts(series: np.ndarray) -> np.ndarray:
+    """Har bir material qatorining birinchi nol bo'lmagan kuni (kuzatuv bo'lmasa - kunlar soni)"""
+    observed = series > 0
+    return np.where(observed.any(axis=1), observed.argmax(axis=1), series.shape[1])
+
+def moving_average(series: np.ndarray, window: int, starts: Optional[np.ndarray] = None) -> np.ndarray:
+    """Harakatlanuvchi o'rtacha (barcha materiallar uchun birdaniga)"""
+    materials, days = series.shape
+    starts = np.zeros(materials, dtype=int) if starts is None else starts
+    cumulative = np.concatenate([np.zeros((materials, 1)), np.cumsum(series, axis=1)], axis=1)
+
+    steps = np.broadcast_to(np.arange(days + 1), (materials, days + 1))
+    lower = np.minimum(np.maximum(steps - window, starts[:, np.newaxis]), steps)
+    counts = np.maximum(steps - lower, 1)
+
+    return (cumulative - np.take_along_axis(cumulative, lower, axis=1)) / counts
+
+def exponential_smoothing(series: np.ndarray, alpha: float, starts: Optional[np.ndarray] = None) -> np.ndarray:
+    """Oddiy eksponensial tekislash (daraja birinchi kuzatuv bilan boshlanadi)"""
+    materials, days = series.shape
+    starts = np.zeros(materials, dtype=int) if starts is None else starts
+    fitted = np.empty((materials, days + 1))
+
+    first = np.minimum(starts, max(days - 1, 0))
+    level = series[np.arange(materials), first] if days else np.zeros(materials)
+    fitted[:, 0] = level
+
+    for k in range(days):
+        level = np.where(k >= starts, alpha * series[:, k] + (1 - alpha) * level, level)
+        fitted[:, k + 1] = level
+
+    return fitted
+
+def croston(series: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Croston usuli - vaqti-vaqti bilan bo'ladigan (intermittent) talab uchun
+
+    Birinchi talabgacha bo'lgan kunlar intervalga qo'shilmaydi (boshlang'ich interval 1).
+    """
+    materials, days = series.shape
+    fitted = np.zeros((materials, days + 1))
+
+    demand = np.zeros(materials)      # Talab hajmi bahosi
+    interval = np.ones(materials)     # Talablar orasidagi interval bahosi
+    periods = np.ones(materials)      # Oxirgi talabdan beri o'tgan kunlar
+    seen = np.zeros(materials, dtype=bool)
+
+    for k in range(days):
+        fitted[:, k] = np.where(seen, demand / interval, 0)
+
+        value = series[:, k]
+        hit = value > 0
+        first = hit & ~seen
+        update = hit & seen
+
+        demand = np.where(first, value, np.where(update, alpha * value + (1 - alpha) * demand, demand))
+        interval = np.where(update, alpha * periods + (1 - alpha) * interval, interval)
+
+        seen |= hit
+        periods = np.where(hit, 1, periods + 1)
+
+    fitted[:, days] = np.where(seen, demand / interval, 0)
+    return fitted
+
+def forecast_daily_usage(series: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Har bir material uchun eng yaxshi modelni tanlab, kunlik sarfni bashorat qilish
+
+    Model bir qadam oldingi o'rtacha mutlaq xato (MAE) bo'yicha tanlanadi,
+    nol kunlar ko'p bo'lgan materiallar uchun esa Croston ishlatiladi.
+    Xato va nol kunlar ulushi faqat birinchi kuzatuvdan keyingi kunlar bo'yicha.
+
+    Returns:
+        Dict: usage (kunlik sarf), sigma (xato og'ishi), model (model indeksi)
+    """
+    materials, days = series.shape
+
+    if materials == 0 or days == 0:
+        empty = np.zeros(materials)
+        return {'usage': empty, 'sigma': empty, 'model': empty.astype(int)}
+
+    starts = series_starts(series)
+    active = np.arange(days)[np.newaxis, :] >= starts[:, np.newaxis]  # [materiallar x kunlar]
+    active_days = np.maximum(active.sum(axis=1), 1)
+
+    fits = np.stack([
+        moving_average(series, FORECAST_SETTINGS['moving_average_window'], starts),
+        exponential_smoothing(series, FORECAST_SETTINGS['ses_alpha'], starts),
+        croston(series, FORECAST_SETTINGS['croston_alpha'])
+    ])  # [modellar x materiallar x (kunlar + 1)]
+
+    errors = np.abs(fits[:, :, :-1] - series[np.newaxis]) * active[np.newaxis]
+    best = (errors.sum(axis=2) / active_days).argmin(axis=0)
+
+    # Intermittent talab uchun Croston
+    zero_share = ((series == 0) & active).sum(axis=1) / active_days
+    best = np.where(zero_share >= FORECAST_SETTINGS['intermittent_threshold'],
+                    MODEL_NAMES.index("croston"), best)
+
+    rows = np.arange(materials)
+    usage = fits[best, rows, -1]
+    residuals = (fits[best, rows, :-1] - series) * active
+    mean = residuals.sum(axis=1) / active_days
+    sigma = np.sqrt((((residuals - mean[:, np.newaxis]) * active) ** 2).sum(axis=1) / active_days)
+
+    return {'usage': usage, 'sigma': sigma, 'model': best}
+
+# =============== QAYTA BUYURTMA NUQTALARI ===============
+def refresh_reorder_points(db: Optional[Session] = None) -> int:
+    """
+    Barcha xom ashyolar uchun prognoz va qayta buyurtma nuqtasini yangilash
+
+    Returns:
+        int: Yangilangan materiallar soni
+    """
+    if db is None:
+        with get_db_session() as session:
+            return refresh_reorder_points(session)
+
+    material_ids, series = load_daily_consumption(db)
+    if not material_ids:
+        return 0
+
+    forecast = forecast_daily_usage(series)
+    materials = {
+        material.id: material
+        for material in db.query(models.RawMaterial).filter(models.RawMaterial.id.in_(material_ids))
+    }
+
+    now = datetime.utcnow()
+    z = FORECAST_SETTINGS['service_level_z']
+
+    for i, material_id in enumerate(material_ids):
+        material = materials.get(material_id)
+        if material is None:
+            continue
+
+        daily_usage = float(forecast['usage'][i])
+        lead_time = material.lead_time_days or FORECAST_SETTINGS['default_lead_time_days']
+        current_stock = material.current_stock or 0
+
+        material.daily_usage_forecast = round(daily_usage, 4)
+        material.forecast_model = MODEL_NAMES[int(forecast['model'][i])]
+        material.forecast_updated_at = now
+
+        if daily_usage <= 0:
+            # Sarf yo'q - statik min_stock ishlatiladi
+            material.reorder_point = None
+            material.projected_stockout_date = None
+            continue
+
+        safety_stock = z * float(forecast['sigma'][i]) * math.sqrt(lead_time)
+        result = WarehouseCalculator.calculate_reorder_point(
+            current_stock=current_stock,
+            daily_usage=daily_usage,
+            lead_time_days=lead_time,
+            safety_stock=safety_stock
+        )
+
+        material.reorder_point = result['reorder_point']
+        material.projected_stockout_date = now + timedelta(days=current_stock / daily_usage)
+
+    db.commit()
+    logger.info(f"Reorder points refreshed for {len(material_ids)} materials")
+
+    return len(material_ids)
+
+def days_until_stockout(material: models.RawMaterial) -> Optional[float]:
+    """Joriy qoldiq va prognoz bo'yicha necha kunga yetishi"""
+    if not material.daily_usage_forecast:
+        return None
+    return (material.current_stock or 0) / material.daily_usage_forecast
@@ -14,15 +14,10 @@ from typing import Dict, List, Optional, Any, Union, Tuple
 from decimal import Decimal
 from pathlib import Path
 
-# QR kod va JWT uchun
-try:
-    import qrcode
-    from PIL import Image
-    import jwt
-    QR_AVAILABLE = True
-except ImportError:
-    QR_AVAILABLE = False
-    print("QR code yoki JWT kutubxonalari o'rnatilmagan")
+# QR kod va JWT uchun - kutubxonalar faqat tekshiriladi, import funksiya ichida
+from importlib.util import find_spec
+
+QR_AVAILABLE = all(find_spec(name) is not None for name in ("qrcode", "PIL", "jwt"))
 
 
 class HelperUtils:
@@ -230,6 +225,8 @@ class HelperUtils:
             print("QR code kutubxonasi o'rnatilmagan")
             return None
         
+        import qrcode
+        
         try:
             # Papka yaratish
             Path(save_path).mkdir(parents=True, exist_ok=True)
@@ -279,6 +276,9 @@ class HelperUtils:
             str: JWT token
         """
         try:
+            # PyJWT faqat token kerak bo'lganda yuklanadi; o'rnatilmagan bo'lsa "" qaytadi
+            import jwt
+            
             payload = data.copy()
             
             # Amal qilish muddati
@@ -317,8 +317,13 @@ class HelperUtils:
             Optional[Dict]: Dekodlangan ma'lumotlar yoki None
         """
         try:
+            import jwt
+            
             payload = jwt.decode(token, secret_key, algorithms=algorithms)
             return payload
+        except ImportError:
+            print("JWT kutubxonasi (PyJWT) o'rnatilmagan")
+            return None
         except jwt.ExpiredSignatureError:
             print("Token muddati tugagan")
             return None
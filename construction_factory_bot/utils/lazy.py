@@ -0,0 +1,56 @@
+"""
+Kechiktirilgan import - og'ir kutubxonalar (pandas, matplotlib, openpyxl, numpy) birinchi ishlatilganda yuklanadi
+
+Handler modullari hisobot/grafik funksiyalarini lazy_import orqali oladi,
+shuning uchun bot ishga tushishi bu kutubxonalarni kutmaydi.
+"""
+import importlib
+import logging
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class LazyCallable:
+    """Birinchi chaqiruvda modulni import qiladigan funksiya o'rinbosari"""
+
+    __slots__ = ("module", "name", "_target")
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+        self._target: Optional[Any] = None
+
+    def resolve(self) -> Any:
+        if self._target is None:
+            started = time.perf_counter()
+            target = getattr(importlib.import_module(self.module), self.name)
+            logger.debug(f"Lazy import {self.module}.{self.name} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+            self._target = target
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._target is not None else "pending"
+        return f"<LazyCallable {self.module}.{self.name} ({state})>"
+
+def lazy_import(module: str, *names: str):
+    """
+    Modul funksiyalari uchun lazy o'rinbosarlar
+
+    Misol:
+        create_stock_chart, = lazy_import("utils.charts", "create_stock_chart")
+    """
+    return tuple(LazyCallable(module, name) for name in names)
+
+def preload(*modules: str) -> float:
+    """Modullarni oldindan yuklash (fon threadida chaqiriladi), sarflangan vaqt soniyada"""
+    started = time.perf_counter()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.warning(f"Preload failed for {module}: {e}")
+    return time.perf_counter() - started
@@ -0,0 +1,164 @@
+"""
+Webhook load-test - yozib olingan update larni serverga qayta yuborish
+
+Misol:
+    # 1. Telegram API o'rniga stub server (bot javoblari tashqariga chiqmaydi)
+    python -m utils.loadtest --stub-api 8081
+
+    # 2. Worker larni stub ga yo'naltirib ishga tushirish
+    TELEGRAM_API_BASE=http://127.0.0.1:8081 python main.py --webhook --workers 4
+
+    # 3. Yozib olingan update larni yuborish (WEBHOOK_RECORD_PATH bilan yig'ilgan)
+    python -m utils.loadtest updates.jsonl --concurrency 50 --repeat 20
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List
+
+from aiohttp import ClientSession, ClientTimeout, web
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import INTEGRATION_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# =============== UPDATE LARNI YUKLASH ===============
+def load_updates(path: str) -> List[Dict]:
+    """JSONL fayldan update larni o'qish"""
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def percentile(values: List[float], percent: float) -> float:
+    """Tartiblangan ro'yxatdan persentil"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+# =============== QAYTA YUBORISH ===============
+async def replay(updates: List[Dict], url: str, secret: str,
+                 concurrency: int = 20, repeat: int = 1) -> Dict:
+    """
+    Update larni parallel yuborish va kechikishlarni o'lchash
+
+    Har bir nusxada update_id o'zgartiriladi, shunda takroriy update lar ham qayta ishlanadi.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    update_ids = itertools.count(1)
+
+    for _ in range(repeat):
+        for update in updates:
+            queue.put_nowait(dict(update, update_id=next(update_ids)))
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+
+    async def worker(session: ClientSession):
+        nonlocal errors
+        while True:
+            try:
+                update = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=update, headers={SECRET_HEADER: secret}) as response:
+                    await response.read()
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+            except Exception as e:
+                errors += 1
+                logger.debug(f"Request failed: {e}")
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    total = queue.qsize()
+    started = time.perf_counter()
+
+    async with ClientSession(timeout=ClientTimeout(total=60)) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+
+    duration = time.perf_counter() - started
+    latencies.sort()
+
+    return {
+        'requests': total,
+        'errors': errors,
+        'statuses': statuses,
+        'duration': duration,
+        'throughput': total / duration if duration else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000
+    }
+
+# =============== TELEGRAM API STUB ===============
+async def stub_api_method(request: web.Request) -> web.Response:
+    """Bot API metodlariga soxta muvaffaqiyatli javob"""
+    method = request.match_info['method'].lower()
+    params = dict(await request.post()) if request.can_read_body else {}
+
+    if method.startswith(("send", "edit")):
+        chat_id = params.get("chat_id", 0)
+        result = {
+            "message_id": int(time.time() * 1000) % 2_000_000_000,
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id) if str(chat_id).lstrip("-").isdigit() else 0, "type": "private"},
+            "text": params.get("text", "")
+        }
+    else:
+        result = True
+
+    return web.json_response({"ok": True, "result": result})
+
+def run_stub_api(port: int):
+    """Telegram Bot API o'rnini bosuvchi lokal server (TELEGRAM_API_BASE uchun)"""
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", stub_api_method)
+    web.run_app(app, host="127.0.0.1", port=port)
+
+def print_report(result: Dict):
+    print(f"So'rovlar:      {result['requests']} (xatolar: {result['errors']}, statuslar: {result['statuses']})")
+    print(f"Davomiylik:     {result['duration']:.2f} s")
+    print(f"O'tkazuvchanlik: {result['throughput']:.1f} update/s")
+    print(f"Kechikish:      p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+          f"p99 {result['p99_ms']:.1f} ms, max {result['max_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Webhook load-test")
+    parser.add_argument("updates", nargs="?", help="Yozib olingan update lar (JSONL)")
+    parser.add_argument("--url", default=None, help="Webhook manzili")
+    parser.add_argument("--secret", default=None, help="Maxfiy token (standart - config dan)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=1, help="Update lar necha marta takrorlanadi")
+    parser.add_argument("--stub-api", type=int, metavar="PORT", help="Faqat Telegram API stub ni ishga tushirish")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.stub_api:
+        run_stub_api(args.stub_api)
+    elif not args.updates:
+        parser.error("updates fayli yoki --stub-api kerak")
+    else:
+        from webhook import get_webhook_secret
+
+        url = args.url or (
+            f"http://127.0.0.1:{INTEGRATION_SETTINGS['api_port']}{INTEGRATION_SETTINGS['webhook_path']}"
+        )
+        result = asyncio.run(replay(
+            load_updates(args.updates), url, args.secret or get_webhook_secret(),
+            concurrency=args.concurrency, repeat=args.repeat
+        ))
+        print_report(result)
@@ -0,0 +1,173 @@
+"""
+Logging - navbat orqali (QueueHandler/QueueListener), JSON formatda, kunlik aylantirish bilan
+
+Event loop threadida faqat yozuv navbatga qo'yiladi; formatlash, diskka yozish
+va fayllarni siqish alohida listener threadida bajariladi.
+"""
+import atexit
+import copy
+import gzip
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import Optional
+
+from config import LOGGING_SETTINGS, LOGS_DIR
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# LogRecord ning standart atributlari - qolganlari (extra=...) JSON ga qo'shiladi
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_exception_formatter = logging.Formatter()
+
+# =============== FORMATTER ===============
+class JsonFormatter(logging.Formatter):
+    """Har bir yozuvni bitta JSON qator sifatida"""
+
+    def __init__(self, worker: str = "0"):
+        super().__init__()
+        self.worker = worker
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "worker": self.worker,
+            "thread": record.threadName
+        }
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                data[key] = value
+
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+# =============== HANDLER LAR ===============
+class CompressingRotatingFileHandler(TimedRotatingFileHandler):
+    """Yarim tunda aylanadigan va eski faylni gzip qiladigan handler"""
+
+    def __init__(self, filename: str, backup_count: int, compress: bool):
+        super().__init__(filename, when="midnight", backupCount=backup_count, encoding="utf-8", delay=True)
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source: str, dest: str):
+        with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+class DropOnFullQueueHandler(QueueHandler):
+    """Navbat to'lsa kutmasdan yozuvni tashlaydi"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Xabar va traceback ni matnga aylantirish (xabar ichiga qo'shmasdan)"""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class DebugSamplingFilter(logging.Filter):
+    """DEBUG yozuvlarning faqat bir qismini o'tkazish (yuqori hajmli loglar uchun)"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+# =============== SOZLASH ===============
+def get_log_file() -> str:
+    """
+    Joriy jarayon log fayli
+
+    Webhook worker lari (BOT_WORKER_INDEX o'rnatilgan) alohida faylga yozadi,
+    shunda bir nechta jarayon bitta faylni aylantirishda to'qnashmaydi.
+    """
+    worker = os.getenv("BOT_WORKER_INDEX")
+    name = LOGGING_SETTINGS['file_name']
+    if worker is not None:
+        stem, ext = os.path.splitext(name)
+        name = f"{stem}-worker{worker}{ext}"
+    return str(LOGS_DIR / name)
+
+def setup_logging() -> QueueListener:
+    """Root logger ni navbatli handler ga o'tkazish (takroriy chaqiruv xavfsiz)"""
+    global _listener
+
+    if _listener is not None:
+        return _listener
+
+    worker = os.getenv("BOT_WORKER_INDEX", "0")
+
+    file_handler = CompressingRotatingFileHandler(
+        get_log_file(), LOGGING_SETTINGS['backup_count'], LOGGING_SETTINGS['compress']
+    )
+    file_handler.setFormatter(
+        JsonFormatter(worker) if LOGGING_SETTINGS['json'] else logging.Formatter(TEXT_FORMAT)
+    )
+    handlers = [file_handler]
+
+    if LOGGING_SETTINGS['console']:
+        console_handler = logging.StreamHandler()
+        console_format = TEXT_FORMAT if worker == "0" else TEXT_FORMAT.replace("%(name)s", f"worker-{worker} - %(name)s")
+        console_handler.setFormatter(logging.Formatter(console_format))
+        handlers.append(console_handler)
+
+    log_queue: queue.Queue = queue.Queue(LOGGING_SETTINGS['queue_size'])
+    queue_handler = DropOnFullQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSamplingFilter(LOGGING_SETTINGS['debug_sample_rate']))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOGGING_SETTINGS['level'])
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    return _listener
+
+def stop_logging():
+    """Navbatdagi yozuvlarni diskka yozib, listener ni to'xtatish"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,311 @@
+"""
+Update lar bo'yicha kechikish va o'tkazuvchanlik metrikalari (Prometheus formatida)
+
+- har bir handler uchun kechikish histogrammasi
+- har bir update dagi DB vaqti va so'rovlar soni (SQLAlchemy hodisalari orqali)
+- Telegram API chaqiruvlari vaqti (metod bo'yicha va har bir handler update ida)
+- hozir qayta ishlanayotgan update lar soni
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.types import TelegramObject
+from sqlalchemy import event
+
+from database import models
+from config import METRICS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# =============== HISTOGRAMMA ===============
+class Histogram:
+    """Belgilangan chegaralar bo'yicha histogramma"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Oxirgisi - +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Chegaralar orasida chiziqli interpolyatsiya bilan taxminiy kvantil"""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+
+        return self.buckets[-1]
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + ["+Inf"], self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+# =============== UPDATE KONTEKSTI ===============
+class UpdateStats:
+    """Bitta update davomida yig'iladigan ko'rsatkichlar"""
+    __slots__ = ("handler", "db_time", "db_queries", "api_time", "api_calls")
+
+    def __init__(self):
+        self.handler = "unhandled"
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.api_time = 0.0
+        self.api_calls = 0
+
+current_update: ContextVar[Optional[UpdateStats]] = ContextVar("current_update", default=None)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# =============== REESTR ===============
+class MetricsRegistry:
+    """Jarayon ichidagi barcha metrikalar"""
+
+    def __init__(self):
+        self.worker = os.getenv("BOT_WORKER_INDEX", "0")
+        self.in_flight = 0
+        self.updates_total: Dict[Tuple[str, str], int] = {}
+        self.handler_latency: Dict[str, Histogram] = {}
+        self.handler_db_time: Dict[str, Histogram] = {}
+        self.handler_db_queries: Dict[str, Histogram] = {}
+        self.handler_api_time: Dict[str, Histogram] = {}
+        self.handler_api_calls: Dict[str, Histogram] = {}
+        self.api_latency: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _histogram(store: Dict[str, Histogram], key: str, buckets: List[float]) -> Histogram:
+        histogram = store.get(key)
+        if histogram is None:
+            histogram = store[key] = Histogram(buckets)
+        return histogram
+
+    def update_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def update_finished(self, stats: UpdateStats, duration: float, status: str):
+        latency_buckets = METRICS_SETTINGS['latency_buckets']
+
+        with self._lock:
+            self.in_flight -= 1
+            key = (stats.handler, status)
+            self.updates_total[key] = self.updates_total.get(key, 0) + 1
+
+            self._histogram(self.handler_latency, stats.handler, latency_buckets).observe(duration)
+            self._histogram(self.handler_db_time, stats.handler, latency_buckets).observe(stats.db_time)
+            self._histogram(
+                self.handler_db_queries, stats.handler, METRICS_SETTINGS['query_buckets']
+            ).observe(stats.db_queries)
+            self._histogram(self.handler_api_time, stats.handler, latency_buckets).observe(stats.api_time)
+            self._histogram(
+                self.handler_api_calls, stats.handler, METRICS_SETTINGS['query_buckets']
+            ).observe(stats.api_calls)
+
+    def api_call(self, method: str, duration: float):
+        with self._lock:
+            self._histogram(self.api_latency, method, METRICS_SETTINGS['latency_buckets']).observe(duration)
+
+    def render(self) -> str:
+        """Prometheus text formatidagi natija"""
+        worker = f'worker="{self.worker}"'
+        lines = [
+            "# HELP bot_updates_in_flight Hozir qayta ishlanayotgan update lar",
+            "# TYPE bot_updates_in_flight gauge",
+            f"bot_updates_in_flight{{{worker}}} {self.in_flight}",
+            "# HELP bot_updates_total Qayta ishlangan update lar",
+            "# TYPE bot_updates_total counter",
+        ]
+
+        with self._lock:
+            for (handler, status), count in sorted(self.updates_total.items()):
+                lines.append(
+                    f'bot_updates_total{{{worker},handler="{_escape(handler)}",status="{status}"}} {count}'
+                )
+
+            for name, help_text, store, label in (
+                ("bot_handler_latency_seconds", "Handler kechikishi", self.handler_latency, "handler"),
+                ("bot_handler_db_seconds", "Update dagi DB vaqti", self.handler_db_time, "handler"),
+                ("bot_handler_db_queries", "Update dagi SQL so'rovlar soni", self.handler_db_queries, "handler"),
+                ("bot_handler_api_seconds", "Update dagi Telegram API vaqti", self.handler_api_time, "handler"),
+                ("bot_handler_api_calls", "Update dagi Telegram API chaqiruvlari soni", self.handler_api_calls, "handler"),
+                ("bot_telegram_api_seconds", "Telegram API chaqiruvi vaqti", self.api_latency, "method"),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(store.items()):
+                    lines.extend(histogram.render(name, f'{worker},{label}="{_escape(key)}"'))
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self, limit: int = 10) -> Dict[str, Any]:
+        """Admin komandasi uchun eng sekin handlerlar (p95 bo'yicha)"""
+        with self._lock:
+            handlers = [
+                {
+                    'handler': handler,
+                    'count': histogram.count,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'db_time': self.handler_db_time[handler].mean,
+                    'db_queries': self.handler_db_queries[handler].mean,
+                    'api_time': self.handler_api_time[handler].mean,
+                    'api_calls': self.handler_api_calls[handler].mean
+                }
+                for handler, histogram in self.handler_latency.items()
+            ]
+            api = [
+                {'method': method, 'count': histogram.count, 'p95': histogram.quantile(0.95)}
+                for method, histogram in self.api_latency.items()
+            ]
+
+        handlers.sort(key=lambda item: item['p95'], reverse=True)
+        api.sort(key=lambda item: item['p95'], reverse=True)
+
+        return {'in_flight': self.in_flight, 'handlers': handlers[:limit], 'api': api[:limit]}
+
+metrics_registry = MetricsRegistry()
+
+# =============== MIDDLEWARE LAR ===============
+class MetricsMiddleware(BaseMiddleware):
+    """Tashqi update middleware - butun update vaqtini o'lchaydi"""
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        stats = UpdateStats()
+        token = current_update.set(stats)
+        metrics_registry.update_started()
+
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await handler(event, data)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            metrics_registry.update_finished(stats, time.perf_counter() - started, status)
+            current_update.reset(token)
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Ichki middleware - update ni qaysi handler qayta ishlaganini belgilaydi"""
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        stats = current_update.get()
+        handler_object = data.get("handler")
+        if stats is not None and handler_object is not None:
+            stats.handler = getattr(handler_object.callback, "__name__", "unknown")
+        return await handler(event, data)
+
+class TelegramAPIMetricsMiddleware(BaseRequestMiddleware):
+    """Bot sessiyasi middleware - Telegram API chaqiruvlari vaqti"""
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            duration = time.perf_counter() - started
+            metrics_registry.api_call(type(method).__name__, duration)
+
+            stats = current_update.get()
+            if stats is not None:
+                stats.api_time += duration
+                stats.api_calls += 1
+
+# =============== SQLALCHEMY HODISALARI ===============
+# Boshlanish vaqti so'rov konteksida saqlanadi: xatolik bilan tugagan so'rovda
+# after_cursor_execute chaqirilmaydi, kontekst esa ulanish bilan birga qolmaydi
+_START_ATTR = "_metrics_query_start"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        setattr(context, _START_ATTR, time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, _START_ATTR, None)
+    if started is None:
+        return
+
+    duration = time.perf_counter() - started
+    stats = current_update.get()
+    if stats is not None:
+        stats.db_time += duration
+        stats.db_queries += 1
+
+def install_db_hooks(engine=None):
+    """SQLAlchemy engine ga so'rov vaqtini o'lchovchi hodisalarni ulash (bir marta)"""
+    engine = engine or models.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def setup_metrics(dp: Dispatcher, bot: Bot):
+    """Dispatcher va bot ga metrika middleware larini ulash"""
+    if not METRICS_SETTINGS['enabled']:
+        return
+
+    dp.update.outer_middleware(MetricsMiddleware())
+    dp.message.middleware(HandlerNameMiddleware())
+    dp.callback_query.middleware(HandlerNameMiddleware())
+    bot.session.middleware(TelegramAPIMetricsMiddleware())
+    install_db_hooks()
+
+# =============== HTTP ENDPOINT ===============
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(
+        body=metrics_registry.render().encode(),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
+
+async def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[web.AppRunner]:
+    """
+    Alohida /metrics server (standart - faqat lokal interfeys)
+
+    Polling rejimida bitta; webhook rejimida har bir worker o'z portida (port + worker indeksi).
+    """
+    port = METRICS_SETTINGS['port'] if port is None else port
+    host = host or METRICS_SETTINGS['host']
+    if not METRICS_SETTINGS['enabled'] or not port:
+        return None
+
+    app = web.Application()
+    app.router.add_get(METRICS_SETTINGS['path'], metrics_handler)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Metrics endpoint: http://{host}:{port}{METRICS_SETTINGS['path']}")
+    return runner
@@ -12,10 +12,17 @@ from sqlalchemy.orm import Session
 
 from database.session import get_db_session
 from database import crud, models
-from config import ADMIN_IDS, NOTIFICATION_TYPES
+from database.audit import get_log_counts
+from config import ADMIN_IDS, NOTIFICATION_TYPES, FORECAST_SETTINGS
+from utils.lazy import lazy_import
 
 logger = logging.getLogger(__name__)
 
+# numpy birinchi prognozda yuklanadi
+refresh_reorder_points, days_until_stockout = lazy_import(
+    "utils.forecasting", "refresh_reorder_points", "days_until_stockout"
+)
+
 # Global bot instance (main.py dan set qilinadi)
 bot_instance: Optional[Bot] = None
 
@@ -281,10 +288,21 @@ async def check_low_stock_notifications() -> int:
         for material in low_stock_materials:
             # Har bir material uchun alohida bildirishnoma
             title = f"⚠️ Xom ashyo tugab qolmoqda: {material.name}"
+            days_left = days_until_stockout(material)
+            forecast_text = ""
+            if days_left is not None:
+                stockout_date = (datetime.utcnow() + timedelta(days=days_left)).strftime('%Y-%m-%d')
+                forecast_text = (
+                    f"📈 *Kunlik sarf (prognoz):* {material.daily_usage_forecast:,.1f} {material.unit}\n"
+                    f"🔁 *Qayta buyurtma nuqtasi:* {material.reorder_point:,.1f} {material.unit}\n"
+                    f"⏳ *Taxminiy tugash sanasi:* {stockout_date} ({days_left:.1f} kun)\n"
+                )
+            
             message = (
                 f"*{material.name}* xom ashyosi tugab qolmoqda!\n\n"
                 f"📊 *Joriy qoldiq:* {material.current_stock} {material.unit}\n"
                 f"📉 *Minimal qoldiq:* {material.min_stock} {material.unit}\n"
+                f"{forecast_text}"
                 f"💰 *Narxi:* {material.price_per_unit:,.0f} so'm/{material.unit}\n\n"
                 f"🚨 *Zarur amallar:*\n"
                 f"1. Yangi xom ashyo buyurtma qiling\n"
@@ -411,21 +429,17 @@ async def check_system_notifications() -> int:
         # 1. Database hajmini tekshirish
         # (Bu PostgreSQL uchun, SQLite uchun boshqa query)
         
-        # 2. Xatolik loglarini tekshirish
-        error_logs = db.query(models.SystemLog).filter(
-            models.SystemLog.created_at >= datetime.utcnow() - timedelta(hours=24)
-        ).all()
-        
-        error_count = len([log for log in error_logs if "error" in log.action.lower() or "xatolik" in log.action.lower()])
+        # 2. Xatolik loglarini tekshirish (level ustuni bo'yicha, bazaning o'zida sanaladi)
+        total_logs, error_count = get_log_counts(db, datetime.utcnow() - timedelta(hours=24))
         
         if error_count > 10:
             title = f"🚨 {error_count} ta xatolik aniqlandi (24 soat)"
             message = (
                 f"Tizimda 24 soat ichida {error_count} ta xatolik aniqlandi.\n\n"
                 f"📊 *Statistika:*\n"
-                f"• Jami loglar: {len(error_logs)} ta\n"
+                f"• Jami loglar: {total_logs} ta\n"
                 f"• Xatoliklar: {error_count} ta\n"
-                f"• Xatolik foizi: {(error_count/len(error_logs)*100) if error_logs else 0:.1f}%\n\n"
+                f"• Xatolik foizi: {(error_count/total_logs*100) if total_logs else 0:.1f}%\n\n"
                 f"🔍 *Tavsiyalar:*\n"
                 "1. Tizim loglarini tekshiring\n"
                 "2. Muammoni bartaraf eting\n"
@@ -1087,12 +1101,21 @@ async def notification_background_task():
     """Bildirishnoma fon vazifasi"""
     
     manager = NotificationManager()
+    last_forecast: Optional[datetime] = None
     
     while True:
         try:
             # Har 5 daqiqada avtomatik tekshiruv
             await asyncio.sleep(300)
             
+            # Talab prognozi va qayta buyurtma nuqtalarini yangilash
+            forecast_interval = timedelta(hours=FORECAST_SETTINGS['refresh_interval_hours'])
+            if FORECAST_SETTINGS['enabled'] and (
+                last_forecast is None or datetime.utcnow() - last_forecast >= forecast_interval
+            ):
+                await asyncio.to_thread(refresh_reorder_points)
+                last_forecast = datetime.utcnow()
+            
             # Barcha bildirishnomalarni tekshirish
             await manager.check_all_notifications()
             
@@ -0,0 +1,143 @@
+"""
+Sotuv jarayonining FSM holati - ixcham savat va tekshiriladigan sxema
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from aiogram.fsm.context import FSMContext
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_METHODS = ("cash", "card", "transfer", "credit")
+
+@dataclass
+class SaleCart:
+    """
+    Savat: parallel massivlar (mahsulot ID, miqdor, narx) va jami summa
+
+    Mahsulot qo'shish O(1): indeks orqali qatorni topib, jami summaga qo'shiladi.
+    """
+    product_ids: List[int] = field(default_factory=list)
+    quantities: List[float] = field(default_factory=list)
+    prices: List[float] = field(default_factory=list)
+    total: float = 0.0
+
+    def __post_init__(self):
+        self._index: Dict[int, int] = {product_id: i for i, product_id in enumerate(self.product_ids)}
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    def add(self, product_id: int, quantity: float, price: float) -> float:
+        """
+        Mahsulot qo'shish (bir xil mahsulot qayta qo'shilsa miqdori oshadi)
+
+        Returns:
+            float: Qo'shilgan qism summasi
+        """
+        row = self._index.get(product_id)
+        if row is None:
+            self._index[product_id] = len(self.product_ids)
+            self.product_ids.append(product_id)
+            self.quantities.append(quantity)
+            self.prices.append(price)
+        else:
+            # Narx birinchi qo'shilgandagi qiymatda qoladi
+            self.quantities[row] += quantity
+            price = self.prices[row]
+
+        amount = quantity * price
+        self.total += amount
+        return amount
+
+    def quantity_of(self, product_id: int) -> float:
+        """Savatdagi mahsulot miqdori"""
+        row = self._index.get(product_id)
+        return self.quantities[row] if row is not None else 0.0
+
+    def lines(self) -> Iterator[Tuple[int, float, float, float]]:
+        """(mahsulot ID, miqdor, narx, summa) qatorlari"""
+        for product_id, quantity, price in zip(self.product_ids, self.quantities, self.prices):
+            yield product_id, quantity, price, quantity * price
+
+    def to_state(self) -> Dict:
+        return {"i": self.product_ids, "q": self.quantities, "p": self.prices, "t": self.total}
+
+    @classmethod
+    def from_state(cls, data: Optional[Dict]) -> "SaleCart":
+        """FSM ma'lumotidan savatni tiklash (noto'g'ri bo'lsa ValueError)"""
+        if not data:
+            return cls()
+
+        product_ids = [int(value) for value in data.get("i", [])]
+        quantities = [float(value) for value in data.get("q", [])]
+        prices = [float(value) for value in data.get("p", [])]
+
+        if not len(product_ids) == len(quantities) == len(prices):
+            raise ValueError("Savat massivlari uzunligi mos emas")
+        if len(set(product_ids)) != len(product_ids):
+            raise ValueError("Savatda takroriy mahsulot bor")
+        if any(quantity <= 0 for quantity in quantities) or any(price < 0 for price in prices):
+            raise ValueError("Savatda noto'g'ri miqdor yoki narx")
+
+        return cls(product_ids, quantities, prices, float(data.get("t", 0.0)))
+
+@dataclass
+class SaleState:
+    """Sotuv FSM ma'lumotlari sxemasi (state da qisqa kalitlar bilan saqlanadi)"""
+    category_index: int = 0
+    selected_product_id: Optional[int] = None
+    cart: SaleCart = field(default_factory=SaleCart)
+    customer_phone: Optional[str] = None
+    customer_name: Optional[str] = None
+    payment_method: str = "cash"
+    # Sotuv boshlanganda olingan qoldiqlar (mahsulot ID -> mavjud miqdor)
+    stock: Dict[int, float] = field(default_factory=dict)
+
+    def to_state(self) -> Dict:
+        data = {"cat": self.category_index, "cart": self.cart.to_state(), "pay": self.payment_method}
+        if self.stock:
+            data["stock"] = {str(product_id): quantity for product_id, quantity in self.stock.items()}
+        if self.selected_product_id is not None:
+            data["sel"] = self.selected_product_id
+        if self.customer_phone:
+            data["phone"] = self.customer_phone
+        if self.customer_name:
+            data["name"] = self.customer_name
+        return data
+
+    @classmethod
+    def from_state(cls, data: Dict) -> "SaleState":
+        """FSM ma'lumotini tekshirib, sxemaga aylantirish (noto'g'ri bo'lsa ValueError)"""
+        category_index = int(data.get("cat", 0))
+        if category_index < 0:
+            raise ValueError("Kategoriya indeksi manfiy bo'lishi mumkin emas")
+
+        payment_method = data.get("pay", "cash")
+        if payment_method not in PAYMENT_METHODS:
+            raise ValueError(f"Noma'lum to'lov usuli: {payment_method}")
+
+        selected = data.get("sel")
+
+        return cls(
+            category_index=category_index,
+            selected_product_id=int(selected) if selected is not None else None,
+            cart=SaleCart.from_state(data.get("cart")),
+            customer_phone=data.get("phone"),
+            customer_name=data.get("name"),
+            payment_method=payment_method,
+            stock={int(product_id): float(quantity) for product_id, quantity in data.get("stock", {}).items()}
+        )
+
+async def load_sale_state(state: FSMContext) -> SaleState:
+    """FSM dan sotuv holatini o'qish (buzilgan bo'lsa bo'sh holat)"""
+    try:
+        return SaleState.from_state(await state.get_data())
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Invalid sale state discarded: {e}")
+        return SaleState()
+
+async def save_sale_state(state: FSMContext, sale: SaleState):
+    """Sotuv holatini FSM ga yozish"""
+    await state.set_data(sale.to_state())
@@ -0,0 +1,184 @@
+"""
+Ishlab chiqarish rejasi uchun "Agar shunday bo'lsa?" simulyatsiyasi (Monte Carlo)
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from database import models
+from config import PRODUCTION_SETTINGS, SIMULATION_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# =============== REJANI TAYYORLASH ===============
+def build_plan(db: Session, plan: Dict[int, float]) -> Dict:
+    """
+    Ishlab chiqarish rejasini (mahsulot_id -> miqdor) massivlarga aylantirish
+
+    Natija jarayonlar o'rtasida uzatilishi mumkin (faqat numpy massivlari va ro'yxatlar).
+    """
+    products = db.query(models.Product).filter(models.Product.id.in_(list(plan))).all()
+    if not products:
+        raise ValueError("Rejadagi mahsulotlar topilmadi")
+
+    formula_items = db.query(models.ProductFormula).filter(
+        models.ProductFormula.product_id.in_([p.id for p in products])
+    ).all()
+    if not formula_items:
+        raise ValueError("Rejadagi mahsulotlar uchun formula topilmadi")
+
+    material_ids = sorted({item.raw_material_id for item in formula_items})
+    materials = {
+        m.id: m for m in db.query(models.RawMaterial).filter(models.RawMaterial.id.in_(material_ids))
+    }
+
+    product_index = {p.id: i for i, p in enumerate(products)}
+    material_index = {material_id: j for j, material_id in enumerate(material_ids)}
+
+    per_unit = np.zeros((len(products), len(material_ids)))
+    waste = np.zeros((len(products), len(material_ids)))
+
+    for item in formula_items:
+        i = product_index[item.product_id]
+        j = material_index[item.raw_material_id]
+        per_unit[i, j] = item.quantity
+        waste[i, j] = item.waste_percentage if item.waste_percentage is not None \
+            else PRODUCTION_SETTINGS['waste_percentage']
+
+    return {
+        'product_names': [p.name for p in products],
+        'material_names': [materials[m].name for m in material_ids],
+        'material_units': [materials[m].unit for m in material_ids],
+        'quantity': np.array([float(plan[p.id]) for p in products]),
+        'selling_price': np.array([p.selling_price or 0.0 for p in products]),
+        'material_price': np.array([materials[m].price_per_unit or 0.0 for m in material_ids]),
+        'material_stock': np.array([materials[m].current_stock or 0.0 for m in material_ids]),
+        'per_unit': per_unit,
+        'waste': waste
+    }
+
+# =============== SSENARIYLAR ===============
+def simulate_chunk(plan: Dict, scenarios: int, seed) -> Dict[str, np.ndarray]:
+    """Ssenariylar to'plamini vektorlashtirilgan holda hisoblash (bitta jarayonda)"""
+    rng = np.random.default_rng(seed)
+    settings = SIMULATION_SETTINGS
+
+    quantity = plan['quantity']
+    products, materials = plan['per_unit'].shape
+
+    # Chiqindi foizi: [ssenariy x mahsulot x material]
+    waste = np.clip(
+        rng.normal(plan['waste'], settings['waste_std'], size=(scenarios, products, materials)),
+        0.0, 0.95
+    )
+    required = np.einsum('p,pm,spm->sm', quantity, plan['per_unit'], 1.0 + waste)
+
+    # Narxlar log-normal taqsimot bilan
+    material_price = plan['material_price'] * rng.lognormal(
+        0.0, settings['material_price_volatility'], size=(scenarios, materials)
+    )
+    selling_price = plan['selling_price'] * rng.lognormal(
+        0.0, settings['selling_price_volatility'], size=(scenarios, products)
+    )
+
+    # Talab
+    demand = np.maximum(
+        rng.normal(quantity, quantity * settings['demand_cv'], size=(scenarios, products)), 0.0
+    )
+
+    material_cost = (required * material_price).sum(axis=1)
+    overhead = material_cost * (
+        PRODUCTION_SETTINGS['labor_cost_percentage'] + PRODUCTION_SETTINGS['energy_cost_percentage']
+    )
+    revenue = (np.minimum(quantity, demand) * selling_price).sum(axis=1)
+
+    return {
+        'profit': revenue - material_cost - overhead,
+        'shortfall': np.maximum(required - plan['material_stock'], 0.0),
+        'unmet_demand': np.maximum(demand - quantity, 0.0)
+    }
+
+def run_simulation(plan: Dict, scenarios: Optional[int] = None,
+                   workers: Optional[int] = None, seed: Optional[int] = None) -> Dict:
+    """
+    Reja bo'yicha Monte Carlo simulyatsiyasini ishga tushirish
+
+    Args:
+        plan: build_plan() natijasi
+        scenarios: Ssenariylar soni
+        workers: Jarayonlar soni (0/None - barcha yadrolar)
+        seed: Takrorlanuvchanlik uchun boshlang'ich qiymat
+
+    Returns:
+        Dict: Foyda va tanqislik persentillari
+    """
+    scenarios = scenarios or SIMULATION_SETTINGS['scenarios']
+    workers = workers or SIMULATION_SETTINGS['workers'] or os.cpu_count() or 1
+
+    chunk_size = SIMULATION_SETTINGS['chunk_size']
+    chunks = [min(chunk_size, scenarios - start) for start in range(0, scenarios, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    # Hisobotda haqiqatda ishlatilgan jarayonlar soni
+    workers = min(workers, len(chunks))
+
+    if workers == 1:
+        results = [simulate_chunk(plan, size, s) for size, s in zip(chunks, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(simulate_chunk, [plan] * len(chunks), chunks, seeds))
+
+    profit = np.concatenate([r['profit'] for r in results])
+    shortfall = np.concatenate([r['shortfall'] for r in results])
+    unmet_demand = np.concatenate([r['unmet_demand'] for r in results])
+
+    percentiles = SIMULATION_SETTINGS['percentiles']
+    stockout = shortfall > 0
+
+    return {
+        'scenarios': scenarios,
+        'workers': workers,
+        'percentiles': percentiles,
+        'profit': dict(zip(percentiles, np.percentile(profit, percentiles).round(0).tolist())),
+        'profit_mean': float(profit.mean()),
+        'loss_probability': float((profit < 0).mean()),
+        'stockout_probability': float(stockout.any(axis=1).mean()),
+        'materials': [
+            {
+                'name': name,
+                'unit': unit,
+                'stockout_probability': float(stockout[:, j].mean()),
+                'shortfall': dict(zip(percentiles,
+                                      np.percentile(shortfall[:, j], percentiles).round(2).tolist()))
+            }
+            for j, (name, unit) in enumerate(zip(plan['material_names'], plan['material_units']))
+        ],
+        'products': [
+            {
+                'name': name,
+                'unmet_demand': dict(zip(percentiles,
+                                         np.percentile(unmet_demand[:, i], percentiles).round(2).tolist()))
+            }
+            for i, name in enumerate(plan['product_names'])
+        ]
+    }
+
+def parse_plan_text(text: str) -> Dict[int, float]:
+    """'1:100, 2:50' ko'rinishidagi matnni rejaga aylantirish"""
+    plan = {}
+    for part in text.replace(';', ',').split(','):
+        if not part.strip():
+            continue
+        product_id, quantity = part.split(':')
+        quantity = float(quantity)
+        if quantity <= 0:
+            raise ValueError("Miqdor 0 dan katta bo'lishi kerak")
+        plan[int(product_id)] = plan.get(int(product_id), 0) + quantity
+
+    if not plan:
+        raise ValueError("Reja bo'sh")
+    return plan
@@ -0,0 +1,61 @@
+"""
+Single-flight - bir xil kalitli parallel so'rovlar uchun bitta umumiy hisoblash
+
+Birinchi so'rov hisoblashni boshlaydi, qolganlari o'sha natijani kutadi.
+Tugagan natija qisqa muddat (share_seconds) saqlanadi, shunda navbatda
+turgan bir xil so'rovlar ham qayta hisoblamaydi.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Kalit bo'yicha hisoblashlarni birlashtirish"""
+
+    def __init__(self, share_seconds: float = 0.0):
+        self.share_seconds = share_seconds
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._finished_at: Dict[Hashable, float] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def _expire(self, now: float):
+        for key, finished_at in list(self._finished_at.items()):
+            if now - finished_at >= self.share_seconds:
+                del self._finished_at[key]
+                self._calls.pop(key, None)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is not task:
+            return
+        if self.share_seconds and not task.cancelled() and task.exception() is None:
+            self._finished_at[key] = time.monotonic()
+        else:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Hisoblashni bajarish yoki mavjudiga qo'shilish
+
+        Returns:
+            Tuple: (natija, boshqa so'rov bilan bo'lishilganmi)
+        """
+        self._expire(time.monotonic())
+
+        task = self._calls.get(key)
+        shared = task is not None
+
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+            self.executed += 1
+        else:
+            self.shared += 1
+            logger.info(f"Joined in-flight computation: {key}")
+
+        # shield - kutayotganlardan biri bekor qilinsa ham hisoblash boshqalar uchun davom etadi
+        return await asyncio.shield(task), shared
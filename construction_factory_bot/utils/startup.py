@@ -0,0 +1,37 @@
+"""
+Ishga tushish bosqichlari - mustaqil qadamlarni parallel bajarish va vaqtini o'lchash
+
+Har bir bosqich o'z xatosini logga yozadi, boshqa bosqichlarni to'xtatmaydi
+(avvalgi on_startup dagi try/except xatti-harakati saqlanadi).
+"""
+import logging
+import time
+from typing import Awaitable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class StartupPhases:
+    """Bosqichlar vaqti: nom -> soniya (xato bo'lsa None)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings: Dict[str, Optional[float]] = {}
+
+    async def run(self, name: str, step: Awaitable):
+        """Bitta bosqich (corutina yoki asyncio.to_thread natijasi)"""
+        started = time.perf_counter()
+        try:
+            result = await step
+        except Exception as e:
+            self.timings[name] = None
+            logger.error(f"❌ Startup phase '{name}' failed: {e}", exc_info=True)
+            return None
+        self.timings[name] = time.perf_counter() - started
+        return result
+
+    def summary(self) -> str:
+        parts = [
+            f"{name} {'failed' if seconds is None else f'{seconds:.2f}s'}"
+            for name, seconds in self.timings.items()
+        ]
+        return f"{', '.join(parts)}; total {time.perf_counter() - self.started:.2f}s"
@@ -0,0 +1,199 @@
+"""
+Ishga tushish benchmarki - `python -X importtime` bilan main modulini import qilish vaqti
+
+Toza jarayonda import qilinadi (kesh ta'sirisiz), eng qimmat modullar va
+STARTUP_SETTINGS['forbidden_imports'] dagi og'ir kutubxonalar chiqariladi.
+Chegaradan oshsa exit code 1 - CI da kuzatish uchun.
+
+--cold-start: jarayon boshidan on_startup tugashigacha (import, dispatcher,
+migratsiyalar, seeding, keshlar). Bot sessiyasi soxta - Telegram ga so'rov
+ketmaydi; baza vaqtinchalik papkada, birinchi ishga tushish bo'sh bazada,
+keyingilari - tayyor bazada (schema_meta izi mos keladi).
+
+Misol:
+    python -m utils.startup_benchmark --runs 5 --top 15
+    python -m utils.startup_benchmark --cold-start --runs 3
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py BOT_TOKEN siz yuklanmaydi - benchmark Telegram ga ulanmaydi
+os.environ.setdefault("BOT_TOKEN", "0:startup-benchmark")
+
+from config import STARTUP_SETTINGS
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:       123 |       4567 |   package.module"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+@dataclass
+class ImportProfile:
+    """Bitta jarayonning import profili"""
+    wall: float
+    total: float = 0.0
+    cumulative: Dict[str, float] = field(default_factory=dict)
+    self_time: Dict[str, float] = field(default_factory=dict)
+
+    def top(self, limit: int) -> List[tuple]:
+        return sorted(self.cumulative.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def imported(self, packages: List[str]) -> List[str]:
+        roots = {name.split(".")[0] for name in self.cumulative}
+        return [package for package in packages if package in roots]
+
+def profile_import(module: str) -> ImportProfile:
+    """Yangi Python jarayonida modulni -X importtime bilan import qilish"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BOT_DIR, capture_output=True, text=True
+    )
+    profile = ImportProfile(wall=time.perf_counter() - started)
+
+    if completed.returncode != 0:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"'{module}' import qilinmadi:\n" + "\n".join(errors[-10:]))
+
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        profile.cumulative[name] = int(cumulative_us) / 1e6
+        profile.self_time[name] = int(self_us) / 1e6
+        # Eng yuqori darajadagi importlar (1 ta bo'shliq) jami vaqtni beradi
+        if len(indent) == 1:
+            profile.total += int(cumulative_us) / 1e6
+
+    return profile
+
+# =============== COLD START ===============
+# Alohida jarayonda bajariladi: PROCESS_STARTED dan on_startup tugashigacha
+COLD_START_PROBE = """
+import time
+started = time.perf_counter()
+import asyncio, json
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.memory import MemoryStorage
+
+class StubSession(BaseSession):
+    # Telegram API chaqiruvlari tarmoqsiz, darhol qaytadi
+    async def make_request(self, bot, method, timeout=None):
+        return None
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+import main
+imported = time.perf_counter()
+
+async def run():
+    bot = Bot(token=main.BOT_TOKEN, session=StubSession())
+    dp = main.setup_dispatcher(bot, MemoryStorage())
+    configured = time.perf_counter()
+    await main.on_startup(dp)
+    finished = time.perf_counter()
+
+    # on_startup boshlagan fon vazifalarini to'xtatish
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return configured, finished
+
+configured, finished = asyncio.run(run())
+print("COLD_START " + json.dumps({
+    "import": imported - started,
+    "setup": configured - imported,
+    "on_startup": finished - configured,
+    "total": finished - started,
+}))
+"""
+
+def profile_cold_start(workdir: str) -> Dict[str, float]:
+    """Yangi jarayonda botni soxta sessiya bilan on_startup tugashigacha ishga tushirish"""
+    env = dict(
+        os.environ, PYTHONPATH=BOT_DIR, USE_POSTGRESQL="false", BOT_WORKER_INDEX="0",
+        FSM_STORAGE="memory", METRICS_PORT="0"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", COLD_START_PROBE], cwd=workdir, env=env, capture_output=True, text=True
+    )
+
+    for line in completed.stdout.splitlines():
+        if line.startswith("COLD_START "):
+            return json.loads(line[len("COLD_START "):])
+
+    raise RuntimeError("Cold start bajarilmadi:\n" + "\n".join(completed.stderr.splitlines()[-10:]))
+
+def run_cold_start_benchmark(runs: int, budget: float) -> bool:
+    """Birinchi ishga tushish (bo'sh baza) va keyingilari (tayyor baza) alohida"""
+    with tempfile.TemporaryDirectory(prefix="startup_benchmark_") as workdir:
+        # SQLITE_DB_PATH ishchi papkaga nisbatan
+        os.makedirs(os.path.join(workdir, "database"))
+        results = [profile_cold_start(workdir) for _ in range(max(runs, 2))]
+
+    first, warm = results[0], min(results[1:], key=lambda result: result['total'])
+    print(f"Cold start (soxta Bot sessiyasi), {len(results)} marta, chegara: {budget:.2f} s")
+    print(f"\n{'':<22}{'import':>10}{'setup':>10}{'on_startup':>12}{'jami':>10}")
+    for title, result in (("Bo'sh baza", first), ("Tayyor baza (eng yaxshi)", warm)):
+        print(
+            f"{title:<22}{result['import']:>9.3f}s{result['setup']:>9.3f}s"
+            f"{result['on_startup']:>11.3f}s{result['total']:>9.3f}s"
+        )
+
+    within_budget = first['total'] <= budget
+    print(f"\n{'✅' if within_budget else '❌'} Ishga tushish vaqti {'chegarada' if within_budget else 'chegaradan oshdi'}")
+    return within_budget
+
+def run_benchmark(module: str, runs: int, top: int, budget: float) -> bool:
+    profiles = [profile_import(module) for _ in range(runs)]
+    best = min(profiles, key=lambda profile: profile.total)
+
+    print(f"Modul: {module}, {runs} marta (eng yaxshi natija)")
+    print(f"Import vaqti: {best.total:.3f} s, jarayon (interpreter bilan): {best.wall:.3f} s, chegara: {budget:.2f} s")
+    print(f"\n{'Modul':<50}{'cumulative':>12}{'self':>10}")
+    for name, seconds in best.top(top):
+        print(f"{name:<50}{seconds * 1000:>10.1f}ms{best.self_time[name] * 1000:>8.1f}ms")
+
+    forbidden = best.imported(STARTUP_SETTINGS['forbidden_imports'])
+    if forbidden:
+        print(f"\n❌ Ishga tushishda og'ir kutubxonalar import qilindi: {', '.join(forbidden)}")
+    else:
+        print("\n✅ Og'ir kutubxonalar ishga tushishda import qilinmadi")
+
+    within_budget = best.total <= budget
+    print(f"{'✅' if within_budget else '❌'} Import vaqti {'chegarada' if within_budget else 'chegaradan oshdi'}")
+    return within_budget and not forbidden
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="main.py import vaqti benchmarki")
+    parser.add_argument("--module", default="main", help="Import qilinadigan modul")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20, help="Eng qimmat modullar soni")
+    parser.add_argument("--budget", type=float, default=None, help="Chegara (soniya)")
+    parser.add_argument("--cold-start", action="store_true", help="on_startup tugashigacha o'lchash (soxta Bot sessiyasi)")
+    args = parser.parse_args()
+
+    if args.cold_start:
+        budget = STARTUP_SETTINGS['startup_budget'] if args.budget is None else args.budget
+        sys.exit(0 if run_cold_start_benchmark(args.runs, budget) else 1)
+
+    budget = STARTUP_SETTINGS['import_budget'] if args.budget is None else args.budget
+    sys.exit(0 if run_benchmark(args.module, args.runs, args.top, budget) else 1)
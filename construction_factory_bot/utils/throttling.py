@@ -0,0 +1,270 @@
+"""
+So'rovlarni cheklash - foydalanuvchi token bucket lari va og'ir handlerlar uchun adolatli navbat
+
+- har bir update handler narxiga qarab foydalanuvchi bucket idan token sarflaydi
+  (bitta handler bir nechta amalni bajarsa - callback data bo'yicha)
+- og'ir handlerlar (hisobotlar, eksport) umumiy semafor orqali ishlaydi;
+  navbat foydalanuvchilar bo'yicha navbatma-navbat (round-robin) bo'shatiladi,
+  shuning uchun bitta foydalanuvchi boshqalarni to'sib qo'ya olmaydi
+
+Cheklovlar jarayon bo'yicha: webhook worker larining har birida alohida.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Set, Tuple
+
+from aiogram import BaseMiddleware, Dispatcher, Router
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from config import SECURITY_SETTINGS, LIMITS
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT = SECURITY_SETTINGS['rate_limit']
+
+# =============== TOKEN BUCKET ===============
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+class RateLimiter:
+    """Foydalanuvchilar bo'yicha token bucket lar"""
+
+    def __init__(self, capacity: float, refill_per_second: float, max_tracked: int):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_tracked = max_tracked
+        self._buckets: Dict[int, TokenBucket] = {}
+
+    def _refill(self, bucket: TokenBucket, now: float):
+        bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.refill_per_second)
+        bucket.updated = now
+
+    def consume(self, user_id: int, cost: float) -> float:
+        """
+        Token sarflash
+
+        Returns:
+            float: 0 - ruxsat berildi, aks holda kerakli tokenlar yig'ilishigacha soniyalar
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_tracked:
+                self._prune(now)
+            bucket = self._buckets[user_id] = TokenBucket(self.capacity, now)
+        else:
+            self._refill(bucket, now)
+
+        # Narx sig'imdan katta bo'lsa ham to'la bucket bilan bajarish mumkin
+        cost = min(cost, self.capacity)
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            return 0.0
+
+        return (cost - bucket.tokens) / self.refill_per_second
+
+    def refund(self, user_id: int, cost: float):
+        """Bajarilmagan so'rov tokenlarini qaytarish"""
+        bucket = self._buckets.get(user_id)
+        if bucket is not None:
+            bucket.tokens = min(self.capacity, bucket.tokens + cost)
+
+    def _prune(self, now: float):
+        """To'lib bo'lgan (faol bo'lmagan) bucket larni o'chirish"""
+        for user_id, bucket in list(self._buckets.items()):
+            self._refill(bucket, now)
+            if bucket.tokens >= self.capacity:
+                del self._buckets[user_id]
+
+# =============== ADOLATLI SEMAFOR ===============
+class FairSemaphore:
+    """
+    Foydalanuvchilar bo'yicha round-robin navbatli semafor
+
+    Bo'shagan joy eng ko'p so'rov yuborgan foydalanuvchiga emas,
+    navbatdagi keyingi foydalanuvchiga beriladi.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: "OrderedDict[int, Deque[asyncio.Future]]" = OrderedDict()
+        self._per_user: Dict[int, int] = {}
+
+    def pending(self, user_id: int) -> int:
+        """Foydalanuvchining navbatdagi va ishlayotgan so'rovlari"""
+        return self._per_user.get(user_id, 0)
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    async def acquire(self, user_id: int):
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user_id, deque()).append(future)
+
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Joy berilgan, lekin kutish bekor qilindi - joyni keyingisiga o'tkazish
+                self._release_slot()
+            else:
+                queue = self._waiters.get(user_id)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiters[user_id]
+            self._forget(user_id)
+            raise
+
+    def release(self, user_id: int):
+        self._forget(user_id)
+        self._release_slot()
+
+    def _forget(self, user_id: int):
+        count = self._per_user.get(user_id, 0) - 1
+        if count > 0:
+            self._per_user[user_id] = count
+        else:
+            self._per_user.pop(user_id, None)
+
+    def _release_slot(self):
+        while self._waiters:
+            user_id, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            if queue:
+                self._waiters.move_to_end(user_id)
+            else:
+                del self._waiters[user_id]
+
+            if not future.done():
+                future.set_result(None)  # Joy to'g'ridan-to'g'ri kutayotganga o'tadi
+                return
+
+        self.active -= 1
+
+# =============== NARXLAR ===============
+def handler_cost(event: TelegramObject, handler_object) -> Tuple[str, float]:
+    """
+    Update narxi: avval callback data, keyin handler nomi bo'yicha
+
+    admin_callback_handler kabi umumiy handlerlar bir nechta amalni bajaradi -
+    ularning og'irligi faqat callback data dan ma'lum.
+    """
+    name = getattr(handler_object.callback, "__name__", "")
+    if isinstance(event, CallbackQuery) and event.data in RATE_LIMIT['callback_costs']:
+        return f"{name}:{event.data}", RATE_LIMIT['callback_costs'][event.data]
+    return name, RATE_LIMIT['handler_costs'].get(name, RATE_LIMIT['default_cost'])
+
+def registered_handler_names(router: Router) -> Set[str]:
+    """Router va uning ichki routerlaridagi xabar va callback handler nomlari"""
+    names = set()
+    for current in router.chain_tail:
+        for observer in (current.message, current.callback_query):
+            for handler_object in observer.handlers:
+                names.add(getattr(handler_object.callback, "__name__", ""))
+    return names
+
+def check_handler_costs(dp: Dispatcher):
+    """
+    handler_costs dagi har bir nom ro'yxatdan o'tgan handlerga mos kelishini tekshirish
+
+    Handler qayta nomlansa yoki umumiy handler ichiga ko'chirilsa, narx jimgina
+    ishlamay qolmasligi uchun (handlerlar ro'yxatdan o'tgandan keyin chaqiriladi).
+    """
+    if not RATE_LIMIT['enabled']:
+        return
+
+    unknown = set(RATE_LIMIT['handler_costs']) - registered_handler_names(dp)
+    if unknown:
+        raise ValueError(
+            f"handler_costs has no registered handler for: {sorted(unknown)} "
+            f"(use callback_costs for actions dispatched by a shared callback handler)"
+        )
+
+# =============== MIDDLEWARE ===============
+class ThrottlingMiddleware(BaseMiddleware):
+    """Ichki middleware - handler aniqlangandan keyin uning narxi bo'yicha cheklaydi"""
+
+    def __init__(self):
+        self.limiter = RateLimiter(
+            RATE_LIMIT['bucket_capacity'], RATE_LIMIT['refill_per_second'], LIMITS['max_tracked_users']
+        )
+        self.heavy = FairSemaphore(LIMITS['max_concurrent_heavy_handlers'])
+        self._notified: Dict[int, float] = {}
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        user = data.get("event_from_user")
+        handler_object = data.get("handler")
+        if user is None or handler_object is None:
+            return await handler(event, data)
+
+        name, cost = handler_cost(event, handler_object)
+
+        wait = self.limiter.consume(user.id, cost)
+        if wait:
+            logger.info(f"Throttled user {user.id} on {name} (cost {cost})")
+            await self._reject(event, user.id, f"⏳ Juda ko'p so'rov. {math.ceil(wait)} soniyadan keyin urinib ko'ring.")
+            return None
+
+        if cost < RATE_LIMIT['heavy_cost']:
+            return await handler(event, data)
+
+        if self.heavy.pending(user.id) >= LIMITS['max_heavy_per_user']:
+            self.limiter.refund(user.id, cost)
+            await self._reject(event, user.id, "⏳ Oldingi so'rovingiz hali bajarilmoqda.")
+            return None
+
+        try:
+            await asyncio.wait_for(self.heavy.acquire(user.id), LIMITS['max_queue_wait'])
+        except asyncio.TimeoutError:
+            self.limiter.refund(user.id, cost)
+            logger.warning(f"Heavy handler queue timeout for user {user.id} on {name}")
+            await self._reject(event, user.id, "⏳ Server band. Birozdan keyin urinib ko'ring.")
+            return None
+
+        try:
+            return await handler(event, data)
+        finally:
+            self.heavy.release(user.id)
+
+    async def _reject(self, event: TelegramObject, user_id: int, text: str):
+        """Foydalanuvchini ogohlantirish (xabarlar ham cheklangan)"""
+        if isinstance(event, CallbackQuery):
+            # Tugmadagi "yuklanmoqda" belgisini har doim o'chirish kerak
+            await event.answer(text)
+            return
+
+        now = time.monotonic()
+        if isinstance(event, Message) and now - self._notified.get(user_id, 0.0) >= RATE_LIMIT['notify_interval']:
+            if len(self._notified) >= LIMITS['max_tracked_users']:
+                self._notified = {
+                    key: notified_at for key, notified_at in self._notified.items()
+                    if now - notified_at < RATE_LIMIT['notify_interval']
+                }
+            self._notified[user_id] = now
+            await event.answer(text)
+
+def setup_throttling(dp: Dispatcher):
+    """Cheklash middleware ini xabar va callback larga ulash (bitta umumiy holat bilan)"""
+    if not RATE_LIMIT['enabled']:
+        return
+
+    middleware = ThrottlingMiddleware()
+    dp.message.middleware(middleware)
+    dp.callback_query.middleware(middleware)
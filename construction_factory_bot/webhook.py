@@ -0,0 +1,211 @@
+"""
+Webhook rejimi - aiohttp server va bir nechta worker jarayonlari
+
+Ishga tushirish:
+    python main.py --webhook --workers 4
+    python webhook.py --set-webhook      # Telegramga webhook manzilini ro'yxatdan o'tkazish
+
+Prometheus: har bir worker o'z /metrics serverini METRICS_HOST:(METRICS_PORT + worker
+indeksi) da ochadi (metrikalar jarayon ichida). Har bir worker alohida scrape target:
+    --workers 4 -> 127.0.0.1:9100 ... 127.0.0.1:9103
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import BOT_TOKEN, INTEGRATION_SETTINGS, FSM_STORAGE_SETTINGS, METRICS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+def get_webhook_secret() -> str:
+    """Webhook maxfiy tokeni (barcha worker larda bir xil bo'lishi kerak)"""
+    return INTEGRATION_SETTINGS['webhook_secret'] or hashlib.sha256(BOT_TOKEN.encode()).hexdigest()
+
+def get_webhook_url() -> str:
+    return INTEGRATION_SETTINGS['webhook_base_url'].rstrip("/") + INTEGRATION_SETTINGS['webhook_path']
+
+# =============== REQUEST HANDLER ===============
+class RecordingRequestHandler(SimpleRequestHandler):
+    """
+    Update larni qayta ishlovchi handler
+
+    webhook_record_path berilgan bo'lsa, tekshiruvdan o'tgan update lar
+    load-test uchun JSONL faylga yoziladi (utils/loadtest.py).
+    """
+
+    def __init__(self, *args, record_path: str = "", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.record_file = open(record_path, "a", encoding="utf-8", buffering=1) if record_path else None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.record_file is not None and self.verify_secret(request.headers.get(SECRET_HEADER, ""), self.bot):
+            update = await request.json()
+            self.record_file.write(json.dumps(update, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+        return await super().handle(request)
+
+    async def close(self) -> None:
+        if self.record_file is not None:
+            self.record_file.close()
+        await super().close()
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok", "worker": os.getenv("BOT_WORKER_INDEX", "0")})
+
+# =============== ILOVA ===============
+async def create_app() -> web.Application:
+    """Bitta worker uchun aiohttp ilovasi"""
+    from main import create_bot, setup_dispatcher, set_bot_commands, is_primary_worker
+    from database.fsm_storage import create_fsm_storage
+    from utils.metrics import start_metrics_server
+
+    bot = create_bot()
+    storage = await create_fsm_storage()
+    dp = setup_dispatcher(bot, storage)
+
+    app = web.Application()
+
+    # Update javob qaytarilishidan oldin to'liq qayta ishlanadi -
+    # shunda to'xtashda aiohttp ishlanayotgan so'rovlarni kutib oladi (graceful drain)
+    handler = RecordingRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=get_webhook_secret(),
+        handle_in_background=False,
+        record_path=INTEGRATION_SETTINGS['webhook_record_path']
+    )
+    handler.register(app, path=INTEGRATION_SETTINGS['webhook_path'])
+    app.router.add_get("/healthz", health)
+
+    setup_application(app, dp, bot=bot)
+
+    # /metrics ommaviy webhook portida emas - worker ning alohida lokal portida
+    if METRICS_SETTINGS['port']:
+        async def start_metrics(app: web.Application):
+            worker_index = int(os.getenv("BOT_WORKER_INDEX", "0"))
+            app["metrics_runner"] = await start_metrics_server(port=METRICS_SETTINGS['port'] + worker_index)
+
+        async def stop_metrics(app: web.Application):
+            if app.get("metrics_runner") is not None:
+                await app["metrics_runner"].cleanup()
+
+        app.on_startup.append(start_metrics)
+        app.on_cleanup.append(stop_metrics)
+
+    if is_primary_worker():
+        async def on_app_startup(app: web.Application):
+            await set_bot_commands(bot)
+            if INTEGRATION_SETTINGS['webhook_base_url']:
+                await register_webhook(bot, dp.resolve_used_update_types())
+
+        app.on_startup.append(on_app_startup)
+
+    return app
+
+async def register_webhook(bot: Bot, allowed_updates=None):
+    """Telegramga webhook manzilini o'rnatish"""
+    await bot.set_webhook(
+        url=get_webhook_url(),
+        secret_token=get_webhook_secret(),
+        allowed_updates=allowed_updates,
+        drop_pending_updates=False
+    )
+    logger.info(f"Webhook o'rnatildi: {get_webhook_url()}")
+
+# =============== WORKER LAR ===============
+def run_worker(worker_index: int, workers: int):
+    """Bitta worker jarayoni (SO_REUSEPORT bilan bir xil portni tinglaydi)"""
+    os.environ["BOT_WORKER_INDEX"] = str(worker_index)
+
+    from utils.logging_setup import setup_logging
+    setup_logging()
+
+    web.run_app(
+        create_app(),
+        host=INTEGRATION_SETTINGS['api_host'],
+        port=INTEGRATION_SETTINGS['api_port'],
+        reuse_port=workers > 1,
+        shutdown_timeout=INTEGRATION_SETTINGS['webhook_drain_timeout'],
+        print=None
+    )
+
+def run_webhook(workers: int = None):
+    """
+    Webhook serverini N ta jarayonda ishga tushirish
+
+    FSM holatlari umumiy storage da (Redis yoki SQLite) bo'lgani uchun
+    foydalanuvchining keyingi update i istalgan worker ga tushishi mumkin.
+    """
+    workers = workers or INTEGRATION_SETTINGS['webhook_workers']
+
+    if workers > 1 and FSM_STORAGE_SETTINGS['backend'] == "memory":
+        raise RuntimeError("Bir nechta worker uchun FSM_STORAGE=redis yoki sqlite bo'lishi kerak")
+
+    logger.info(
+        f"Webhook: {INTEGRATION_SETTINGS['api_host']}:{INTEGRATION_SETTINGS['api_port']}"
+        f"{INTEGRATION_SETTINGS['webhook_path']}, {workers} worker"
+    )
+
+    if workers == 1:
+        run_worker(0, 1)
+        return
+
+    # Worker lar bir-birining yozishlarini ko'rishi uchun keshlar muddatli bo'ladi
+    os.environ.setdefault("REFERENCE_CACHE_TTL", "60")
+    os.environ["WEBHOOK_WORKERS"] = str(workers)
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(index, workers), name=f"webhook-worker-{index}")
+        for index in range(workers)
+    ]
+
+    for process in processes:
+        process.start()
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # SIGINT worker larga ham yetib boradi - ular navbatdagi so'rovlarni tugatib to'xtaydi
+        for process in processes:
+            process.join(INTEGRATION_SETTINGS['webhook_drain_timeout'] + 5)
+            if process.is_alive():
+                process.terminate()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Webhook server")
+    parser.add_argument("--workers", type=int, default=None, help="Worker jarayonlari soni")
+    parser.add_argument("--set-webhook", action="store_true", help="Faqat webhook manzilini o'rnatish")
+    parser.add_argument("--delete-webhook", action="store_true", help="Webhookni o'chirish (polling uchun)")
+    args = parser.parse_args()
+
+    if args.set_webhook or args.delete_webhook:
+        async def configure():
+            bot = Bot(token=BOT_TOKEN)
+            try:
+                if args.delete_webhook:
+                    await bot.delete_webhook()
+                    logger.info("Webhook o'chirildi")
+                else:
+                    await register_webhook(bot)
+            finally:
+                await bot.session.close()
+
+        logging.basicConfig(level=logging.INFO)
+        asyncio.run(configure())
+    else:
+        run_webhook(args.workers)
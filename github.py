@@ -268,9 +268,28 @@
 
 ###########################################################################################################################################
 #!/usr/bin/env python3
+import argparse
+import asyncio
+import hashlib
 import json
+import os
 import re
-from typing import List
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from multiprocessing import cpu_count
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from chunked_pool import pool_map
+
+# Pattern: github.com/owner/repo/blob/branch/path (modul yuklanganda bir marta kompilyatsiya qilinadi)
+BLOB_PATTERN = re.compile(r'https?://github\.com/([^/]+)/([^/]+)/blob/([^/]+)/(.+)')
+RAW_PREFIX = "https://raw.githubusercontent.com/"
+
+STREAM_CHUNK = 10000
 
 def convert_to_raw_url(blob_url: str) -> str:
     """
@@ -279,59 +298,48 @@ def convert_to_raw_url(blob_url: str) -> str:
     github.com/owner/repo/blob/branch/path/file.ext 
     -> 
     raw.githubusercontent.com/owner/repo/branch/path/file.ext
+
+    Raw URL, REPO_URL: yozuvi va boshqa URL'lar o'zgarishsiz qaytariladi.
     """
-    # Pattern: github.com/owner/repo/blob/branch/path
-    pattern = r'https?://github\.com/([^/]+)/([^/]+)/blob/([^/]+)/(.+)'
-    match = re.match(pattern, blob_url)
-    
+    match = BLOB_PATTERN.match(blob_url)
     if match:
-        owner, repo, branch, file_path = match.groups()
-        raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{file_path}"
-        return raw_url
-    
-    # Agar allaqachon raw URL bo'lsa, o'zgarishsiz qaytarish
-    if "raw.githubusercontent.com" in blob_url:
-        return blob_url
-    
-    # Agar o'zgartirib bo'lmasa, asl URL ni qaytarish
+        return RAW_PREFIX + "/".join(match.groups())
     return blob_url
 
+def convert_batch(items: List) -> List:
+    """
+    Ro'yxatni bitta siklda o'zgartiradi (string bo'lmagan elementlar o'zgarishsiz)
+
+    Metod va funksiyalar lokal o'zgaruvchiga olingan - 1M+ element uchun
+    har bir iteratsiyadagi atribut qidiruvi sezilarli.
+    """
+    match = BLOB_PATTERN.match
+    join = "/".join
+    result = []
+    append = result.append
+
+    for item in items:
+        found = match(item) if isinstance(item, str) else None
+        append(RAW_PREFIX + join(found.groups()) if found else item)
+
+    return result
+
 def process_json_file(input_file: str, output_file: str = None):
     """
     JSON fayldagi GitHub URL'larini raw formatga o'zgartiradi
+
+    Butun fayl xotiraga o'qiladi - juda katta fayllar uchun stream_convert.
     """
     # JSON faylni o'qish
     with open(input_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
-    # Agar data ro'yxat bo'lsa
+    # Ro'yxat (REPO_URL: yozuvlari saqlanadi) yoki raw_urls kalitli dict
     if isinstance(data, list):
-        converted_urls = []
-        
-        for item in data:
-            # Agar REPO_URL bo'lsa (sizning formatda "REPO_URL:https://...")
-            if isinstance(item, str):
-                if item.startswith("REPO_URL:"):
-                    # REPO_URL ni saqlash
-                    converted_urls.append(item)
-                else:
-                    # Oddiy URL ni o'zgartirish
-                    raw_url = convert_to_raw_url(item)
-                    converted_urls.append(raw_url)
-            else:
-                # Agar string bo'lmasa, o'zgarishsiz qoldirish
-                converted_urls.append(item)
-        
-        result = converted_urls
+        result = converted_urls = convert_batch(data)
     
     elif isinstance(data, dict) and "raw_urls" in data:
-        # Agar dict va ichida raw_urls bo'lsa
-        converted_urls = []
-        for url in data["raw_urls"]:
-            raw_url = convert_to_raw_url(url)
-            converted_urls.append(raw_url)
-        
-        data["raw_urls"] = converted_urls
+        data["raw_urls"] = converted_urls = convert_batch(data["raw_urls"])
         result = data
     
     else:
@@ -346,19 +354,15 @@ def process_json_file(input_file: str, output_file: str = None):
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(result, f, indent=4, ensure_ascii=False)
     
-    print(f"✅ {len(converted_urls) if isinstance(data, list) else len(data.get('raw_urls', []))} ta URL o'zgartirildi")
+    print(f"✅ {len(converted_urls)} ta URL o'zgartirildi")
     print(f"💾 Natijalar saqlandi: {output_file}")
     
-    # Birinchi 5 ta URL ni ko'rsatish
+    # Birinchi 5 ta URL ni ko'rsatish (REPO_URL'ni o'tkazib yuborish)
     print(f"\n📋 Namuna URL'lar:")
-    urls_to_show = converted_urls if isinstance(data, list) else data.get('raw_urls', [])
-    
-    # REPO_URL'ni o'tkazib yuborish
-    show_urls = []
-    for url in urls_to_show[:6]:  # Birinchi 6 tasi
-        if isinstance(url, str) and url.startswith("REPO_URL:"):
-            continue
-        show_urls.append(url)
+    show_urls = [
+        url for url in converted_urls[:6]
+        if not (isinstance(url, str) and url.startswith("REPO_URL:"))
+    ]
     
     for i, url in enumerate(show_urls[:5], 1):
         print(f"{i}. {url}")
@@ -369,13 +373,405 @@ def convert_url_list(url_list: List[str]) -> List[str]:
     """
     URL'lar ro'yxatini to'g'ridan-to'g'ri o'zgartiradi
     """
-    raw_urls = []
-    
-    for blob_url in url_list:
-        raw_url = convert_to_raw_url(blob_url)
-        raw_urls.append(raw_url)
-    
-    return raw_urls
+    return convert_batch(url_list)
+
+# =============== STREAMING KONVERTATSIYA ===============
+def convert_stream(items, workers: int = 1, chunk_size: int = STREAM_CHUNK):
+    """O'zgartirilgan bo'laklarni kirish tartibida qaytaradi (workers > 1 - Pool.imap, chunked_pool.py)"""
+    return pool_map(convert_batch, items, workers, chunk_size)
+
+def _dump(value, depth: int) -> str:
+    """json.dump(indent=4) bilan bir xil ko'rinishdagi qiymat (depth - ichma-ichlik)"""
+    return json.dumps(value, indent=4, ensure_ascii=False).replace("\n", "\n" + "    " * depth)
+
+def _write_array(out, items, depth: int, workers: int, chunk_size: int) -> int:
+    pad = "\n" + "    " * (depth + 1)
+    count = 0
+
+    for converted in convert_stream(items, workers, chunk_size):
+        out.write(("[" if count == 0 else ",") + pad + ("," + pad).join(_dump(v, depth + 1) for v in converted))
+        count += len(converted)
+
+    out.write("\n" + "    " * depth + "]" if count else "[]")
+    return count
+
+def stream_convert(input_file: str, output_file: str, workers: int = 1, chunk_size: int = STREAM_CHUNK) -> int:
+    """
+    URL'larni xotiraga to'liq yuklamasdan o'zgartiradi
+
+    - .txt: har qatorda bitta URL
+    - .json: ro'yxat yoki raw_urls kalitli dict (boshqa kalitlar kichik deb hisoblanadi)
+
+    Natija process_json_file bilan bayt-ma-bayt bir xil.
+
+    Returns:
+        int: O'zgartirilgan elementlar soni
+    """
+    import ijson
+
+    with open(output_file, "w", encoding="utf-8") as out:
+        if input_file.endswith(".txt"):
+            count = 0
+            with open(input_file, "r", encoding="utf-8") as f:
+                lines = (line.rstrip("\n") for line in f)
+                for converted in convert_stream(lines, workers, chunk_size):
+                    out.write("\n".join(converted) + "\n")
+                    count += len(converted)
+            return count
+
+        with open(input_file, "rb") as f:
+            _, first_event, _ = next(ijson.parse(f))
+
+        if first_event == "start_array":
+            with open(input_file, "rb") as f:
+                return _write_array(out, ijson.items(f, "item", use_float=True), 0, workers, chunk_size)
+
+        if first_event != "start_map":
+            raise ValueError("Noto'g'ri JSON format")
+
+        with open(input_file, "rb") as f:
+            keys = [value for prefix, event, value in ijson.parse(f) if prefix == "" and event == "map_key"]
+        if "raw_urls" not in keys:
+            raise ValueError("Noto'g'ri JSON format: raw_urls topilmadi")
+
+        count = 0
+        out.write("{")
+        for i, key in enumerate(keys):
+            out.write(("," if i else "") + "\n    " + json.dumps(key, ensure_ascii=False) + ": ")
+            with open(input_file, "rb") as f:
+                if key == "raw_urls":
+                    count = _write_array(out, ijson.items(f, "raw_urls.item", use_float=True), 1, workers, chunk_size)
+                else:
+                    out.write(_dump(next(ijson.items(f, key, use_float=True)), 1))
+        out.write("\n}" if keys else "}")
+        return count
+
+# =============== BENCHMARK ===============
+def make_sample_urls(count: int) -> List:
+    """Blob, raw va REPO_URL: aralash test ro'yxati"""
+    base = "https://github.com/otaboyevsardorbek1/PERFECT_BULDING_MCHJ"
+    urls: List = [f"REPO_URL:{base}"]
+    for i in range(count - 1):
+        if i % 10 == 9:
+            urls.append(f"{RAW_PREFIX}owner/repo/master/dir{i % 100}/file{i}.py")
+        else:
+            urls.append(f"{base}/blob/master/construction_factory_bot/dir{i % 100}/file{i}.py")
+    return urls
+
+def _legacy_convert(blob_url: str) -> str:
+    """Eski variant: har chaqiruvda pattern satri bilan re.match"""
+    match = re.match(r'https?://github\.com/([^/]+)/([^/]+)/blob/([^/]+)/(.+)', blob_url)
+    if match:
+        owner, repo, branch, file_path = match.groups()
+        return f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{file_path}"
+    return blob_url
+
+def benchmark(count: int = 1_000_000, workers: int = 0, repeat: int = 3):
+    """Konvertatsiya variantlarini solishtirish (eng yaxshi natija, URL/s)"""
+    workers = workers or cpu_count()
+    urls = make_sample_urls(count)
+    expected = convert_batch(urls)
+
+    def best(func):
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - started)
+        if result != expected:
+            raise AssertionError("Variant natijasi farq qiladi")
+        return min(times)
+
+    variants = {
+        "legacy re.match(str)": lambda: [_legacy_convert(u) if isinstance(u, str) else u for u in urls],
+        "compiled, per-url": lambda: [convert_to_raw_url(u) if isinstance(u, str) else u for u in urls],
+        "convert_batch": lambda: convert_batch(urls),
+        f"Pool.imap x{workers}": lambda: [u for chunk in convert_stream(urls, workers) for u in chunk],
+    }
+
+    print(f"🏁 {count:,} ta URL, {repeat} marta, eng yaxshi natija")
+    for name, func in variants.items():
+        seconds = best(func)
+        print(f"  {name:<24} {seconds:8.3f} s  {count / seconds:>12,.0f} URL/s")
+
+    with tempfile.TemporaryDirectory(prefix="raw_bench_") as tmp:
+        source = os.path.join(tmp, "urls.json")
+        with open(source, "w", encoding="utf-8") as f:
+            json.dump({"metadata": {"total_files": count}, "raw_urls": urls}, f, indent=4, ensure_ascii=False)
+
+        reference = os.path.join(tmp, "reference.json")
+        with open(reference, "w", encoding="utf-8") as f:
+            json.dump({"metadata": {"total_files": count}, "raw_urls": expected}, f, indent=4, ensure_ascii=False)
+
+        for stream_workers in (1, workers):
+            target = os.path.join(tmp, f"stream_{stream_workers}.json")
+            started = time.perf_counter()
+            stream_convert(source, target, stream_workers)
+            seconds = time.perf_counter() - started
+            same = Path(target).read_bytes() == Path(reference).read_bytes()
+            name = f"stream_convert x{stream_workers}"
+            print(f"  {name:<24} {seconds:8.3f} s  {count / seconds:>12,.0f} URL/s"
+                  f"  {'✅' if same else '❌ natija farq qiladi'}")
+
+# =============== PARALLEL YUKLOVCHI ===============
+RAW_HOST = "https://raw.githubusercontent.com"
+MANIFEST_NAME = ".manifest.json"
+CACHE_DIR_NAME = ".cache"
+READ_CHUNK = 64 * 1024
+
+class RawFileDownloader:
+    """
+    Raw URL'lardagi fayllarni parallel yuklab, papkaga ko'chiradi
+
+    - aiohttp connection pool (bir vaqtda concurrency tadan ko'p ulanish yo'q)
+    - ETag / If-None-Match - o'zgarmagan fayl uchun 304, tana yuklanmaydi
+    - .cache/<sha256> - kontent keshi (o'chirilgan fayl tarmoqsiz tiklanadi)
+    - .manifest.json - nima yuklanganini yozadi, to'xtatilgan ish davom ettiriladi
+    - base_url - raw.githubusercontent.com o'rniga boshqa server (test uchun)
+    """
+
+    def __init__(self, dest_dir: str, concurrency: int = 16, base_url: Optional[str] = None,
+                 revalidate: bool = True, timeout: float = 30, retries: int = 3):
+        self.dest_dir = Path(dest_dir)
+        self.cache_dir = self.dest_dir / CACHE_DIR_NAME
+        self.manifest_path = self.dest_dir / MANIFEST_NAME
+        self.concurrency = concurrency
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.revalidate = revalidate
+        self.timeout = timeout
+        self.retries = retries
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = self._load_manifest()
+        self.stats = {"fetched": 0, "not_modified": 0, "skipped": 0, "failed": 0, "bytes": 0}
+
+    def _load_manifest(self) -> Dict:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            print(f"⚠️ {self.manifest_path} buzilgan - qaytadan yuklanadi")
+            return {}
+
+    def save_manifest(self):
+        """Manifestni atomar yozish (yarim yozilgan fayl qolmaydi)"""
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    def local_path(self, url: str) -> Path:
+        """raw.githubusercontent.com/owner/repo/branch/path -> dest_dir/path"""
+        parsed = urlparse(url)
+        parts = parsed.path.strip("/").split("/")
+        if parsed.netloc == "raw.githubusercontent.com":
+            parts = parts[3:]
+        if not parts or any(part in ("", ".", "..") for part in parts):
+            raise ValueError(f"Noto'g'ri fayl yo'li: {url}")
+        return self.dest_dir.joinpath(*parts)
+
+    def request_url(self, url: str) -> str:
+        if self.base_url and url.startswith(RAW_HOST):
+            return self.base_url + url[len(RAW_HOST):]
+        return url
+
+    def _restore(self, entry: Dict, path: Path) -> bool:
+        """Manifestdagi fayl diskda bormi (yo'q bo'lsa keshdan tiklash)"""
+        if path.exists() and path.stat().st_size == entry["size"]:
+            return True
+        cached = self.cache_dir / entry["sha256"]
+        if not cached.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cached, path)
+        return True
+
+    async def _store(self, response, path: Path):
+        """Javobni keshga oqim bilan yozish, keyin manzilga nusxalash"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                async for chunk in response.content.iter_chunked(READ_CHUNK):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            cached = self.cache_dir / digest.hexdigest()
+            os.replace(tmp_name, cached)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cached, path)
+        return digest.hexdigest(), size
+
+    async def fetch(self, session, url: str):
+        import aiohttp
+
+        try:
+            path = self.local_path(url)
+        except ValueError as e:
+            self.stats["failed"] += 1
+            print(f"   ❌ {e}")
+            return
+
+        entry = self.manifest.get(url)
+        cached = entry is not None and self._restore(entry, path)
+
+        if cached and not self.revalidate:
+            self.stats["skipped"] += 1
+            return
+
+        headers = {"If-None-Match": entry["etag"]} if cached and entry.get("etag") else {}
+
+        for attempt in range(1, self.retries + 1):
+            try:
+                async with session.get(self.request_url(url), headers=headers) as response:
+                    if response.status == 304:
+                        entry["checked_at"] = datetime.now().isoformat(timespec="seconds")
+                        self.stats["not_modified"] += 1
+                        return
+
+                    response.raise_for_status()
+                    checksum, size = await self._store(response, path)
+
+                self.manifest[url] = {
+                    "path": str(path.relative_to(self.dest_dir)),
+                    "etag": response.headers.get("ETag"),
+                    "sha256": checksum,
+                    "size": size,
+                    "fetched_at": datetime.now().isoformat(timespec="seconds")
+                }
+                self.stats["fetched"] += 1
+                self.stats["bytes"] += size
+                return
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status == 429 or e.status >= 500
+                if not retryable or attempt == self.retries:
+                    self.stats["failed"] += 1
+                    print(f"   ❌ {url}: {e}")
+                    return
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+    async def run(self, urls: List[str]) -> Dict:
+        """Barcha URL'larni yuklash (REPO_URL: yozuvlari va takrorlar tashlanadi)"""
+        import aiohttp
+
+        urls = list(dict.fromkeys(
+            url for url in urls if isinstance(url, str) and not url.startswith("REPO_URL:")
+        ))
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {"User-Agent": "GitHub-Raw-Fetcher/1.0"}
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            tasks = [asyncio.ensure_future(self.fetch(session, url)) for url in urls]
+            try:
+                for done, task in enumerate(asyncio.as_completed(tasks), 1):
+                    await task
+                    # To'xtatilsa ham yuklanganlar manifestda qoladi
+                    if done % 50 == 0:
+                        self.save_manifest()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                self.save_manifest()
+
+        return self.stats
+
+def download_files(urls: List[str], dest_dir: str, **kwargs) -> Dict:
+    """URL'lar ro'yxatini dest_dir ga parallel yuklash"""
+    started = time.perf_counter()
+    stats = asyncio.run(RawFileDownloader(dest_dir, **kwargs).run(urls))
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+
+    print(
+        f"📥 Yuklandi: {stats['fetched']}, o'zgarmagan: {stats['not_modified']}, "
+        f"o'tkazildi: {stats['skipped']}, xato: {stats['failed']} "
+        f"({stats['bytes'] / 1024:.1f} KB, {stats['seconds']} s)"
+    )
+    return stats
+
+# =============== TEST SERVERI ===============
+async def start_stand_in_server(root: str, host: str = "127.0.0.1", port: int = 0):
+    """
+    raw.githubusercontent.com o'rnini bosuvchi lokal server (ETag va 304 bilan)
+
+    root/owner/repo/branch/path fayllarini xuddi shu yo'l bilan beradi.
+
+    Returns:
+        Tuple: (runner, base_url)
+    """
+    from aiohttp import web
+
+    root_path = Path(root).resolve()
+
+    async def handle(request):
+        path = (root_path / request.match_info["path"]).resolve()
+        if root_path not in path.parents or not path.is_file():
+            raise web.HTTPNotFound()
+
+        body = path.read_bytes()
+        etag = f'"{hashlib.sha256(body).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/{path:.+}", handle)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+
+    bound_port = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound_port}"
+
+def self_test(files: int = 200, concurrency: int = 16):
+    """Lokal server ustida: birinchi yuklash, qayta ishga tushirish (304) va keshdan tiklash"""
+    with tempfile.TemporaryDirectory(prefix="raw_fetch_") as tmp:
+        source = Path(tmp) / "server" / "owner" / "repo" / "master"
+        for i in range(files):
+            file_path = source / f"dir{i % 10}" / f"file{i}.txt"
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(f"fayl {i}\n" * 200, encoding="utf-8")
+
+        urls = [
+            f"{RAW_HOST}/owner/repo/master/dir{i % 10}/file{i}.txt" for i in range(files)
+        ]
+        mirror = Path(tmp) / "mirror"
+
+        async def scenario():
+            runner, base_url = await start_stand_in_server(str(Path(tmp) / "server"))
+            try:
+                results = []
+                for label in ("birinchi", "qayta", "keshdan"):
+                    if label == "keshdan":
+                        shutil.rmtree(mirror / "dir0")
+                    started = time.perf_counter()
+                    stats = await RawFileDownloader(str(mirror), concurrency, base_url).run(urls)
+                    results.append((label, time.perf_counter() - started, dict(stats)))
+                return results
+            finally:
+                await runner.cleanup()
+
+        results = asyncio.run(scenario())
+        for label, seconds, stats in results:
+            print(f"🧪 {label}: {seconds:.3f} s - {stats}")
+
+        same = all(
+            (mirror / f"dir{i % 10}" / f"file{i}.txt").read_bytes()
+            == (source / f"dir{i % 10}" / f"file{i}.txt").read_bytes()
+            for i in range(files)
+        )
+        ok = same and results[0][2]["fetched"] == files and results[1][2]["not_modified"] == files
+        print("✅ Self-test muvaffaqiyatli" if ok else "❌ Self-test xato")
+        return ok
 
 def main():
     """
@@ -469,12 +865,43 @@ def main():
     return output_data
 
 if __name__ == "__main__":
-    # JSON fayl nomi (agar JSON fayldan o'qish kerak bo'lsa)
-    json_file = None  # "otaboyevsardorbek1_PERFECT_BULDING_MCHJ_files.json"
-    
-    if json_file:
+    parser = argparse.ArgumentParser(description="GitHub blob URL -> raw URL va parallel yuklash")
+    parser.add_argument("--json", dest="json_file", help="URL'lar JSON fayli (berilmasa - ichki ro'yxat)")
+    parser.add_argument("--download", metavar="DIR", help="Fayllarni shu papkaga yuklash")
+    parser.add_argument("--concurrency", type=int, default=16, help="Bir vaqtdagi ulanishlar")
+    parser.add_argument("--base-url", help="raw.githubusercontent.com o'rniga server (masalan lokal test)")
+    parser.add_argument("--no-revalidate", action="store_true", help="Manifestdagi fayllarni umuman so'ramaslik")
+    parser.add_argument("--self-test", action="store_true", help="Lokal server ustida yuklovchini sinash")
+    parser.add_argument("--stream", metavar="OUT", help="--json faylni streaming o'zgartirib OUT ga yozish (.json yoki .txt)")
+    parser.add_argument("--workers", type=int, default=1, help="Streaming uchun jarayonlar soni")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="N ta URL ustida variantlarni solishtirish")
+    args = parser.parse_args()
+
+    if args.self_test:
+        raise SystemExit(0 if self_test(concurrency=args.concurrency) else 1)
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        raise SystemExit(0)
+
+    if args.stream:
+        if not args.json_file:
+            parser.error("--stream uchun --json kerak")
+        started = time.perf_counter()
+        total = stream_convert(args.json_file, args.stream, args.workers)
+        print(f"✅ {total} ta URL o'zgartirildi ({time.perf_counter() - started:.2f} s): {args.stream}")
+        raise SystemExit(0)
+
+    if args.json_file:
         # JSON fayldan o'qib o'zgartiramiz
-        process_json_file(json_file)
+        result = process_json_file(args.json_file)
     else:
         # To'g'ridan-to'g'ri URL ro'yxatini o'zgartiramiz
-        main()
\ No newline at end of file
+        result = main()
+
+    if args.download and result is not None:
+        urls = result if isinstance(result, list) else result["raw_urls"]
+        download_files(
+            urls, args.download, concurrency=args.concurrency,
+            base_url=args.base_url, revalidate=not args.no_revalidate
+        )
\ No newline at end of file
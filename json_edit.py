@@ -1,39 +1,198 @@
+import argparse
+import io
 import json
-from pathlib import Path
-from pygments import highlight
-from pygments.lexers import JsonLexer
-from pygments.formatters import TerminalFormatter
-
-def load_json(file_path):
-    """Load JSON data from file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def save_json(data, file_path, indent=4):
-    """Save JSON data to file with formatting"""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=indent, ensure_ascii=False)
-
-def print_colored_json(data):
+import os
+import sys
+import tempfile
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import ijson
+
+# Bundan katta hujjatlar rangsiz chiqariladi (Pygments katta matnda juda sekin)
+COLOR_MAX_BYTES = 256 * 1024
+
+DEFAULT_TIME_FIELDS = ("inserted_at", "updated_at")
+
+
+class JsonStreamWriter:
+    """
+    JSONni token-token yozuvchi (json.dump(indent=...) bilan bir xil format).
+    Xotirada faqat ochiq konteynerlar steki saqlanadi.
+    """
+
+    def __init__(self, out, indent=4):
+        self.out = out
+        self.indent = " " * indent if indent else ""
+        self.stack = []  # har bir ochiq konteyner uchun: hali element yozilmaganmi
+        self.after_key = False
+
+    def _newline(self, depth):
+        if self.indent:
+            self.out.write("\n" + self.indent * depth)
+
+    def _before_value(self):
+        if self.after_key:
+            self.after_key = False
+            return
+        if self.stack:
+            if not self.stack[-1]:
+                self.out.write("," if self.indent else ", ")
+            self.stack[-1] = False
+            self._newline(len(self.stack))
+
+    def start(self, bracket):
+        self._before_value()
+        self.out.write(bracket)
+        self.stack.append(True)
+
+    def end(self, bracket):
+        empty = self.stack.pop()
+        if not empty:
+            self._newline(len(self.stack))
+        self.out.write(bracket)
+
+    def key(self, name):
+        self._before_value()
+        self.out.write(json.dumps(name, ensure_ascii=False) + ": ")
+        self.after_key = True
+
+    def scalar(self, text):
+        self._before_value()
+        self.out.write(text)
+
+
+def to_timezone(tz_name):
+    """ISO vaqtni tz_name ga o‘tkazuvchi transform (o‘qib bo‘lmasa qiymat o‘zgarmaydi)"""
+    tz = ZoneInfo(tz_name)
+
+    def convert(value):
+        try:
+            return datetime.fromisoformat(value).astimezone(tz).isoformat()
+        except (TypeError, ValueError):
+            return value
+
+    return convert
+
+
+def stream_transform(input_file, out, transforms=None, drop=(), indent=4):
+    """
+    JSONni bir o‘tishda o‘qib-yozadi: transforms - {maydon: funksiya} (string qiymatlar
+    uchun), drop - butunlay tashlab yuboriladigan maydonlar.
+
+    Returns:
+        dict: {'transformed': n, 'dropped': n}
+    """
+    transforms = transforms or {}
+    drop = frozenset(drop)
+    writer = JsonStreamWriter(out, indent)
+    stats = {"transformed": 0, "dropped": 0}
+
+    current_key = None
+    skipping = False
+    skip_depth = 0
+
+    with open(input_file, "rb") as f:
+        for _, event, value in ijson.parse(f):
+            if skipping:
+                if event in ("start_map", "start_array"):
+                    skip_depth += 1
+                elif event in ("end_map", "end_array"):
+                    skip_depth -= 1
+                skipping = skip_depth > 0
+                continue
+
+            if event == "map_key":
+                if value in drop:
+                    skipping = True
+                    stats["dropped"] += 1
+                    continue
+                writer.key(value)
+                current_key = value
+                continue
+
+            key, current_key = current_key, None
+
+            if event == "start_map":
+                writer.start("{")
+            elif event == "start_array":
+                writer.start("[")
+            elif event == "end_map":
+                writer.end("}")
+            elif event == "end_array":
+                writer.end("]")
+            elif event == "string":
+                transform = transforms.get(key)
+                if transform is not None:
+                    value = transform(value)
+                    stats["transformed"] += 1
+                writer.scalar(json.dumps(value, ensure_ascii=False))
+            elif event == "boolean":
+                writer.scalar("true" if value else "false")
+            elif event == "null":
+                writer.scalar("null")
+            else:
+                # integer/double/number - ijson Decimal qaytaradi, asl aniqlik saqlanadi
+                writer.scalar(str(value))
+
+    return stats
+
+
+def print_colored_json(text):
     """Print JSON with colored formatting"""
     try:
-        
-        json_str = json.dumps(data, indent=4, ensure_ascii=False)
-        print(highlight(json_str, JsonLexer(), TerminalFormatter()))
+        from pygments import highlight
+        from pygments.lexers import JsonLexer
+        from pygments.formatters import TerminalFormatter
+
+        print(highlight(text, JsonLexer(), TerminalFormatter()))
     except ImportError:
-        print(json.dumps(data, indent=4, ensure_ascii=False))
+        print(text)
+
+
+def use_color(input_file):
+    """Rang faqat terminalga va kichik hujjatlar uchun"""
+    return sys.stdout.isatty() and os.path.getsize(input_file) <= COLOR_MAX_BYTES
+
 
-# Example usage
 if __name__ == "__main__":
-    # Load JSON
-    input_file = "input.json"
-    output_file = "output.json"
-    
-    data = load_json(input_file)
-    
-    # Display colored output
-    print_colored_json(data)
-    
-    # Save formatted JSON
-    save_json(data, output_file)
-    print(f"Saved to {output_file}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="JSONni streaming tarzda tahrirlash")
+    parser.add_argument("input", nargs="?", default="input.json")
+    parser.add_argument("-o", "--output", help="Natija fayli (berilmasa - stdout)")
+    parser.add_argument("-i", "--in-place", action="store_true", help="Kirish faylini almashtirish")
+    parser.add_argument("--tz", help="Vaqt maydonlarini shu timezone ga o‘tkazish (masalan Asia/Tashkent)")
+    parser.add_argument("--fields", nargs="+", default=list(DEFAULT_TIME_FIELDS), help="Vaqt maydonlari")
+    parser.add_argument("--drop", nargs="+", default=[], help="Olib tashlanadigan maydonlar")
+    parser.add_argument("--indent", type=int, default=4)
+    parser.add_argument("--no-color", action="store_true")
+    args = parser.parse_args()
+
+    transforms = {}
+    if args.tz:
+        convert = to_timezone(args.tz)
+        transforms = {field: convert for field in args.fields}
+
+    output_file = args.input if args.in_place else args.output
+
+    if output_file:
+        # Vaqtinchalik faylga yozib, oxirida almashtirish - xatolikda asl fayl buzilmaydi
+        directory = os.path.dirname(os.path.abspath(output_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as out:
+                stats = stream_transform(args.input, out, transforms, args.drop, args.indent)
+            os.replace(tmp_path, output_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        print(f"Saved to {output_file} ({stats['transformed']} transformed, {stats['dropped']} dropped)",
+              file=sys.stderr)
+
+    elif not args.no_color and use_color(args.input):
+        buffer = io.StringIO()
+        stream_transform(args.input, buffer, transforms, args.drop, args.indent)
+        print_colored_json(buffer.getvalue())
+
+    else:
+        stream_transform(args.input, sys.stdout, transforms, args.drop, args.indent)
+        sys.stdout.write("\n")
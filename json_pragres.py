@@ -1,8 +1,39 @@
-import ijson
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
 from datetime import datetime
-from multiprocessing import Pool, cpu_count
+from itertools import islice
+from multiprocessing import cpu_count
+
+import ijson
 import pytz
 
+from chunked_pool import pool_map
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # --vectorized rejimi uchun kerak
+    np = pd = None
+
+# Qayta ishlanadigan vaqt maydonlari
+TIME_FIELDS = frozenset({"created_at", "inserted_at", "updated_at", "deleted_at"})
+
+# Bundan kichik fayllar bitta jarayonda ishlanadi (Pool ishga tushirish qimmatroq)
+SMALL_INPUT_BYTES = 16 * 1024 * 1024
+
+CHUNK_SIZE = 5000
+
+# Timezone obyekti bir marta yaratiladi (har bir worker import paytida o'zi oladi)
+UZ_TZ = pytz.timezone("Asia/Tashkent")
+
+# Vektorli yo‘l faqat offsetli qiymatlar uchun: offsetsiz vaqtni fromisoformat
+# mahalliy vaqt deb, pandas esa UTC deb oladi - ular per-value yo‘lga qaytariladi
+OFFSET_PATTERN = r"(?:[+-]\d{2}:?\d{2}|Z)$"
+
 
 # --- 1. Vaqtni formatlovchi funksiya (har bir worker uchun) ---
 def convert_time(value):
@@ -11,68 +42,194 @@ def convert_time(value):
     va uni HH:MM-DD.MM.YYYY formatiga chiqaradi.
     """
     try:
-        # ISO formatdagi vaqtni o‘qish
         dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError) as e:
+        return f"ERROR: {e} → VALUE: {value}"
 
-        # O‘zbekiston vaqtiga chiqarish
-        uz_tz = pytz.timezone("Asia/Tashkent")
-        dt_uz = dt.astimezone(uz_tz)
+    return dt.astimezone(UZ_TZ).strftime("%H:%M-%d.%m.%Y")
 
-        # Formatlash
-        return dt_uz.strftime("%H:%M-%d.%m.%Y")
-    except Exception as e:
-        return f"ERROR: {e} → VALUE: {value}"
+
+def convert_times_vectorized(values):
+    """
+    Vaqtlar ro‘yxatini bitta paketda formatlaydi (pandas/NumPy).
+    Natija convert_time bilan bir xil; o‘qib bo‘lmagan qiymatlar
+    (va offsetsiz vaqtlar) per-value yo‘l orqali o‘tadi.
+    """
+    series = pd.Series(values, dtype=object)
+    has_offset = series.str.contains(OFFSET_PATTERN, regex=True, na=False)
+
+    parsed = pd.to_datetime(series.where(has_offset), utc=True, format="ISO8601", errors="coerce")
+    local = parsed.dt.tz_convert(UZ_TZ.zone).dt.tz_localize(None)
+
+    # "YYYY-MM-DDTHH:MM" - NumPy C darajasida, keyin qismlarni joylashtirish
+    iso = pd.Series(np.datetime_as_string(local.to_numpy(), unit="m"))
+    formatted = iso.str[11:16] + "-" + iso.str[8:10] + "." + iso.str[5:7] + "." + iso.str[0:4]
+
+    result = formatted.tolist()
+    for i in np.flatnonzero(parsed.isna().to_numpy()):
+        result[i] = convert_time(values[i])
+    return result
+
+
+def convert_chunk(chunk, vectorized=False):
+    """
+    (yo‘l, qiymat) juftliklarini JSONL qatorlariga aylantiradi.
+    Serializatsiya ham workerda bajariladi - asosiy jarayon faqat yozadi.
+    """
+    if vectorized:
+        formatted_values = convert_times_vectorized([value for _, value in chunk])
+    else:
+        formatted_values = [convert_time(value) for _, value in chunk]
+
+    lines = []
+    errors = 0
+    for (path, value), formatted in zip(chunk, formatted_values):
+        if formatted.startswith("ERROR"):
+            errors += 1
+        lines.append(json.dumps({"path": path, "value": value, "formatted": formatted}, ensure_ascii=False))
+    return "\n".join(lines) + "\n", len(chunk), errors
+
+
+def convert_chunk_vectorized(chunk):
+    return convert_chunk(chunk, vectorized=True)
 
 
 # --- 2. ijson orqali JSONdan vaqtlarni streaming chiqarish ---
 def extract_times(json_file):
     """
     JSONni xotiraga yuklamasdan, streaming tarzda o‘qib,
-    created_at, updated_at, deleted_at vaqtlarini chiqaradi.
+    vaqt maydonlarini (yo‘l, qiymat) ko‘rinishida chiqaradi.
     """
-    with open(json_file, "r", encoding="utf-8") as f:
+    with open(json_file, "rb") as f:
         for prefix, event, value in ijson.parse(f):
-            if (
-                event == "string" and (
-                    prefix.endswith("created_at") or
-                    prefix.endswith("updated_at") or
-                    prefix.endswith("deleted_at")
-                )
-            ):
-                yield value  # generator, RAMni tejaydi
+            if event == "string" and prefix.rpartition(".")[2] in TIME_FIELDS:
+                yield prefix, value  # generator, RAMni tejaydi
 
 
 # --- 3. Multiprocessing orqali juda tez qayta ishlash ---
-def process_large_json(json_file):
+def process_large_json(json_file, output_file, workers=None, chunk_size=CHUNK_SIZE, vectorized=False):
+    """
+    Vaqtlarni formatlab, natijani JSONL faylga bo‘lak-bo‘lak yozadi.
+    Xotira sarfi fayl hajmiga bog‘liq emas: bir vaqtda eng ko‘pi bilan
+    2 * workers ta bo‘lak jarayonlar orasida bo‘ladi.
 
-    print("[INFO] JSON ichidagi vaqtlar yig‘ilmoqda...")
+    Natijalar tartibi kafolatlanmaydi (imap_unordered) - har bir qatorda "path" bor.
+    vectorized=True - har bir bo‘lak pandas/NumPy bilan paketda formatlanadi.
+    """
+    if vectorized and pd is None:
+        raise RuntimeError("--vectorized uchun pandas va numpy o‘rnatilishi kerak")
 
-    # Vaqtlar ro‘yxatini olamiz
-    times = list(extract_times(json_file))
+    converter = convert_chunk_vectorized if vectorized else convert_chunk
 
-    print(f"[INFO] Jami {len(times)} ta vaqt topildi.")
-    workers = cpu_count()
+    if workers is None:
+        workers = 1 if os.path.getsize(json_file) < SMALL_INPUT_BYTES else cpu_count()
 
-    print(f"[INFO] {workers} ta CPU yadro orqali yordamchi jarayonlar ishga tushdi...")
+    total = 0
+    errors = 0
 
-    # Multiprocessing Pool
-    with Pool(workers) as pool:
-        results = pool.map(convert_time, times, chunksize=500)
+    if workers <= 1:
+        print("[INFO] Bitta jarayonda ishlanmoqda...")
+    else:
+        print(f"[INFO] {workers} ta CPU yadro orqali yordamchi jarayonlar ishga tushdi...")
 
-    print("[INFO] Vaqtlar formatlandi!")
-    return results
+    with open(output_file, "w", encoding="utf-8") as out:
+        for lines, count, chunk_errors in pool_map(
+            converter, extract_times(json_file), workers, chunk_size, ordered=False
+        ):
+            out.write(lines)
+            total += count
+            errors += chunk_errors
 
+    print(f"[INFO] Jami {total} ta vaqt formatlandi ({errors} ta xato).")
+    return total, errors
 
-# --- 4. Ishga tushirish ---
+
+# --- 4. Benchmark ---
+def make_scaled_input(json_file, scale, target):
+    """Massivli JSON faylni scale marta takrorlab katta test fayl yaratadi."""
+    with open(json_file, "r", encoding="utf-8") as f:
+        body = f.read().strip()
+    inner = body[1:-1].strip()
+
+    with open(target, "w", encoding="utf-8") as out:
+        out.write("[")
+        for i in range(scale):
+            if i:
+                out.write(",")
+            out.write(inner)
+        out.write("]")
+
+
+def check_vectorized(json_file):
+    """Ikkala yo‘l bir xil natija berishini tekshiradi."""
+    times = list(extract_times(json_file))
+    values = [value for _, value in times]
+    expected = [convert_time(value) for value in values]
+    actual = convert_times_vectorized(values)
+
+    mismatches = [(v, e, a) for v, e, a in zip(values, expected, actual) if e != a]
+    for value, exp, act in mismatches[:10]:
+        print(f"[CHECK] {value}: per-value={exp!r}, vectorized={act!r}")
+    print(f"[CHECK] {len(values)} ta vaqt, {len(mismatches)} ta farq")
+    return not mismatches
+
+
+def benchmark(json_file, scale, workers_list, vectorized=False):
+    modes = [False, True] if vectorized else [False]
+    if vectorized:
+        check_vectorized(json_file)
+
+    with tempfile.TemporaryDirectory(prefix="json_pragres_") as tmp:
+        scaled = os.path.join(tmp, "scaled.json")
+        output = os.path.join(tmp, "times.jsonl")
+
+        print(f"[BENCH] {json_file} x{scale} yaratilmoqda...")
+        make_scaled_input(json_file, scale, scaled)
+        size_mb = os.path.getsize(scaled) / 1024 / 1024
+        print(f"[BENCH] Test fayl: {size_mb:.1f} MB")
+
+        for mode in modes:
+            for workers in workers_list:
+                started = time.perf_counter()
+                total, _ = process_large_json(scaled, output, workers=workers, vectorized=mode)
+                elapsed = time.perf_counter() - started
+
+                # ru_maxrss Linuxda KB da
+                peak_main = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                peak_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+                print(
+                    f"[BENCH] {'vectorized' if mode else 'per-value'} workers={workers}: "
+                    f"{elapsed:.2f} s, {total / elapsed:,.0f} vaqt/s, {size_mb / elapsed:.1f} MB/s, "
+                    f"peak RSS: asosiy {peak_main:.0f} MB, worker {peak_children:.0f} MB"
+                )
+
+
+# --- 5. Ishga tushirish ---
 if __name__ == "__main__":
-    file_path = "output.json"  # JSON fayling manzili
+    parser = argparse.ArgumentParser(description="JSON ichidagi vaqtlarni Toshkent vaqtiga o‘tkazish")
+    parser.add_argument("input", nargs="?", default="output.json", help="JSON fayl manzili")
+    parser.add_argument("-o", "--output", default="times.jsonl", help="Natija (JSONL)")
+    parser.add_argument("-w", "--workers", type=int, help="Jarayonlar soni (standart: fayl hajmiga qarab)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--vectorized", action="store_true", help="pandas/NumPy bilan paketli formatlash")
+    parser.add_argument("--check", action="store_true", help="Vektorli va per-value natijalarni solishtirish")
+    parser.add_argument("--benchmark", action="store_true", help="Kattalashtirilgan fayl ustida o‘lchash")
+    parser.add_argument("--scale", type=int, default=1000, help="Benchmark uchun takrorlash soni")
+    args = parser.parse_args()
 
     print("[SYSTEM] Dastur ishga tushirildi...")
 
-    formatted_times = process_large_json(file_path)
+    if args.check:
+        raise SystemExit(0 if check_vectorized(args.input) else 1)
+
+    if args.benchmark:
+        benchmark(args.input, args.scale, [1, args.workers or cpu_count()], args.vectorized)
+    else:
+        process_large_json(args.input, args.output, args.workers, args.chunk_size, args.vectorized)
 
-    print("\n--- FORMATLANGAN VAQTLARDAN 20 TASINI KO‘RSATAMIZ ---")
-    for t in formatted_times[:20]:
-        print(t)
+        print("\n--- FORMATLANGAN VAQTLARDAN 20 TASINI KO‘RSATAMIZ ---")
+        with open(args.output, "r", encoding="utf-8") as f:
+            for line in islice(f, 20):
+                print(json.loads(line)["formatted"])
 
-    print("\n[OK] BARCHA VAQTLAR MUKAMMAL FORMATDA TAYYOR!")
+        print("\n[OK] BARCHA VAQTLAR MUKAMMAL FORMATDA TAYYOR!")